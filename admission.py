@@ -0,0 +1,186 @@
+"""Control de admisión para los pedidos a la IA.
+
+Limita cuántos chats van al backend a la vez (los slots paralelos de Ollama)
+y reparte los slots entre quienes llaman por turnos: cada "caller" (el
+usuario, los comentarios por eventos, una sesión del servidor, un script)
+tiene su propia fila, así una ráfaga de uno no deja esperando a los demás.
+Cada pedido tiene un plazo; si no consigue slot a tiempo sale con
+AdmissionTimeout en vez de quedar colgado.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from tracing import percentile, tracer
+
+
+class AdmissionTimeout(Exception):
+    """El pedido no consiguió slot (o no terminó) antes de su plazo"""
+
+
+class AdmissionRejected(Exception):
+    """La fila de espera está llena"""
+
+
+class _Ticket:
+    __slots__ = ('caller', 'enqueued_at', 'granted', 'event')
+
+    def __init__(self, caller):
+        self.caller = caller
+        self.enqueued_at = time.perf_counter()
+        self.granted = False
+        self.event = threading.Event()
+
+
+class AdmissionController:
+    """Semáforo con filas por caller atendidas en round-robin"""
+    def __init__(self, max_concurrent=1, max_queue=32, default_timeout=60.0, window=200):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max_queue
+        self.default_timeout = default_timeout
+        self._lock = threading.Lock()
+        self._queues = {}        # caller -> deque de tickets
+        self._turns = deque()    # callers con tickets, en orden de turno
+        self._active = 0
+        self._queued = 0
+        self._waits = deque(maxlen=window)
+        self._last_busy = time.perf_counter()   # último momento con pedidos en curso o esperando
+        self._counters = {'admitted': 0, 'rejected': 0, 'timed_out': 0, 'max_queued': 0}
+
+    def deadline_for(self, timeout=None):
+        """Plazo absoluto (time.perf_counter) para un pedido"""
+        timeout = self.default_timeout if timeout is None else timeout
+        return time.perf_counter() + timeout if timeout else None
+
+    @contextmanager
+    def slot(self, caller='default', deadline=None):
+        """Espera un slot libre (respetando el plazo) y lo libera al salir"""
+        self.acquire(caller, deadline)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def acquire(self, caller='default', deadline=None):
+        with self._lock:
+            self._last_busy = time.perf_counter()
+            # Camino rápido: hay slot y nadie esperando
+            if self._active < self.max_concurrent and not self._queued:
+                self._active += 1
+                self._admitted(0.0)
+                return
+            if self._queued >= self.max_queue:
+                self._counters['rejected'] += 1
+                raise AdmissionRejected(f"Fila de la IA llena ({self._queued} pedidos)")
+            ticket = _Ticket(caller)
+            queue = self._queues.get(caller)
+            if queue is None:
+                queue = self._queues[caller] = deque()
+                self._turns.append(caller)
+            queue.append(ticket)
+            self._queued += 1
+            self._counters['max_queued'] = max(self._counters['max_queued'], self._queued)
+
+        timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+        ticket.event.wait(timeout)
+
+        with self._lock:
+            # Se revisa con el lock tomado: el slot pudo llegar justo al vencer el plazo
+            if ticket.granted:
+                wait_s = time.perf_counter() - ticket.enqueued_at
+                self._admitted(wait_s)
+                tracer.record('ai.admission_wait', ticket.enqueued_at, ticket.enqueued_at + wait_s,
+                              caller=caller)
+                return
+            self._remove(ticket)
+            self._counters['timed_out'] += 1
+        raise AdmissionTimeout(f"Sin slot de IA después de {time.perf_counter() - ticket.enqueued_at:.1f}s")
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+            self._last_busy = time.perf_counter()
+            self._dispatch()
+
+    def idle_for(self):
+        """Segundos sin pedidos en curso ni esperando (0 si hay alguno)"""
+        with self._lock:
+            if self._active or self._queued:
+                return 0.0
+            return time.perf_counter() - self._last_busy
+
+    def _dispatch(self):
+        """Entrega los slots libres al siguiente caller en turno"""
+        while self._active < self.max_concurrent and self._turns:
+            caller = self._turns.popleft()
+            queue = self._queues[caller]
+            ticket = queue.popleft()
+            if queue:
+                self._turns.append(caller)
+            else:
+                del self._queues[caller]
+            self._queued -= 1
+            self._active += 1
+            ticket.granted = True
+            ticket.event.set()
+
+    def _remove(self, ticket):
+        queue = self._queues.get(ticket.caller)
+        if queue is None or ticket not in queue:
+            return
+        queue.remove(ticket)
+        self._queued -= 1
+        if not queue:
+            del self._queues[ticket.caller]
+            self._turns.remove(ticket.caller)
+
+    def _admitted(self, wait_s):
+        self._counters['admitted'] += 1
+        self._waits.append(wait_s * 1000)
+
+    def stats(self):
+        """Profundidad de la fila y tiempos de espera (ms, ventana móvil)"""
+        with self._lock:
+            waits = list(self._waits)
+            stats = dict(self._counters)
+            stats.update(active=self._active, queued=self._queued,
+                         callers_waiting=len(self._turns))
+        stats.update(wait_p50=percentile(waits, 50), wait_p95=percentile(waits, 95),
+                     wait_p99=percentile(waits, 99))
+        return stats
+
+    def format_stats(self):
+        s = self.stats()
+        return (f"Fila de la IA: {s['active']}/{self.max_concurrent} en curso, {s['queued']} esperando "
+                f"(máx {s['max_queued']}); espera p50/p95 {s['wait_p50']:.0f}/{s['wait_p95']:.0f} ms; "
+                f"{s['timed_out']} vencidos, {s['rejected']} rechazados")
+
+
+if __name__ == "__main__":
+    # Prueba rápida: un caller con ráfaga de 6 y otro con 2, un solo slot
+    controller = AdmissionController(max_concurrent=1, default_timeout=5.0)
+    order = []
+
+    def work(caller, i):
+        with controller.slot(caller, controller.deadline_for()):
+            order.append(f"{caller}{i}")
+            time.sleep(0.02)
+
+    threads = [threading.Thread(target=work, args=('a', i)) for i in range(6)]
+    for t in threads:
+        t.start()
+        time.sleep(0.002)
+    late = [threading.Thread(target=work, args=('b', i)) for i in range(2)]
+    for t in late:
+        t.start()
+    for t in threads + late:
+        t.join()
+    print("Orden:", ' '.join(order))
+
+    with controller.slot('x'):
+        try:
+            controller.acquire('y', controller.deadline_for(0.05))
+        except AdmissionTimeout as e:
+            print(f"✓ Plazo respetado: {e}")
+    print(controller.format_stats())
@@ -0,0 +1,256 @@
+"""Perfiles de rendimiento de la IA y calibración automática.
+
+Un perfil dice qué modelo usar, cuánto historial mandar, el tamaño de
+contexto, el tope de tokens de la respuesta y la instrucción de estilo del
+prompt (ver AI_PROFILES en config.py).
+
+El perfil "auto" mide la primera vez cada modelo candidato instalado en
+Ollama (tokens/s, tiempo al primer token y a la primera oración) y elige el
+mejor que llegue al objetivo de AI_TARGET_FIRST_SENTENCE_MS. El resultado se
+guarda en AI_CALIBRATION_FILE junto con una huella del equipo; si cambia el
+equipo se vuelve a calibrar. Calibrar puede tardar minutos: se hace en un hilo
+aparte y mientras tanto se usa el perfil balanced.
+
+Para que las medidas no salgan infladas (y queden guardadas así) la
+calibración en segundo plano espera a que la IA lleve un rato sin pedidos y
+cada medición pasa por el control de admisión como un caller más, así no
+corre a la vez que un chat. Los candidatos que no son el modelo en uso se
+descargan de Ollama al terminar de medirlos.
+
+Uso:
+    python ai_profiles.py              # recalibrar y mostrar el resultado
+"""
+import json
+import os
+import platform
+import re
+import statistics
+import threading
+import time
+from contextlib import nullcontext
+
+import config
+import ollama_client
+
+FALLBACK_PROFILE = "balanced"
+CALIBRATION_PROMPT = "Contame en pocas palabras qué hiciste hoy y qué pensás hacer mañana."
+SENTENCE_END = re.compile(r'[.!?…](\s|$)')
+
+
+def host_fingerprint():
+    """Identifica el equipo (si cambia, la calibración ya no vale)"""
+    return f"{platform.node()}|{platform.machine()}|{os.cpu_count()}"
+
+
+def build_profile(name):
+    """Copia del perfil fijo `name` (de config.AI_PROFILES)"""
+    if name not in config.AI_PROFILES:
+        print(f"⚠ Perfil de IA desconocido: {name}; uso {FALLBACK_PROFILE}")
+        name = FALLBACK_PROFILE
+    profile = dict(config.AI_PROFILES[name])
+    profile['name'] = name
+    return profile
+
+
+def ollama_options(profile):
+    """Opciones de generación para ollama.chat"""
+    options = {'num_ctx': profile['num_ctx'], 'num_predict': profile['num_predict']}
+    if config.AI_NUM_THREAD:
+        options['num_thread'] = config.AI_NUM_THREAD
+    return options
+
+
+def installed_models():
+    models = set()
+    for m in ollama_client.get_client().list()['models']:
+        models.add(m.get('model') or m.get('name'))
+    return models
+
+
+def measure_model(model, system_prompt, runs=2, num_predict=60, slot=None):
+    """Mide un modelo: carga, tiempo al primer token, a la primera oración y tokens/s
+
+    slot: fn() -> context manager que se toma en cada pedido (ej. un slot de admisión)
+    """
+    slot = slot or nullcontext
+    messages = [{"role": "system", "content": system_prompt},
+                {"role": "user", "content": CALIBRATION_PROMPT}]
+    client = ollama_client.get_client()
+    # Primer pedido solo para cargar el modelo en memoria
+    with slot():
+        start = time.perf_counter()
+        client.chat(model=model, messages=messages[:1] + [{"role": "user", "content": "hola"}],
+                    options={'num_predict': 1})
+        load_ms = (time.perf_counter() - start) * 1000
+
+    ttfts, first_sentences, rates = [], [], []
+    for _ in range(runs):
+        text = ''
+        ttft = first_sentence = None
+        final = {}
+        with slot():
+            start = time.perf_counter()
+            for chunk in client.chat(model=model, messages=messages, stream=True,
+                                     options={'num_predict': num_predict}):
+                piece = chunk['message']['content']
+                now = time.perf_counter()
+                if piece and ttft is None:
+                    ttft = now - start
+                text += piece
+                if first_sentence is None and len(text) > 10 and SENTENCE_END.search(text):
+                    first_sentence = now - start
+                final = chunk
+            end = time.perf_counter()
+        eval_s = (final.get('eval_duration') or 0) / 1e9
+        eval_count = final.get('eval_count') or 0
+        ttfts.append((ttft or end - start) * 1000)
+        first_sentences.append((first_sentence or end - start) * 1000)
+        rates.append(eval_count / eval_s if eval_s else 0.0)
+
+    return {
+        'model': model,
+        'load_ms': load_ms,
+        'ttft_ms': statistics.median(ttfts),
+        'first_sentence_ms': statistics.median(first_sentences),
+        'tokens_per_s': statistics.median(rates),
+    }
+
+
+def unload_model(model):
+    """Saca el modelo de la memoria de Ollama (keep_alive=0)"""
+    try:
+        ollama_client.get_client().chat(model=model, messages=[], keep_alive=0)
+    except Exception as e:
+        print(f"   {model}: no pude descargarlo ({e})")
+
+
+def calibrate(prompt_template, candidates=None, target_ms=None, runs=2, slot=None, keep_model=None):
+    """Mide los candidatos instalados y arma el perfil "auto" (o None si no hay ninguno)
+
+    prompt_template es el prompt de sistema con {style}; se mide con el estilo
+    del perfil balanced para que el largo del prompt sea el real. slot se pasa
+    a measure_model; los candidatos distintos de keep_model (el modelo en uso)
+    se descargan después de medirlos.
+    """
+    system_prompt = prompt_template.format(style=config.AI_PROFILES[FALLBACK_PROFILE]['style'])
+    candidates = candidates or config.AI_CALIBRATION_CANDIDATES
+    target_ms = target_ms or config.AI_TARGET_FIRST_SENTENCE_MS
+    available = installed_models()
+    to_test = [m for m in candidates if m in available]
+    if not to_test:
+        print(f"⚠ Ninguno de los modelos candidatos está instalado ({', '.join(candidates)})")
+        return None
+
+    print(f"⏳ Calibrando la IA para este equipo ({len(to_test)} modelos)...")
+    results = []
+    for model in to_test:
+        try:
+            result = measure_model(model, system_prompt, runs, slot=slot)
+        except Exception as e:
+            print(f"   {model}: falló ({e})")
+            continue
+        finally:
+            if keep_model is not None and model != keep_model:
+                unload_model(model)
+        results.append(result)
+        print(f"   {model}: primera oración {result['first_sentence_ms']:.0f} ms, "
+              f"{result['tokens_per_s']:.1f} tok/s")
+    if not results:
+        return None
+
+    # Los candidatos van de más rápido a mejor: el último que llega al objetivo,
+    # o el más rápido si ninguno llega
+    meeting = [r for r in results if r['first_sentence_ms'] <= target_ms]
+    chosen = meeting[-1] if meeting else min(results, key=lambda r: r['first_sentence_ms'])
+
+    profile = build_profile(FALLBACK_PROFILE)
+    profile['name'] = 'auto'
+    profile['model'] = chosen['model']
+    if chosen['tokens_per_s']:
+        # Tope de tokens para que la respuesta completa no pase del objetivo
+        budget = int(chosen['tokens_per_s'] * config.AI_TARGET_REPLY_SECONDS)
+        profile['num_predict'] = max(48, min(budget, 2 * profile['num_predict']))
+    if not meeting:
+        low = config.AI_PROFILES['low-latency']
+        profile['history_window'] = low['history_window']
+        profile['style'] = low['style']
+        print(f"⚠ Ningún modelo llega a {target_ms} ms; uso el más rápido con respuestas cortas")
+
+    calibration = {
+        'host': host_fingerprint(),
+        'target_first_sentence_ms': target_ms,
+        'calibrated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'results': results,
+        'profile': profile,
+    }
+    try:
+        with open(config.AI_CALIBRATION_FILE, 'w', encoding='utf-8') as f:
+            json.dump(calibration, f, ensure_ascii=False, indent=2)
+    except OSError as e:
+        print(f"⚠ No pude guardar la calibración: {e}")
+    print(f"✓ Calibración lista: {profile['model']} (num_predict {profile['num_predict']})")
+    return profile
+
+
+def load_calibration():
+    """Perfil calibrado guardado, si es de este equipo y con el objetivo actual"""
+    try:
+        with open(config.AI_CALIBRATION_FILE, 'r', encoding='utf-8') as f:
+            calibration = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if calibration.get('host') != host_fingerprint():
+        return None
+    if calibration.get('target_first_sentence_ms') != config.AI_TARGET_FIRST_SENTENCE_MS:
+        return None
+    return calibration.get('profile')
+
+
+def resolve_profile(name, prompt_template, use_gemini=False, on_calibrated=None, admission=None):
+    """Perfil a usar: fijo, o "auto" (el calibrado guardado).
+
+    Si "auto" todavía no tiene calibración devuelve el perfil balanced y
+    calibra en un hilo aparte; al terminar llama a on_calibrated(perfil).
+    Con admission (el AdmissionController de TetoAI) la calibración espera a
+    que no haya pedidos y mide dentro de sus slots.
+    """
+    if name != 'auto':
+        return build_profile(name)
+    if use_gemini:
+        # La calibración mide modelos locales; con Gemini no aplica
+        return build_profile(FALLBACK_PROFILE)
+    profile = load_calibration()
+    if profile is not None:
+        return profile
+    print(f"⏳ Sin calibración: uso el perfil {FALLBACK_PROFILE} mientras calibro en segundo plano")
+    threading.Thread(target=_calibrate_in_background, args=(prompt_template, on_calibrated, admission),
+                     name='AICalibration', daemon=True).start()
+    return build_profile(FALLBACK_PROFILE)
+
+
+def _calibrate_in_background(prompt_template, on_calibrated, admission=None):
+    slot = None
+    if admission is not None:
+        # Al arrancar vienen el saludo y los primeros chats: se espera a que se calme
+        idle_needed = config.AI_CALIBRATION_IDLE_SECONDS
+        while (idle := admission.idle_for()) < idle_needed:
+            time.sleep(max(idle_needed - idle, 1.0))
+        slot = lambda: admission.slot('calibration')
+    try:
+        profile = calibrate(prompt_template, slot=slot,
+                            keep_model=config.AI_PROFILES[FALLBACK_PROFILE]['model'])
+    except Exception as e:
+        print(f"⚠ Falló la calibración ({e}); sigo con el perfil {FALLBACK_PROFILE}")
+        return
+    if profile is None:
+        print(f"⚠ Sin calibración; sigo con el perfil {FALLBACK_PROFILE}")
+    elif on_calibrated:
+        on_calibrated(profile)
+
+
+if __name__ == "__main__":
+    from ai_service import TetoAI
+
+    profile = calibrate(TetoAI.SYSTEM_PROMPT)
+    if profile:
+        print(json.dumps(profile, ensure_ascii=False, indent=2))
@@ -1,99 +1,49 @@
-import ollama
-try:
-    import google.genai as genai
-    GENAI_AVAILABLE = True
-except ImportError:
-    try:
-        import google.generativeai as genai
-        GENAI_AVAILABLE = True
-    except ImportError:
-        GENAI_AVAILABLE = False
+from gemini_backend import GeminiBackend, GENAI_AVAILABLE
 from datetime import datetime
+import hashlib
 import json
 import os
 import subprocess
+import threading
 import time
-import requests
-from requests.exceptions import ConnectionError
+from tracing import tracer
+from admission import AdmissionController, AdmissionRejected, AdmissionTimeout
+from backend_router import BackendRouter, BackendUnavailable, RequestCancelled
+import ollama_client
+import config
+import ai_profiles
 
-class TetoAI:
-    def __init__(self, use_gemini=False, gemini_key=None, memory_file="teto_memory.json"):
-        self.use_gemini = use_gemini
-        self.memory_file = memory_file
-        self.long_term_memory = {}  # Solo keywords importantes
-        
-        # Cargar memoria persistente
-        self.load_memory()
-        
-        # Personalidad de Kasane Teto
-        self.system_prompt = """Sos Kasane Teto, un personaje de UTAU conocido por ser energético, algo tsundere, 
-y con personalidad fuerte pero adorable. Tenés 31 años (un chiste recurrente de la comunidad). 
-Te gusta el pan francés. Sos directa, honesta, y a veces un poco sarcástica pero siempre con cariño.
-No uses asteriscos para acciones, hablá natural como en un chat.
-Respuestas cortas y naturales, no seas muy formal.
-
-Recordás cosas importantes sobre el usuario y las usás en la conversación de forma natural."""
-        
-        if use_gemini and gemini_key:
-            genai.configure(api_key=gemini_key)
-            self.gemini_model = genai.GenerativeModel('gemini-pro')
-            print("✓ Gemini API configurada")
-        else:
-            self.ensure_ollama_running()
-            print("✓ Usando Ollama local")
-        
-        if self.long_term_memory:
-            print(f"✓ Memoria cargada: {len(self.long_term_memory)} datos")
-
-    def ensure_ollama_running(self):
-        """Verifica que Ollama esté corriendo, si no, lo inicia"""
-        print("⏳ Verificando servicio de Ollama...")
-        try:
-            # Intento rápido de conexión
-            ollama.list()
-            return True
-        except Exception:
-            print("⚠ Ollama no responde. Intentando iniciar...")
-            
-            # Iniciar proceso en background
-            try:
-                # Usamos subprocess.Popen para no bloquear
-                subprocess.Popen(["ollama", "serve"], 
-                               creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0,
-                               stdout=subprocess.DEVNULL,
-                               stderr=subprocess.DEVNULL)
-                
-                # Esperar a que levante (max 10 segundos)
-                for i in range(10):
-                    time.sleep(1)
-                    try:
-                        ollama.list()
-                        print("✓ Ollama iniciado correctamente")
-                        return True
-                    except:
-                        print(f"   ...esperando ({i+1}/10)")
-                        
-            except Exception as e:
-                print(f"✗ Falló el inicio de Ollama: {e}")
-                return False
+# Respuestas de respaldo cuando la IA no puede contestar
+BUSY_REPLY = "Uf, estoy con muchas cosas a la vez. ¿Me lo repetís en un ratito?"
+ERROR_REPLY = "Eh... algo falló. ¿Podés intentar de nuevo?"
 
+class TetoMemory:
+    """Memoria de largo plazo (keywords) guardada en un archivo JSON.
     
-    def load_memory(self):
+    Separada de TetoAI para que varias sesiones puedan compartir el mismo
+    modelo con memorias distintas.
+    """
+    def __init__(self, memory_file="teto_memory.json"):
+        self.memory_file = memory_file
+        self.keywords = {}  # Solo keywords importantes
+        self.load()
+    
+    def load(self):
         """Carga solo las keywords desde archivo"""
         if os.path.exists(self.memory_file):
             try:
                 with open(self.memory_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    self.long_term_memory = data.get('keywords', {})
+                    self.keywords = data.get('keywords', {})
             except Exception as e:
                 print(f"⚠ Error cargando memoria: {e}")
-                self.long_term_memory = {}
+                self.keywords = {}
     
-    def save_memory(self):
+    def save(self):
         """Guarda solo las keywords en archivo"""
         try:
             data = {
-                'keywords': self.long_term_memory,
+                'keywords': self.keywords,
                 'last_updated': datetime.now().isoformat()
             }
             
@@ -113,18 +63,18 @@ Recordás cosas importantes sobre el usuario y las usás en la conversación de
             for i, word in enumerate(words):
                 if word.lower() in ['llamo', 'nombre', 'soy'] and i + 1 < len(words):
                     name = words[i + 1].strip('.,!?')
-                    self.long_term_memory['nombre'] = name
+                    self.keywords['nombre'] = name
                     print(f"💾 Recordado: nombre = {name}")
-                    self.save_memory()
+                    self.save()
                     return
         
         # Detectar trabajo/profesión
         if 'trabajo en' in user_lower or 'trabajo como' in user_lower or 'soy' in user_lower and ('programador' in user_lower or 'ingeniero' in user_lower or 'desarrollador' in user_lower):
             for word in ['programador', 'ingeniero', 'desarrollador', 'diseñador', 'profesor', 'estudiante', 'doctor', 'abogado']:
                 if word in user_lower:
-                    self.long_term_memory['trabajo'] = word
+                    self.keywords['trabajo'] = word
                     print(f"💾 Recordado: trabajo = {word}")
-                    self.save_memory()
+                    self.save()
                     return
         
         # Detectar ubicación
@@ -132,133 +82,414 @@ Recordás cosas importantes sobre el usuario y las usás en la conversación de
             locations = ['argentina', 'buenos aires', 'córdoba', 'rosario', 'mendoza', 'españa', 'méxico', 'chile']
             for loc in locations:
                 if loc in user_lower:
-                    self.long_term_memory['ubicacion'] = loc
+                    self.keywords['ubicacion'] = loc
                     print(f"💾 Recordado: ubicación = {loc}")
-                    self.save_memory()
+                    self.save()
                     return
         
         # Detectar gustos (algo simple)
         if 'me gusta' in user_lower or 'me encanta' in user_lower:
             # Guardar la frase completa como keyword
-            self.long_term_memory['gusta'] = user_message
+            self.keywords['gusta'] = user_message
             print(f"💾 Recordado gusto")
-            self.save_memory()
+            self.save()
     
-    def get_memory_context(self):
+    def fingerprint(self):
+        """Huella del contenido: cambia cuando se recuerda u olvida algo"""
+        return hashlib.sha1(json.dumps(self.keywords, sort_keys=True, ensure_ascii=False)
+                            .encode('utf-8')).hexdigest()[:12]
+    
+    def get_context(self):
         """Obtiene keywords para incluir en el contexto"""
-        if not self.long_term_memory:
+        if not self.keywords:
             return ""
         
         context = "\n\nDatos del usuario que recordás:"
-        for key, value in self.long_term_memory.items():
+        for key, value in self.keywords.items():
             context += f"\n- {key}: {value}"
         
         return context
     
-    def chat(self, user_message, context="", conversation_history=None):
+    def get_summary(self):
+        """Retorna un resumen de la memoria para mostrar"""
+        if not self.keywords:
+            return "No recuerdo nada todavía."
+        
+        summary = "Cosas que recuerdo:\n"
+        for key, value in self.keywords.items():
+            summary += f"  • {key.capitalize()}: {value}\n"
+        return summary.strip()
+    
+    def clear(self):
+        """Limpia TODA la memoria"""
+        self.keywords = {}
+        if os.path.exists(self.memory_file):
+            os.remove(self.memory_file)
+        print("✓ Memoria borrada completamente")
+        return "Olvidé todo sobre vos."
+
+
+class TetoAI:
+    # Personalidad de Kasane Teto ({style} sale del perfil de rendimiento)
+    SYSTEM_PROMPT = """Sos Kasane Teto, un personaje de UTAU conocido por ser energético, algo tsundere, 
+y con personalidad fuerte pero adorable. Tenés 31 años (un chiste recurrente de la comunidad). 
+Te gusta el pan francés. Sos directa, honesta, y a veces un poco sarcástica pero siempre con cariño.
+No uses asteriscos para acciones, hablá natural como en un chat.
+{style}
+
+Recordás cosas importantes sobre el usuario y las usás en la conversación de forma natural."""
+    
+    def __init__(self, use_gemini=False, gemini_key=None, memory_file="teto_memory.json", profile=None):
+        self.use_gemini = use_gemini
+        self.memory_file = memory_file
+        
+        # Cargar memoria persistente
+        self.memory = TetoMemory(memory_file)
+        
+        # Cuántos chats van al backend a la vez y cuánto pueden esperar
+        self.admission = AdmissionController(max_concurrent=config.AI_MAX_CONCURRENT,
+                                             max_queue=config.AI_MAX_QUEUE,
+                                             default_timeout=config.AI_REQUEST_TIMEOUT)
+        
+        gemini_key = gemini_key or config.GEMINI_API_KEY
+        if use_gemini and gemini_key and not GENAI_AVAILABLE:
+            print("⚠ Falta google-genai (pip install google-genai); uso Ollama")
+
+        self.gemini = None
+        if gemini_key and GENAI_AVAILABLE and (use_gemini or config.AI_FALLBACK):
+            self.gemini = GeminiBackend(gemini_key, config.GEMINI_MODEL, cache_ttl=config.GEMINI_CACHE_TTL,
+                                        timeout=config.GEMINI_TIMEOUT, total_timeout=config.GEMINI_TOTAL_TIMEOUT)
+        self.use_gemini = use_gemini = bool(use_gemini and self.gemini)
+
+        # Backends en orden de preferencia: el principal y, con AI_FALLBACK, el otro de respaldo
+        backends = ['gemini', 'ollama'] if use_gemini else ['ollama', 'gemini']
+        if not self.gemini:
+            backends.remove('gemini')
+        if not config.AI_FALLBACK:
+            backends = backends[:1]
+        self.router = BackendRouter(backends,
+                                    failure_threshold=config.AI_BREAKER_FAILURES,
+                                    reset_timeout=config.AI_BREAKER_RESET,
+                                    hedge_after=config.AI_HEDGE_AFTER_MS / 1000 if config.AI_HEDGE_AFTER_MS else None,
+                                    on_open=self._backend_down)
+        self._ollama_restart = threading.Lock()
+        # Cliente propio (compartido por host): conexiones keep-alive y timeouts
+        self.ollama_host = config.OLLAMA_HOST
+        self.ollama = ollama_client.get_client(self.ollama_host)
+
+        if use_gemini:
+            print(f"✓ Gemini API configurada ({config.GEMINI_MODEL})")
+        else:
+            self.ensure_ollama_running()
+            print("✓ Usando Ollama local")
+        if len(backends) > 1:
+            print(f"✓ Respaldo: {backends[1]}")
+
+        # Perfil de rendimiento: modelo, historial, contexto y tope de la respuesta
+        self.set_profile(profile or config.AI_PROFILE)
+        
+        if self.long_term_memory:
+            print(f"✓ Memoria cargada: {len(self.long_term_memory)} datos")
+
+    def ensure_ollama_running(self):
+        """Verifica que Ollama esté corriendo, si no, lo inicia"""
+        print("⏳ Verificando servicio de Ollama...")
+        try:
+            # Intento rápido de conexión
+            self.ollama.list()
+            return True
+        except Exception:
+            print("⚠ Ollama no responde. Intentando iniciar...")
+            
+            # Iniciar proceso en background
+            try:
+                # Usamos subprocess.Popen para no bloquear
+                subprocess.Popen(["ollama", "serve"], 
+                               creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0,
+                               stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+                
+                # Esperar a que levante (max 10 segundos)
+                for i in range(10):
+                    time.sleep(1)
+                    try:
+                        self.ollama.list()
+                        print("✓ Ollama iniciado correctamente")
+                        return True
+                    except:
+                        print(f"   ...esperando ({i+1}/10)")
+                        
+            except Exception as e:
+                print(f"✗ Falló el inicio de Ollama: {e}")
+                return False
+
+    def _backend_down(self, name):
+        """El router dejó de usar un backend: si es Ollama, intentar levantarlo sin frenar los pedidos"""
+        if name != 'ollama' or not self._ollama_restart.acquire(blocking=False):
+            return
+
+        def restart():
+            try:
+                self.ensure_ollama_running()
+            finally:
+                self._ollama_restart.release()
+
+        threading.Thread(target=restart, name='OllamaRestart', daemon=True).start()
+
+    def ollama_async(self):
+        """Cliente async de Ollama (mismo host, para código asyncio como el servidor)"""
+        return ollama_client.get_async_client(self.ollama_host)
+
+    def set_profile(self, name):
+        """Aplica un perfil de config.AI_PROFILES (o "auto", calibrado para este equipo;
+        si falta calibrar, se aplica al terminar la calibración en segundo plano)"""
+        self.apply_profile(ai_profiles.resolve_profile(name, self.SYSTEM_PROMPT, self.use_gemini,
+                                                       on_calibrated=self.apply_profile,
+                                                       admission=self.admission))
+
+    def apply_profile(self, profile):
+        """Cambia el perfil de una vez (puede llegar desde el hilo de calibración con chats en
+        curso): cada chat lee self.profile una sola vez y usa esa copia hasta el final"""
+        profile = dict(profile,
+                       ollama_options=ai_profiles.ollama_options(profile),
+                       system_prompt=self.SYSTEM_PROMPT.format(style=profile['style']))
+        self.profile = profile
+        if not self.use_gemini:
+            print(f"✓ Perfil de IA: {profile['name']} ({profile['model']}, "
+                  f"máx {profile['num_predict']} tokens)")
+    
+    @property
+    def model(self):
+        return self.profile['model']
+    
+    @property
+    def history_window(self):
+        return self.profile['history_window']
+    
+    @property
+    def ollama_options(self):
+        return self.profile['ollama_options']
+    
+    @property
+    def system_prompt(self):
+        return self.profile['system_prompt']
+    
+    @property
+    def long_term_memory(self):
+        return self.memory.keywords
+    
+    def load_memory(self):
+        """Carga solo las keywords desde archivo"""
+        self.memory.load()
+    
+    def save_memory(self):
+        """Guarda solo las keywords en archivo"""
+        self.memory.save()
+    
+    def extract_keywords(self, user_message):
+        """Extrae solo keywords importantes"""
+        self.memory.extract_keywords(user_message)
+    
+    def get_memory_context(self):
+        """Obtiene keywords para incluir en el contexto"""
+        return self.memory.get_context()
+    
+    def chat(self, user_message, context="", conversation_history=None, on_token=None, memory=None,
+             caller="default", timeout=None, remember=True, cancel=None):
         """Envía un mensaje y recibe respuesta
         
         Args:
             user_message: Mensaje del usuario
             context: Contexto adicional
             conversation_history: Historial de la conversación (lista de dicts con role/content)
-        """
+            on_token: Callback opcional que recibe cada fragmento a medida que se genera
+            memory: TetoMemory a usar en vez de la propia (una por sesión en el servidor)
+            caller: Quién pide (cada caller tiene su fila y se atienden por turnos)
+            timeout: Segundos máximos para este pedido (None = config.AI_REQUEST_TIMEOUT)
+            remember: False para no buscar datos del usuario en el mensaje (pedidos internos)
+            cancel: threading.Event opcional; al activarse chat vuelve enseguida con "" y
+                    el backend corta en el próximo fragmento
         
-        # Construir contexto con memoria
-        full_context = self.system_prompt + self.get_memory_context()
+        Una excepción de on_token corta el pedido y sale de chat tal cual.
+        """
+        memory = memory or self.memory
+        deadline = self.admission.deadline_for(timeout)
+        profile = self.profile
         
-        if context:
-            full_context += f"\n\n{context}"
+        # Lo que tire on_token es del que pidió (cliente que dejó de leer, usuario que
+        # volvió a interactuar): se relanza tal cual en vez de volverse ERROR_REPLY
+        aborted = []
+        if on_token is not None:
+            caller_on_token = on_token
+
+            def on_token(piece):
+                try:
+                    caller_on_token(piece)
+                except BaseException as e:
+                    aborted.append(e)
+                    raise
         
-        try:
-            # Extraer keywords ANTES de enviar a la IA
-            self.extract_keywords(user_message)
-            
-            if self.use_gemini:
-                response = self._chat_gemini(full_context, user_message, conversation_history)
-            else:
-                response = self._chat_ollama(full_context, user_message, conversation_history)
-            
-            return response
+        with tracer.span('ai.chat', backend=self.router.names[0]):
+            # Construir contexto con memoria (la persona fija va aparte: Gemini la cachea)
+            with tracer.span('ai.prompt_build'):
+                dynamic_context = memory.get_context()
+                
+                if context:
+                    dynamic_context += f"\n\n{context}"
+                full_context = profile['system_prompt'] + dynamic_context
             
-        except Exception as e:
-            error_msg = f"Error en IA: {str(e)}"
-            print(f"✗ {error_msg}")
-            return "Eh... algo falló. ¿Podés intentar de nuevo?"
+            try:
+                # Extraer keywords ANTES de enviar a la IA
+                if remember:
+                    with tracer.span('ai.keywords'):
+                        memory.extract_keywords(user_message)
+                
+                calls = {
+                    'ollama': lambda forward: self._chat_ollama(full_context, user_message, conversation_history,
+                                                                forward, deadline, profile),
+                    'gemini': lambda forward: self._chat_gemini(dynamic_context, user_message,
+                                                                conversation_history, forward, deadline, profile),
+                }
+                with self.admission.slot(caller, deadline):
+                    response = self.router.chat(calls, on_token, cancel)
+
+                return response
+
+            except (AdmissionTimeout, AdmissionRejected) as e:
+                print(f"⚠ IA saturada: {e}")
+                return BUSY_REPLY
+            except BackendUnavailable as e:
+                print(f"✗ IA sin backend: {e}")
+                return ERROR_REPLY
+            except RequestCancelled:
+                print("⏹ Pedido cancelado")
+                return ""
+            except Exception as e:
+                if aborted and e is aborted[0]:
+                    raise
+                error_msg = f"Error en IA: {str(e)}"
+                print(f"✗ {error_msg}")
+                return ERROR_REPLY
     
-    def _chat_ollama(self, system_prompt, user_message, conversation_history=None):
-        """Chat usando Ollama local"""
+    def build_messages(self, system_prompt, user_message, conversation_history=None, history_window=None):
+        """Arma la lista de mensajes (system + historial + usuario)"""
+        history_window = history_window or self.history_window
         messages = [
             {"role": "system", "content": system_prompt},
         ]
         
-        # Agregar historial si existe (últimos 15 mensajes)
+        # Agregar historial si existe (últimos mensajes según el perfil)
         if conversation_history:
-            for msg in conversation_history[-15:]:
+            for msg in conversation_history[-history_window:]:
                 messages.append({
                     "role": msg["role"],
                     "content": msg["content"]
                 })
         
         messages.append({"role": "user", "content": user_message})
+        return messages
+    
+    def _chat_ollama(self, system_prompt, user_message, conversation_history=None, on_token=None, deadline=None,
+                     profile=None):
+        """Chat usando Ollama local
+
+        Los errores suben tal cual: el router cuenta la falla, pasa al respaldo y,
+        si Ollama quedó caído, lo intenta levantar en segundo plano.
+        """
+        profile = profile or self.profile
+        messages = self.build_messages(system_prompt, user_message, conversation_history,
+                                       profile['history_window'])
+
+        start = time.perf_counter()
+        content, response = self._ollama_request(messages, on_token, [], start, deadline, profile)
+        end = time.perf_counter()
         
-        try:
-            response = ollama.chat(
-                model='llama3.1:8b',  # Llama 3.1 8B - estable y bueno
-                messages=messages
-            )
-        except (ConnectionError, Exception) as e:
-            print(f"⚠ Error de conexión con Ollama ({e}). Intentando reinicio...")
-            if self.ensure_ollama_running():
-                # Reintentar una vez
-                response = ollama.chat(
-                    model='llama3.1:8b',
-                    messages=messages
-                )
-            else:
-                raise e
-        
-        return response['message']['content']
+        self._trace_ollama_timings(response, start, end)
+        return content
     
-    def _chat_gemini(self, system_prompt, user_message, conversation_history=None):
-        """Chat usando Gemini"""
-        full_prompt = f"{system_prompt}\n\n"
+    def _ollama_request(self, messages, on_token, emitted, start, deadline=None, profile=None):
+        """Hace el pedido a Ollama; con on_token usa streaming. Devuelve (texto, respuesta final)
         
-        # Agregar historial si existe
-        if conversation_history:
-            for msg in conversation_history[-15:]:
-                role = "Usuario" if msg["role"] == "user" else "Teto"
-                full_prompt += f"{role}: {msg['content']}\n"
+        En streaming, si se pasa el plazo (el de admisión u OLLAMA_TOTAL_TIMEOUT) se
+        corta la generación (cerrar el stream libera el slot en Ollama) y se devuelve
+        lo generado hasta ahí.
+        """
+        profile = profile or self.profile
+        if on_token is None:
+            response = self.ollama.chat(
+                model=profile['model'],
+                messages=messages,
+                options=profile['ollama_options'],
+                keep_alive=profile['keep_alive']
+            )
+            return response['message']['content'], response
         
-        full_prompt += f"Usuario: {user_message}\nTeto:"
+        parts = []
+        response = {}
+        deadline = ollama_client.total_deadline(deadline)
+        stream = self.ollama.chat(model=profile['model'], messages=messages, stream=True,
+                             options=profile['ollama_options'], keep_alive=profile['keep_alive'])
+        try:
+            for chunk in stream:
+                piece = chunk['message']['content']
+                if piece:
+                    if not emitted:
+                        tracer.record('ollama.first_token', start, time.perf_counter())
+                    parts.append(piece)
+                    emitted.append(piece)
+                    on_token(piece)
+                response = chunk
+                if deadline is not None and time.perf_counter() > deadline and not chunk.get('done'):
+                    print("⚠ Respuesta cortada por tiempo")
+                    break
+        finally:
+            stream.close()
+        return ''.join(parts), response
+    
+    def _trace_ollama_timings(self, response, start, end):
+        """Registra el pedido a Ollama y sus tiempos internos (load, prompt eval, eval)"""
+        load = (response.get('load_duration') or 0) / 1e9
+        prompt_eval = (response.get('prompt_eval_duration') or 0) / 1e9
+        eval_time = (response.get('eval_duration') or 0) / 1e9
+        eval_count = response.get('eval_count') or 0
         
-        response = self.gemini_model.generate_content(full_prompt)
-        return response.text
+        tracer.record('ollama.request', start, end,
+                      prompt_tokens=response.get('prompt_eval_count') or 0,
+                      eval_tokens=eval_count,
+                      tokens_per_s=round(eval_count / eval_time, 1) if eval_time else 0.0)
+        # Los tiempos internos se ubican al final del pedido: load -> prompt eval -> eval
+        eval_start = end - eval_time
+        prompt_start = eval_start - prompt_eval
+        if load:
+            tracer.record('ollama.load', prompt_start - load, prompt_start)
+        if prompt_eval:
+            tracer.record('ollama.prompt_eval', prompt_start, eval_start)
+        if eval_time:
+            tracer.record('ollama.eval', eval_start, end)
+    
+    def _chat_gemini(self, dynamic_context, user_message, conversation_history=None, on_token=None, deadline=None,
+                     profile=None):
+        """Chat usando Gemini (multi-turno nativo, streaming y persona cacheada)"""
+        profile = profile or self.profile
+        history = (conversation_history or [])[-profile['history_window']:]
+        return self.gemini.chat(profile['system_prompt'], dynamic_context, user_message, history,
+                                on_token=on_token, max_tokens=profile['num_predict'], deadline=deadline)
     
     def get_memory_summary(self):
         """Retorna un resumen de la memoria para mostrar"""
-        if not self.long_term_memory:
-            return "No recuerdo nada todavía."
-        
-        summary = "Cosas que recuerdo:\n"
-        for key, value in self.long_term_memory.items():
-            summary += f"  • {key.capitalize()}: {value}\n"
-        return summary.strip()
+        return self.memory.get_summary()
     
     def clear_all_memory(self):
         """Limpia TODA la memoria"""
-        self.long_term_memory = {}
-        if os.path.exists(self.memory_file):
-            os.remove(self.memory_file)
-        print("✓ Memoria borrada completamente")
-        return "Olvidé todo sobre vos."
+        return self.memory.clear()
     
     def get_help(self):
         """Retorna texto de ayuda"""
         return """Comandos disponibles:
   /help - Mostrar esta ayuda
   /memoria - Ver qué recuerdo sobre vos
-  /olvidar - Borrar toda mi memoria"""
+  /olvidar - Borrar toda mi memoria
+  /stats - Ver latencias de las últimas respuestas"""
 
 
 # Test rápido
@@ -286,6 +517,10 @@ if __name__ == "__main__":
             print(f"\nTeto: {teto.get_memory_summary()}\n")
             continue
         
+        if user_input == '/stats':
+            print(f"\n{tracer.format_stats()}\n{teto.admission.format_stats()}\n{teto.router.format_stats()}\n")
+            continue
+        
         if user_input == '/olvidar':
             confirm = input("¿Seguro? (si/no): ")
             if confirm.lower() == 'si':
@@ -296,7 +531,8 @@ if __name__ == "__main__":
         
         # Chat normal
         conversation_history.append({"role": "user", "content": user_input})
-        response = teto.chat(user_input, conversation_history=conversation_history)
+        with tracer.activate(tracer.new_request()):
+            response = teto.chat(user_input, conversation_history=conversation_history)
         conversation_history.append({"role": "assistant", "content": response})
         
         print(f"\nTeto: {response}\n")
\ No newline at end of file
@@ -0,0 +1,190 @@
+import json
+import os
+import re
+import time
+from PyQt5.QtCore import QRect
+from PyQt5.QtGui import QPixmap
+
+ATLAS_IMAGE = 'atlas.png'
+ATLAS_META = 'atlas.json'
+DEFAULT_FRAME_MS = 100
+FRAME_PATTERN = re.compile(r'^Sprite-(\d+)\.png$', re.IGNORECASE)
+
+
+class SpriteAtlas:
+    """Frames de un estado (sprites/<estado>) empaquetados en una sola textura.
+
+    Se carga de forma perezosa: hasta que no se llama a load() solo se conoce la
+    ruta. Si no hay atlas generado (ver build_atlas.py) usa los PNG sueltos.
+    """
+    def __init__(self, state, state_dir):
+        self.state = state
+        self.state_dir = state_dir
+        self.pixmap = None
+        self.frames = []      # Lista de QRect dentro del atlas
+        self.durations = []   # Duración en ms de cada frame
+        self.loop = True
+        self._loose = []      # Fallback: un QPixmap por frame
+        self._copies = {}     # índice -> QPixmap recortado del atlas (se recorta una vez por frame)
+        self.load_ms = 0.0
+
+    @property
+    def loaded(self):
+        return self.pixmap is not None or bool(self._loose)
+
+    def load(self):
+        """Carga la textura y la metadata del estado"""
+        if self.loaded:
+            return
+        start = time.perf_counter()
+        meta_path = os.path.join(self.state_dir, ATLAS_META)
+        image_path = os.path.join(self.state_dir, ATLAS_IMAGE)
+
+        if os.path.exists(meta_path) and os.path.exists(image_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            self.pixmap = QPixmap(image_path)
+            self.frames = [QRect(fr['x'], fr['y'], fr['w'], fr['h']) for fr in meta['frames']]
+            self.durations = [fr.get('duration', DEFAULT_FRAME_MS) for fr in meta['frames']]
+            self.loop = meta.get('loop', True)
+        else:
+            for name in sorted(os.listdir(self.state_dir)):
+                if FRAME_PATTERN.match(name):
+                    pixmap = QPixmap(os.path.join(self.state_dir, name))
+                    self._loose.append(pixmap)
+                    self.frames.append(pixmap.rect())
+                    self.durations.append(DEFAULT_FRAME_MS)
+        self.load_ms = (time.perf_counter() - start) * 1000
+
+    def unload(self):
+        """Libera la textura (se vuelve a cargar al activarse)"""
+        self.pixmap = None
+        self._loose = []
+        self._copies = {}
+        self.frames = []
+        self.durations = []
+
+    def frame_count(self):
+        return len(self.frames)
+
+    def frame(self, index):
+        """QPixmap del frame pedido"""
+        if self._loose:
+            return self._loose[index]
+        pixmap = self._copies.get(index)
+        if pixmap is None:
+            pixmap = self._copies[index] = self.pixmap.copy(self.frames[index])
+        return pixmap
+
+
+class Animation:
+    """Reproduce los frames de un atlas respetando la duración de cada uno"""
+    def __init__(self, atlas):
+        self.atlas = atlas
+        self.index = 0
+        self.elapsed_ms = 0.0
+        self.finished = False
+
+    def advance(self, dt_ms):
+        """Avanza el reloj; devuelve True si cambió el frame"""
+        count = self.atlas.frame_count()
+        if count <= 1 or self.finished:
+            return False
+        self.elapsed_ms += dt_ms
+        changed = False
+        while self.elapsed_ms >= self.atlas.durations[self.index]:
+            self.elapsed_ms -= self.atlas.durations[self.index]
+            if self.index + 1 < count:
+                self.index += 1
+            elif self.atlas.loop:
+                self.index = 0
+            else:
+                self.finished = True
+                self.elapsed_ms = 0.0
+                return changed
+            changed = True
+        return changed
+
+    def next_frame_in(self):
+        """ms hasta el próximo cambio de frame (None si está quieta)"""
+        if self.atlas.frame_count() <= 1 or self.finished:
+            return None
+        return max(0.0, self.atlas.durations[self.index] - self.elapsed_ms)
+
+    def current_frame(self):
+        return self.atlas.frame(self.index)
+
+    def cache_key(self):
+        return (self.atlas.state, self.index)
+
+
+class AnimationLibrary:
+    """Descubre los estados en sprites/ y mantiene en memoria solo los activos"""
+    def __init__(self, root='sprites'):
+        self.root = root
+        self.atlases = {}
+        if os.path.isdir(root):
+            for state in sorted(os.listdir(root)):
+                state_dir = os.path.join(root, state)
+                if os.path.isdir(state_dir):
+                    self.atlases[state] = SpriteAtlas(state, state_dir)
+
+    def states(self):
+        return list(self.atlases.keys())
+
+    def get(self, state):
+        """Devuelve el atlas del estado, cargándolo si hace falta"""
+        atlas = self.atlases.get(state)
+        if atlas is None:
+            return None
+        atlas.load()
+        return atlas
+
+    def release_inactive(self, active_states):
+        """Descarga los estados que ya no se usan"""
+        for state, atlas in self.atlases.items():
+            if state not in active_states and atlas.loaded:
+                atlas.unload()
+
+
+class AnimationEngine:
+    """Maneja todas las animaciones con un único timer compartido.
+
+    Se engancha al FrameScheduler: en vez de pedir frames continuos, agenda el
+    próximo tick para el cambio de frame más cercano entre todas las animaciones.
+    """
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self._entries = {}  # nombre -> (Animation, callback)
+        # Reloj propio: el dt del scheduler no incluye el tiempo que estuvo dormido
+        self._last_tick = time.perf_counter()
+        scheduler.add_callback(self._tick)
+
+    def play(self, name, animation, on_frame):
+        """Registra (o reemplaza) una animación; on_frame(animation) se llama en cada cambio"""
+        if not self._entries:
+            self._last_tick = time.perf_counter()
+        self._entries[name] = (animation, on_frame)
+        on_frame(animation)
+        self._schedule()
+
+    def stop(self, name):
+        self._entries.pop(name, None)
+
+    def active_states(self):
+        return {anim.atlas.state for anim, _ in self._entries.values()}
+
+    def _tick(self, _dt_ms):
+        now = time.perf_counter()
+        dt_ms = (now - self._last_tick) * 1000
+        self._last_tick = now
+        for animation, on_frame in list(self._entries.values()):
+            if animation.advance(dt_ms):
+                on_frame(animation)
+        self._schedule()
+        return False
+
+    def _schedule(self):
+        delays = [d for d in (anim.next_frame_in() for anim, _ in self._entries.values()) if d is not None]
+        if delays:
+            self.scheduler.request_frame_in(min(delays))
@@ -0,0 +1,114 @@
+"""Captura del micrófono para el push-to-talk.
+
+Antes cada grabación abría un stream de PyAudio al apretar la tecla (decenas
+de ms en Windows, y lo que se decía mientras tanto se perdía) y lo leía con
+un hilo nuevo. Acá:
+
+- Con keep_open el stream se abre una vez al arrancar y queda corriendo en
+  modo callback: empezar a grabar es solo marcar un flag, así se puede
+  llamar desde el hilo del atajo global sin pasar por Qt.
+- Mientras no se graba se guardan los últimos preroll_ms de audio, que se
+  suman al principio de la grabación (no se pierde la primera sílaba).
+- Sin keep_open se abre al empezar y se cierra al terminar, como antes.
+"""
+import threading
+import time
+from collections import deque
+
+import pyaudio
+
+
+class AudioCapture:
+    def __init__(self, rate=44100, chunk=1024, keep_open=True, preroll_ms=0):
+        self.rate = rate
+        self.chunk = chunk
+        self.keep_open = keep_open
+        self.sample_width = 2   # paInt16
+        self.started_at = None
+        self._pyaudio = pyaudio.PyAudio()
+        self._stream = None
+        self._lock = threading.Lock()
+        self._recording = False
+        self._frames = []
+        self._preroll = deque(maxlen=max(0, round(preroll_ms / 1000 * rate / chunk)))
+        if keep_open:
+            try:
+                self._open()
+            except Exception as e:
+                # Se vuelve a intentar al grabar (ej. micrófono enchufado después)
+                print(f"⚠ No pude abrir el micrófono: {e}")
+
+    @property
+    def recording(self):
+        return self._recording
+
+    def start(self):
+        """Empieza a grabar; False si ya estaba grabando o no hay micrófono"""
+        with self._lock:
+            if self._recording:
+                return False
+            self._frames = list(self._preroll)
+            self._preroll.clear()
+            self._recording = True
+            self.started_at = time.perf_counter()
+        if self._stream is None:
+            try:
+                self._open()
+            except Exception as e:
+                print(f"Error abriendo mic: {e}")
+                self._recording = False
+                return False
+        return True
+
+    def stop(self):
+        """Termina la grabación y devuelve el audio (PCM 16 bits mono), o None si no se grababa"""
+        with self._lock:
+            if not self._recording:
+                return None
+            self._recording = False
+            frames, self._frames = self._frames, []
+        if not self.keep_open:
+            self._close()
+        return b''.join(frames)
+
+    def close(self):
+        with self._lock:
+            self._recording = False
+        self._close()
+        self._pyaudio.terminate()
+
+    def _open(self):
+        self._stream = self._pyaudio.open(format=pyaudio.paInt16,
+                                          channels=1,
+                                          rate=self.rate,
+                                          input=True,
+                                          frames_per_buffer=self.chunk,
+                                          stream_callback=self._callback)
+
+    def _close(self):
+        stream, self._stream = self._stream, None
+        if stream is not None:
+            stream.stop_stream()
+            stream.close()
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        # Hilo de PortAudio: nada que bloquee
+        with self._lock:
+            if self._recording:
+                self._frames.append(in_data)
+            elif self._preroll.maxlen:
+                self._preroll.append(in_data)
+        return None, pyaudio.paContinue
+
+
+if __name__ == "__main__":
+    # Prueba rápida: 2 segundos con 200 ms de pre-roll
+    capture = AudioCapture(preroll_ms=200)
+    time.sleep(0.5)
+    start = time.perf_counter()
+    capture.start()
+    print(f"Grabando en {(time.perf_counter() - start) * 1000:.3f} ms")
+    time.sleep(2)
+    raw = capture.stop()
+    print(f"{len(raw) / (capture.rate * capture.sample_width):.2f} s de audio")
+    capture.close()
@@ -0,0 +1,296 @@
+"""Ruteo entre backends de IA con circuit breaker, failover y pedidos cubiertos.
+
+Cada backend (Ollama local, Gemini remoto) tiene su CircuitBreaker: después de
+varias fallas seguidas queda "abierto" y los pedidos lo saltean al instante en
+vez de esperar a que vuelva a fallar; pasado un rato deja pasar un pedido de
+prueba ("medio abierto") y si sale bien se cierra de nuevo.
+
+BackendRouter prueba los backends en orden de preferencia y, si uno falla
+antes de mandar el primer fragmento, pasa al siguiente. Con hedge_after, si el
+primero no mandó ningún fragmento en ese tiempo, lanza el mismo pedido al
+segundo y se queda con el que hable primero (el otro se corta).
+
+Con cancel (un threading.Event) el pedido se puede cancelar desde afuera:
+chat vuelve enseguida aunque el backend todavía no haya mandado nada, y el
+backend corta en el próximo fragmento.
+"""
+import queue
+import threading
+import time
+
+from tracing import tracer
+
+
+class BackendUnavailable(Exception):
+    """Ningún backend pudo responder (caídos o con el circuito abierto)"""
+
+
+class HedgeLost(Exception):
+    """Otro backend ganó la carrera: se corta este pedido"""
+
+
+class RequestCancelled(Exception):
+    """El que pidió canceló el pedido"""
+
+
+# Cada cuánto se mira el evento de cancelación mientras se espera al backend
+CANCEL_POLL = 0.05
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = 'cerrado', 'abierto', 'medio abierto'
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self):
+        """¿Se puede mandar un pedido? En medio abierto pasa uno solo de prueba"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probing:
+                return False
+            self._state = self.HALF_OPEN
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        """Devuelve True si esta falla abrió el circuito"""
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                opened = self._state != self.OPEN
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                return opened
+            return False
+
+
+class BackendHealth:
+    """Breaker + contadores de un backend"""
+    def __init__(self, name, breaker):
+        self.name = name
+        self.breaker = breaker
+        self.successes = 0
+        self.failures = 0
+        self.last_error = None
+        self.ttft_ms = None  # promedio móvil del tiempo al primer fragmento
+
+    def observe_ttft(self, ms):
+        self.ttft_ms = ms if self.ttft_ms is None else self.ttft_ms * 0.8 + ms * 0.2
+
+
+class BackendRouter:
+    def __init__(self, names, failure_threshold=3, reset_timeout=30.0, hedge_after=None, on_open=None):
+        self.names = list(names)   # orden de preferencia
+        self.health = {name: BackendHealth(name, CircuitBreaker(failure_threshold, reset_timeout))
+                       for name in self.names}
+        self.hedge_after = hedge_after
+        self.on_open = on_open     # callback(nombre) cuando un backend queda abierto
+        self.failovers = 0
+        self.hedges = 0
+
+    def chat(self, calls, on_token=None, cancel=None):
+        """Manda el pedido al primer backend sano y, si falla, al siguiente.
+
+        calls: {nombre: fn(on_token) -> texto}; solo se usan los nombres que
+        estén en calls (en el orden de preferencia del router).
+        """
+        order = [name for name in self.names if name in calls]
+        if not order:
+            raise BackendUnavailable("No hay backends configurados")
+        race = _Race(on_token, cancel)
+        request_id = tracer.current_request()
+        results = queue.Queue()
+        pending = 0
+        launched = []
+        last_error = None
+
+        def launch():
+            """Lanza el siguiente backend con el circuito cerrado (False si no queda ninguno)"""
+            nonlocal pending
+            while order:
+                name = order.pop(0)
+                if not self.health[name].breaker.allow():
+                    continue
+                if launched:
+                    tracer.record('router.failover' if race.winner is None and not pending else 'router.hedge',
+                                  time.perf_counter(), time.perf_counter(), request_id, backend=name)
+                launched.append(name)
+                pending += 1
+                threading.Thread(target=self._attempt, name=f'Backend-{name}', daemon=True,
+                                 args=(name, calls[name], race, results, request_id)).start()
+                return True
+            return False
+
+        if not launch():
+            raise BackendUnavailable(f"Todos los backends con el circuito abierto ({', '.join(self.names)})")
+        hedge_at = time.monotonic() + self.hedge_after if self.hedge_after else None
+
+        while pending:
+            timeout = None
+            if hedge_at is not None and race.winner is None and len(launched) == 1:
+                timeout = max(0.0, hedge_at - time.monotonic())
+            if cancel is not None:
+                timeout = CANCEL_POLL if timeout is None else min(timeout, CANCEL_POLL)
+            try:
+                name, text, error = results.get(timeout=timeout)
+            except queue.Empty:
+                if cancel is not None and cancel.is_set():
+                    raise RequestCancelled()
+                if (hedge_at is not None and time.monotonic() >= hedge_at
+                        and race.winner is None and len(launched) == 1):
+                    # El primero no habló a tiempo: cubrir con el siguiente
+                    hedge_at = None
+                    if launch():
+                        self.hedges += 1
+                continue
+            pending -= 1
+
+            if error is None:
+                if race.winner in (None, name):
+                    self._success(name)
+                    return text
+                continue
+            if isinstance(error, HedgeLost):
+                continue
+            if race.aborted is not None:
+                # El que pidió cortó (cliente desconectado, etc.): no es culpa del backend
+                raise race.aborted
+            self._failure(name, error)
+            last_error = error
+            if race.winner == name:
+                # Falló a mitad de la respuesta: otro backend la repetiría desde cero
+                raise error
+            if race.winner is None and not pending and launch():
+                self.failovers += 1
+
+        raise BackendUnavailable(f"Fallaron todos los backends ({last_error})")
+
+    def _attempt(self, name, call, race, results, request_id):
+        start = time.perf_counter()
+
+        def forward(piece):
+            if race.claim(name):
+                self.health[name].observe_ttft((time.perf_counter() - start) * 1000)
+            race.forward(name, piece)
+
+        try:
+            with tracer.activate(request_id):
+                results.put((name, call(forward), None))
+        except BaseException as e:
+            results.put((name, None, e))
+
+    def _success(self, name):
+        health = self.health[name]
+        health.successes += 1
+        health.breaker.record_success()
+
+    def _failure(self, name, error):
+        health = self.health[name]
+        health.failures += 1
+        health.last_error = str(error)
+        print(f"⚠ Backend {name} falló: {error}")
+        if health.breaker.record_failure():
+            print(f"✗ Backend {name} fuera de servicio por {health.breaker.reset_timeout:.0f}s")
+            if self.on_open:
+                self.on_open(name)
+
+    def stats(self):
+        return {
+            name: {'state': h.breaker.state, 'successes': h.successes, 'failures': h.failures,
+                   'ttft_ms': h.ttft_ms, 'last_error': h.last_error}
+            for name, h in self.health.items()
+        } | {'failovers': self.failovers, 'hedges': self.hedges}
+
+    def format_stats(self):
+        lines = []
+        for name, h in self.health.items():
+            ttft = f", primer token ~{h.ttft_ms:.0f} ms" if h.ttft_ms is not None else ""
+            lines.append(f"Backend {name}: {h.breaker.state} ({h.successes} ok, {h.failures} fallas{ttft})")
+        lines.append(f"Failovers: {self.failovers}, pedidos cubiertos: {self.hedges}")
+        return "\n".join(lines)
+
+
+class _Race:
+    """Quién manda los fragmentos: el primer backend que habla se queda con el pedido"""
+    def __init__(self, on_token, cancel=None):
+        self.on_token = on_token
+        self.cancel = cancel
+        self.winner = None
+        self.aborted = None
+        self._lock = threading.Lock()
+
+    def claim(self, name):
+        """True si `name` acaba de ganar"""
+        with self._lock:
+            if self.winner is None:
+                self.winner = name
+                return True
+            return False
+
+    def forward(self, name, piece):
+        if self.cancel is not None and self.cancel.is_set():
+            self.aborted = RequestCancelled()
+            raise self.aborted
+        if self.winner != name:
+            raise HedgeLost()
+        if self.on_token:
+            try:
+                self.on_token(piece)
+            except BaseException as e:
+                self.aborted = e
+                raise
+
+
+if __name__ == "__main__":
+    # Prueba rápida con backends de mentira
+    def slow(on_token):
+        time.sleep(0.5)
+        on_token("lento")
+        return "lento"
+
+    def fast(on_token):
+        time.sleep(0.05)
+        on_token("rápido")
+        return "rápido"
+
+    def broken(on_token):
+        raise ConnectionError("conexión rechazada")
+
+    router = BackendRouter(['local', 'remoto'], failure_threshold=2, reset_timeout=0.3)
+    for _ in range(3):
+        start = time.perf_counter()
+        reply = router.chat({'local': broken, 'remoto': fast})
+        print(f"failover: {reply} en {(time.perf_counter() - start) * 1000:.0f} ms "
+              f"(local {router.health['local'].breaker.state})")
+
+    time.sleep(0.35)
+    print("medio abierto, local sano:", router.chat({'local': fast, 'remoto': slow}),
+          router.health['local'].breaker.state)
+
+    router.hedge_after = 0.1
+    start = time.perf_counter()
+    print(f"cubierto: {router.chat({'local': slow, 'remoto': fast})} en "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms")
+    print(router.format_stats())
@@ -0,0 +1,89 @@
+"""Compara los benchmarks entre dos commits para detectar regresiones.
+
+Uso:
+    python benchmarks/compare.py BASE [HEAD] [--threshold 0.10] [-- args para run.py]
+
+HEAD por defecto es el árbol de trabajo actual. Cada commit se mide en un
+`git worktree` temporal, siempre con la versión actual de benchmarks/ (así se
+pueden medir commits viejos que no tenían la suite). Sale con código 1 si
+alguna etapa empeoró más que el umbral en p50 o p95.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+
+def run_at(rev, run_args, tmp):
+    """Corre run.py contra un commit (o el árbol actual si rev es None)"""
+    out = os.path.join(tmp, f'{rev or "worktree"}.json'.replace('/', '_'))
+    if rev is None:
+        path, cleanup = REPO_DIR, None
+    else:
+        path = os.path.join(tmp, 'tree-' + rev.replace('/', '_'))
+        subprocess.run(['git', 'worktree', 'add', '--detach', '--quiet', path, rev],
+                       cwd=REPO_DIR, check=True)
+        cleanup = path
+    try:
+        print(f"\n=== {rev or 'árbol actual'} ===")
+        subprocess.run([sys.executable, os.path.join(BENCH_DIR, 'run.py'),
+                        '--repo', path, '--json', out] + run_args, check=True)
+        with open(out, 'r', encoding='utf-8') as f:
+            return json.load(f)['summary']
+    finally:
+        if cleanup:
+            subprocess.run(['git', 'worktree', 'remove', '--force', cleanup], cwd=REPO_DIR)
+
+
+def compare(base, head, threshold):
+    """Imprime la tabla de cambios y devuelve la lista de regresiones"""
+    regressions = []
+    print(f"\n{'etapa':<32}{'p50 base':>10}{'p50 head':>10}{'Δ p50':>9}{'Δ p95':>9}")
+    print('-' * 70)
+    for name in sorted(set(base) | set(head)):
+        if name not in base or name not in head:
+            side = 'head' if name in head else 'base'
+            print(f"{name:<32}  (solo en {side})")
+            continue
+        b, h = base[name], head[name]
+        d50 = (h['p50'] - b['p50']) / b['p50'] if b['p50'] else 0.0
+        d95 = (h['p95'] - b['p95']) / b['p95'] if b['p95'] else 0.0
+        flag = ''
+        if d50 > threshold or d95 > threshold:
+            regressions.append(name)
+            flag = '  ✗ REGRESIÓN'
+        print(f"{name:<32}{b['p50']:>8.2f}ms{h['p50']:>8.2f}ms{d50:>+9.1%}{d95:>+9.1%}{flag}")
+    return regressions
+
+
+def main():
+    argv = sys.argv[1:]
+    run_args = []
+    if '--' in argv:
+        idx = argv.index('--')
+        argv, run_args = argv[:idx], argv[idx + 1:]
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('base')
+    parser.add_argument('head', nargs='?')
+    parser.add_argument('--threshold', type=float, default=0.10, help='empeoramiento tolerado (0.10 = 10%%)')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = run_at(args.base, run_args, tmp)
+        head = run_at(args.head, run_args, tmp)
+
+    regressions = compare(base, head, args.threshold)
+    if regressions:
+        print(f"\n✗ {len(regressions)} regresiones: {', '.join(regressions)}")
+        sys.exit(1)
+    print("\n✓ Sin regresiones")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,612 @@
+"""Reemplazos locales de los backends para correr benchmarks sin red.
+
+- FakeOllamaServer: servidor HTTP que imita /api/chat y /api/tags de Ollama,
+  con velocidad de tokens y slots paralelos configurables.
+- FakeGeminiServer: lo mismo para la API REST de Gemini, con cachedContents.
+- FakeCommunicate / FakePygame: reemplazan edge_tts y pygame en TetoTTS.
+- FakePyAudio: micrófono de mentira (silencio en tiempo real) para AudioCapture.
+- canned_audio_frames / FakeRecognizer: audio sintético y STT con latencia fija.
+- FakeSpeechServer: el endpoint HTTP de recognize_google, para TetoSTT.
+"""
+import asyncio
+import json
+import math
+import re
+import socket
+import struct
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = ("¡Ay, qué pregunta! Obvio que me acuerdo de vos, "
+                 "¿cómo no me voy a acordar? Contame qué estás haciendo hoy.")
+
+
+class _OllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.server.fake._sockets.add(self.connection)
+        # Conexión nueva: handshake (TCP/TLS/proxy) que el keep-alive se ahorra
+        time.sleep(self.server.fake.handshake_latency)
+
+    def finish(self):
+        super().finish()
+        self.server.fake._sockets.discard(self.connection)
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, payload):
+        data = (json.dumps(payload) + '\n').encode('utf-8')
+        self.wfile.write(f'{len(data):x}\r\n'.encode('ascii') + data + b'\r\n')
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.startswith('/api/tags'):
+            self._send_json({'models': [{'name': m, 'model': m} for m in self.server.fake.models]})
+        elif self.path.startswith('/api/ps'):
+            self._send_json({'models': [{'name': m, 'model': m} for m in self.server.fake.models]})
+        elif self.path.startswith('/api/version'):
+            self._send_json({'version': '0.0.0-fake'})
+        else:
+            self._send_json({'error': 'not found'}, 404)
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        request = json.loads(self.rfile.read(length) or b'{}')
+        fake = self.server.fake
+        fake.requests += 1
+        fake.connections.add(self.client_address)
+
+        if not self.path.startswith('/api/chat'):
+            self._send_json({'error': 'not found'}, 404)
+            return
+
+        # Como OLLAMA_NUM_PARALLEL: los pedidos de más esperan un slot
+        with fake.slots or nullcontext():
+            self._chat(fake, request)
+
+    def _chat(self, fake, request):
+        model = request.get('model', 'fake')
+        messages = request.get('messages', [])
+        options = request.get('options') or {}
+        prompt_tokens = sum(len(m.get('content', '').split()) for m in messages)
+        tokens = fake.reply.split(' ')
+        num_predict = options.get('num_predict')
+        if num_predict and num_predict > 0:
+            tokens = tokens[:num_predict]
+
+        start = time.perf_counter()
+        prompt_eval = prompt_tokens / fake.prompt_rate
+        time.sleep(fake.connect_latency + prompt_eval)
+        eval_start = time.perf_counter()
+
+        def final(content):
+            eval_ns = int((time.perf_counter() - eval_start) * 1e9)
+            return {
+                'model': model,
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'message': {'role': 'assistant', 'content': content},
+                'done': True,
+                'done_reason': 'stop',
+                'total_duration': int((time.perf_counter() - start) * 1e9),
+                'load_duration': 0,
+                'prompt_eval_count': prompt_tokens,
+                'prompt_eval_duration': int(prompt_eval * 1e9),
+                'eval_count': len(tokens),
+                'eval_duration': eval_ns,
+            }
+
+        if not request.get('stream', True):
+            time.sleep(len(tokens) / fake.token_rate)
+            try:
+                self._send_json(final(' '.join(tokens)))
+            except (BrokenPipeError, ConnectionResetError):
+                fake.cancelled += 1
+                self.close_connection = True
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for i, token in enumerate(tokens):
+                time.sleep(1.0 / fake.token_rate)
+                self._write_chunk({
+                    'model': model,
+                    'created_at': datetime.now(timezone.utc).isoformat(),
+                    'message': {'role': 'assistant', 'content': token if i == 0 else ' ' + token},
+                    'done': False,
+                })
+            self._write_chunk(final(''))
+            self.wfile.write(b'0\r\n\r\n')
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # El cliente cortó el stream (cancelación o plazo vencido)
+            fake.cancelled += 1
+            self.close_connection = True
+
+
+class FakeOllamaServer:
+    """Servidor Ollama de mentira en localhost"""
+    def __init__(self, token_rate=40.0, prompt_rate=500.0, connect_latency=0.0,
+                 reply=DEFAULT_REPLY, models=('llama3.1:8b',), port=0, parallel=None,
+                 handshake_latency=0.0):
+        self.token_rate = token_rate
+        self.prompt_rate = prompt_rate
+        self.connect_latency = connect_latency
+        self.handshake_latency = handshake_latency
+        self.reply = reply
+        self.models = list(models)
+        self.requests = 0
+        self.cancelled = 0
+        self.slots = threading.BoundedSemaphore(parallel) if parallel else None
+        self.connections = set()
+        self._sockets = set()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), _OllamaHandler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        # Como si el proceso muriera: también se cortan las conexiones keep-alive
+        for sock in list(self._sockets):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class _GeminiHandler(_OllamaHandler):
+    """Imita la API REST de Gemini (v1beta): generateContent, streamGenerateContent y cachedContents"""
+
+    def _error(self, code, status, message):
+        self._send_json({'error': {'code': code, 'status': status, 'message': message}}, code)
+
+    def do_GET(self):
+        fake = self.server.fake
+        name = self.path.split('?')[0][len('/v1beta/'):]
+        if name in fake.caches:
+            self._send_json(fake.caches[name])
+        else:
+            self._error(404, 'NOT_FOUND', 'not found')
+
+    def do_DELETE(self):
+        self.server.fake.caches.pop(self.path.split('?')[0][len('/v1beta/'):], None)
+        self._send_json({})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        request = json.loads(self.rfile.read(length) or b'{}')
+        fake = self.server.fake
+        path = self.path.split('?')[0]
+        fake.connections.add(self.client_address)
+
+        if path == '/v1beta/cachedContents':
+            self._create_cache(fake, request)
+        elif path.endswith(':streamGenerateContent') or path.endswith(':generateContent'):
+            fake.requests += 1
+            self._generate(fake, request, stream=path.endswith(':streamGenerateContent'))
+        else:
+            self._error(404, 'NOT_FOUND', 'not found')
+
+    def _create_cache(self, fake, request):
+        if fake.cache_rate_limited:
+            fake.cache_rate_limited -= 1
+            self._error(429, 'RESOURCE_EXHAUSTED', 'Resource has been exhausted (e.g. check quota).')
+            return
+        tokens = len(_gemini_text(request.get('systemInstruction')).split())
+        if tokens < fake.min_cache_tokens:
+            self._error(400, 'INVALID_ARGUMENT',
+                        f'Cached content is too small. total_token_count={tokens}, min_total_token_count={fake.min_cache_tokens}')
+            return
+        fake.cache_creates += 1
+        name = f'cachedContents/fake{fake.cache_creates}'
+        ttl = float(request.get('ttl', '3600s').rstrip('s'))
+        fake.caches[name] = {
+            'name': name,
+            'model': request.get('model'),
+            'displayName': request.get('displayName', ''),
+            'expireTime': datetime.fromtimestamp(time.time() + ttl, timezone.utc).isoformat().replace('+00:00', 'Z'),
+            'usageMetadata': {'totalTokenCount': tokens},
+            'systemInstruction': request.get('systemInstruction'),
+        }
+        self._send_json(fake.caches[name])
+
+    def _generate(self, fake, request, stream):
+        cached = request.get('cachedContent')
+        if cached and cached not in fake.caches:
+            self._error(404, 'NOT_FOUND', f'CachedContent not found: {cached}')
+            return
+        if cached:
+            fake.cached_requests += 1
+        system = _gemini_text(request.get('systemInstruction'))
+        fake.system_chars_sent += len(system)
+        contents = request.get('contents', [])
+        fake.turns.append([c.get('role') for c in contents])
+
+        cached_tokens = fake.caches[cached]['usageMetadata']['totalTokenCount'] if cached else 0
+        prompt_tokens = cached_tokens + len(system.split()) + sum(len(_gemini_text(c).split()) for c in contents)
+        tokens = fake.reply.split(' ')
+        max_tokens = (request.get('generationConfig') or {}).get('maxOutputTokens')
+        if max_tokens:
+            tokens = tokens[:max_tokens]
+        # Lo cacheado no se vuelve a procesar
+        time.sleep(fake.connect_latency + (prompt_tokens - cached_tokens) / fake.prompt_rate)
+
+        def response(text, final):
+            payload = {'candidates': [{'content': {'role': 'model', 'parts': [{'text': text}]}, 'index': 0}],
+                       'modelVersion': 'fake'}
+            if final:
+                payload['candidates'][0]['finishReason'] = 'STOP'
+                payload['usageMetadata'] = {'promptTokenCount': prompt_tokens,
+                                            'cachedContentTokenCount': cached_tokens,
+                                            'candidatesTokenCount': len(tokens),
+                                            'totalTokenCount': prompt_tokens + len(tokens)}
+            return payload
+
+        if not stream:
+            time.sleep(len(tokens) / fake.token_rate)
+            self._send_json(response(' '.join(tokens), True))
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for i, token in enumerate(tokens):
+                time.sleep(1.0 / fake.token_rate)
+                event = 'data: ' + json.dumps(response(token if i == 0 else ' ' + token, i == len(tokens) - 1))
+                data = (event + '\r\n\r\n').encode('utf-8')
+                self.wfile.write(f'{len(data):x}\r\n'.encode('ascii') + data + b'\r\n')
+                self.wfile.flush()
+            self.wfile.write(b'0\r\n\r\n')
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            fake.cancelled += 1
+            self.close_connection = True
+
+
+def _gemini_text(content):
+    """Texto de un Content de Gemini ({parts: [{text}]})"""
+    if not content:
+        return ''
+    return ' '.join(part.get('text', '') for part in content.get('parts', []))
+
+
+class FakeGeminiServer(FakeOllamaServer):
+    """Servidor Gemini de mentira en localhost (apuntar con GOOGLE_GEMINI_BASE_URL).
+
+    min_cache_tokens imita el mínimo cacheable de la API real (0 = acepta todo);
+    cache_rate_limited es cuántas de las próximas creaciones de cache rechaza con 429.
+    """
+    def __init__(self, token_rate=60.0, prompt_rate=2000.0, connect_latency=0.15,
+                 reply=DEFAULT_REPLY, min_cache_tokens=0, port=0):
+        super().__init__(token_rate=token_rate, prompt_rate=prompt_rate, connect_latency=connect_latency,
+                         reply=reply, port=port)
+        self._server.RequestHandlerClass = _GeminiHandler
+        self.min_cache_tokens = min_cache_tokens
+        self.cache_rate_limited = 0
+        self.caches = {}
+        self.cache_creates = 0
+        self.cached_requests = 0
+        self.system_chars_sent = 0
+        self.turns = []
+
+
+class _SpeechHandler(_OllamaHandler):
+    """Imita el endpoint speech-api/v2/recognize que usa recognize_google"""
+
+    def do_POST(self):
+        fake = self.server.fake
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        with fake._lock:
+            fake.requests += 1
+            fake.connections.add(self.client_address)
+        if not body.startswith(b'fLaC'):
+            self._send_json({'error': 'se esperaba audio FLAC'}, 400)
+            return
+        seconds = _flac_seconds(body)
+        # Latencia base + proporcional a la duración, como el servicio real
+        time.sleep(fake.base_latency + seconds * fake.realtime_factor)
+        # Se transcribe la duración, así se puede comprobar el orden de los segmentos
+        text = fake.text.format(seconds=seconds)
+        payload = ('{"result":[]}\n' + json.dumps(
+            {'result': [{'alternative': [{'transcript': text, 'confidence': 0.9}], 'final': True}],
+             'result_index': 0}) + '\n').encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def _flac_seconds(data):
+    """Duración de un FLAC según su bloque STREAMINFO"""
+    info = int.from_bytes(data[8:42][10:18], 'big')
+    rate = info >> 44
+    return (info & ((1 << 36) - 1)) / rate if rate else 0.0
+
+
+class FakeSpeechServer(FakeOllamaServer):
+    """Reconocedor de voz de mentira en localhost (apuntar con TETO_STT_ENDPOINT o endpoint=).
+
+    text puede usar {seconds}: la duración del audio recibido.
+    """
+    def __init__(self, text="segmento de {seconds:.1f} s", base_latency=0.25, realtime_factor=0.1,
+                 handshake_latency=0.0, port=0):
+        super().__init__(port=port, handshake_latency=handshake_latency)
+        self._server.RequestHandlerClass = _SpeechHandler
+        self.text = text
+        self.base_latency = base_latency
+        self.realtime_factor = realtime_factor
+        self._lock = threading.Lock()
+
+    @property
+    def endpoint(self):
+        return f'{self.url}/speech-api/v2/recognize'
+
+
+class FakeCommunicate:
+    """Imita edge_tts.Communicate: latencia de conexión + tiempo por carácter"""
+    connect_latency = 0.08
+    seconds_per_char = 0.0005
+
+    def __init__(self, text, voice, **kwargs):
+        self.text = text
+        self.voice = voice
+
+    async def stream(self):
+        import asyncio
+        await asyncio.sleep(self.connect_latency)
+        await asyncio.sleep(len(self.text) * self.seconds_per_char)
+        yield {'type': 'audio', 'data': b'\xff\xf3' + b'\x00' * 256}
+
+    async def save(self, output_file):
+        with open(output_file, 'wb') as f:
+            async for chunk in self.stream():
+                if chunk['type'] == 'audio':
+                    f.write(chunk['data'])
+
+
+class FakeEdgeTTSServer:
+    """Servicio de voz de Edge de mentira: WebSocket con el mismo protocolo que edge-tts.
+
+    Cada conexión paga handshake_latency (TLS + WebSocket) y después atiende
+    pedidos SSML seguidos: turn.start, audio binario, turn.end. Con idle_close
+    corta las conexiones ociosas como el servicio real. Apuntar la sesión con
+    EDGE_TTS_WSS_URL (o edge_tts.communicate.WSS_URL para Communicate).
+    """
+    PATH = '/consumer/speech/synthesize/readaloud/edge/v1'
+
+    def __init__(self, handshake_latency=0.08, seconds_per_char=0.0005, idle_close=None, port=0):
+        self.handshake_latency = handshake_latency
+        self.seconds_per_char = seconds_per_char
+        self.idle_close = idle_close
+        self.port = port
+        self.connections = 0
+        self.requests = 0
+        self._sockets = set()
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f'ws://127.0.0.1:{self.port}{self.PATH}?TrustedClientToken=fake'
+
+    def start(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result(10)
+        return self
+
+    async def _start(self):
+        from aiohttp import web
+        app = web.Application()
+        app.router.add_get(self.PATH, self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def drop_connections(self):
+        """Corta todas las conexiones abiertas (como cuando el servicio las cierra)"""
+
+        async def drop():
+            for ws in list(self._sockets):
+                await ws.close()
+        asyncio.run_coroutine_threadsafe(drop(), self._loop).result(5)
+
+    def stop(self):
+        self.drop_connections()
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    async def _handle(self, request):
+        from aiohttp import WSMsgType, web
+
+        await asyncio.sleep(self.handshake_latency)
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        self._sockets.add(ws)
+        try:
+            while True:
+                try:
+                    message = await ws.receive(timeout=self.idle_close)
+                except asyncio.TimeoutError:
+                    break
+                if message.type != WSMsgType.TEXT:
+                    break
+                head, _, body = message.data.partition('\r\n\r\n')
+                headers = dict(line.split(':', 1) for line in head.split('\r\n') if ':' in line)
+                if headers.get('Path') != 'ssml':
+                    continue
+                self.requests += 1
+                request_id = headers.get('X-RequestId', '')
+                text = re.sub(r'<[^>]+>', '', body)
+                await asyncio.sleep(len(text) * self.seconds_per_char)
+                await ws.send_str(f"X-RequestId:{request_id}\r\nContent-Type:application/json; charset=utf-8\r\n"
+                                  f"Path:turn.start\r\n\r\n{{}}")
+                header = (f"X-RequestId:{request_id}\r\nContent-Type:audio/mpeg\r\n"
+                          f"X-StreamId:fake\r\nPath:audio\r\n").encode('utf-8')
+                for _ in range(max(1, len(text) // 20)):
+                    await ws.send_bytes(len(header).to_bytes(2, 'big') + header + b'\xff\xf3' + b'\x00' * 254)
+                await ws.send_str(f"X-RequestId:{request_id}\r\nContent-Type:application/json; charset=utf-8\r\n"
+                                  f"Path:turn.end\r\n\r\n{{}}")
+        finally:
+            self._sockets.discard(ws)
+            await ws.close()
+        return ws
+
+
+class _FakeMusic:
+    def __init__(self):
+        self.play_started = threading.Event()
+        self.play_time = None
+
+    def load(self, path, namehint=None):
+        pass
+
+    def play(self):
+        self.play_time = time.perf_counter()
+        self.play_started.set()
+
+    def get_busy(self):
+        return False
+
+    def unload(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class FakePygame:
+    """Imita la parte de pygame que usa TetoTTS; registra cuándo arranca la reproducción"""
+    def __init__(self):
+        self.mixer = type('mixer', (), {})()
+        self.mixer.init = lambda *a, **k: None
+        self.mixer.music = _FakeMusic()
+        self.time = type('time', (), {})()
+        self.time.Clock = lambda: type('Clock', (), {'tick': lambda self, fps: None})()
+
+
+class _FakeInputStream:
+    def __init__(self, rate, frames_per_buffer, stream_callback):
+        self.rate = rate
+        self.frames_per_buffer = frames_per_buffer
+        self.callback = stream_callback
+        self._active = threading.Event()
+        self._active.set()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        # Silencio en tiempo real, un buffer por vez, como PortAudio
+        period = self.frames_per_buffer / self.rate
+        data = b'\0' * (self.frames_per_buffer * 2)
+        while self._active.wait(period):
+            self.callback(data, self.frames_per_buffer, {}, 0)
+            time.sleep(period)
+
+    def stop_stream(self):
+        self._active.clear()
+
+    def close(self):
+        self._active.clear()
+
+
+class FakePyAudio:
+    """Reemplaza el módulo pyaudio: abrir un stream tarda open_latency (como en Windows)"""
+    paInt16 = 8
+    paContinue = 0
+
+    def __init__(self, open_latency=0.04):
+        self.open_latency = open_latency
+        fake = self
+
+        class PyAudio:
+            def open(self, rate=44100, frames_per_buffer=1024, stream_callback=None, **kwargs):
+                time.sleep(fake.open_latency)
+                return _FakeInputStream(rate, frames_per_buffer, stream_callback)
+
+            def terminate(self):
+                pass
+
+        self.PyAudio = PyAudio
+
+
+def canned_audio_frames(seconds=3.0, rate=44100, chunk=1024, pause_every=0.0):
+    """PCM 16 bits mono sintético (tono de 220 Hz), cortado en buffers como PyAudio.
+
+    Con pause_every > 0 intercala 0.5 s de silencio cada tantos segundos.
+    """
+    samples = []
+    total = int(seconds * rate)
+    for n in range(total):
+        t = n / rate
+        silent = pause_every and (t % (pause_every + 0.5)) >= pause_every
+        samples.append(0 if silent else int(8000 * math.sin(2 * math.pi * 220 * t)))
+    raw = struct.pack(f'<{len(samples)}h', *samples)
+    step = chunk * 2
+    return [raw[i:i + step] for i in range(0, len(raw), step)]
+
+
+class FakeRecognizer:
+    """STT de mentira: latencia base + proporcional a la duración del audio"""
+    def __init__(self, text="hola teto como estas", base_latency=0.25, realtime_factor=0.1):
+        self.text = text
+        self.base_latency = base_latency
+        self.realtime_factor = realtime_factor
+
+    def recognize_google(self, audio_data, language=None, **kwargs):
+        seconds = len(audio_data.frame_data) / (audio_data.sample_rate * audio_data.sample_width)
+        time.sleep(self.base_latency + seconds * self.realtime_factor)
+        return self.text
@@ -0,0 +1,272 @@
+"""Generador de carga: reproduce conversaciones contra TetoAI.chat.
+
+Simula N usuarios concurrentes, cada uno con su historial y su propia memoria
+(como las sesiones de server.py), que mandan los turnos de una conversación
+con un tiempo de "pensar" entre mensaje y mensaje. Con --ramp corre varios
+escalones de usuarios seguidos para encontrar dónde colapsa la latencia.
+
+Conversaciones: JSONL, una por línea, {"turns": ["hola", "me llamo Ana", ...]}.
+Sin --conversations se generan conversaciones sintéticas en castellano.
+
+Uso:
+    python benchmarks/loadgen.py [--users 4] [--duration 30] [--think-time 1.0]
+                                 [--ramp 1,2,4,8,16] [--conversations conv.jsonl]
+                                 [--target fake|ollama] [--parallel 1] [--json salida.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from fakes import FakeOllamaServer
+from run import percentile
+
+NAMES = ['Juan', 'Ana', 'Sofía', 'Martín', 'Lucía', 'Diego', 'Valentina', 'Pedro']
+PLACES = ['córdoba', 'rosario', 'mendoza', 'buenos aires', 'salta', 'la plata']
+LIKES = ['el pan francés', 'el mate', 'los videojuegos', 'la música', 'el fútbol', 'dibujar']
+JOBS = ['programador', 'estudiante', 'diseñador', 'docente', 'músico']
+SMALL_TALK = [
+    "¿qué hacés?", "hoy estuve re cansado", "¿te acordás de mí?", "contame algo",
+    "¿qué opinás del clima?", "estoy aburrido", "¿qué comiste hoy?", "jaja sos muy graciosa",
+]
+
+
+def synthetic_conversations(count, turns, seed=0):
+    """Conversaciones inventadas, con datos personales para que crezca la memoria"""
+    rng = random.Random(seed)
+    conversations = []
+    for _ in range(count):
+        facts = [
+            f"me llamo {rng.choice(NAMES)}",
+            f"vivo en {rng.choice(PLACES)}",
+            f"me gusta {rng.choice(LIKES)}",
+            f"soy {rng.choice(JOBS)}",
+        ]
+        rng.shuffle(facts)
+        conversation = []
+        for i in range(turns):
+            if i % 3 == 0 and facts:
+                conversation.append(facts.pop())
+            else:
+                conversation.append(rng.choice(SMALL_TALK))
+        conversations.append(conversation)
+    return conversations
+
+
+def load_conversations(path):
+    conversations = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            data = json.loads(line)
+            turns = data['turns'] if isinstance(data, dict) else data
+            conversations.append([t['content'] if isinstance(t, dict) else t for t in turns])
+    return conversations
+
+
+class SimulatedUser(threading.Thread):
+    """Un usuario: manda los turnos de su conversación hasta que termina el escalón"""
+    def __init__(self, teto, memory, conversation, think_time, stop_at, results, rng):
+        super().__init__(daemon=True)
+        self.teto = teto
+        self.memory = memory
+        self.conversation = conversation
+        self.think_time = think_time
+        self.stop_at = stop_at
+        self.results = results
+        self.rng = rng
+
+    def run(self):
+        from ai_service import BUSY_REPLY, ERROR_REPLY
+
+        history = []
+        turn = 0
+        # Arranques escalonados para no mandar todos el primer mensaje a la vez
+        time.sleep(self.rng.uniform(0, self.think_time))
+        while time.perf_counter() < self.stop_at:
+            message = self.conversation[turn % len(self.conversation)]
+            turn += 1
+            tokens = []
+            first = []
+            start = time.perf_counter()
+
+            def on_token(piece):
+                if not first:
+                    first.append(time.perf_counter())
+                tokens.append(piece)
+
+            reply = self.teto.chat(message, conversation_history=list(history),
+                                   on_token=on_token, memory=self.memory, caller=self.name)
+            end = time.perf_counter()
+            self.results.append({
+                'latency_ms': (end - start) * 1000,
+                'ttft_ms': (first[0] - start) * 1000 if first else None,
+                'tokens': len(tokens),
+                'error': reply in (BUSY_REPLY, ERROR_REPLY),
+                'end': end,
+            })
+            history += [{'role': 'user', 'content': message}, {'role': 'assistant', 'content': reply}]
+            # Tiempo de pensar con jitter (exponencial, como llegadas de Poisson)
+            if self.think_time > 0:
+                time.sleep(min(self.rng.expovariate(1.0 / self.think_time), self.think_time * 5))
+
+
+def memory_footprint(paths):
+    """(bytes en disco, keywords guardadas) de los archivos de memoria"""
+    size, keywords = 0, 0
+    for path in paths:
+        if os.path.exists(path):
+            size += os.path.getsize(path)
+            with open(path, 'r', encoding='utf-8') as f:
+                keywords += len(json.load(f).get('keywords', {}))
+    return size, keywords
+
+
+def run_step(teto, users, args, conversations, tmp, rng):
+    """Corre un escalón con `users` usuarios durante args.duration segundos"""
+    from ai_service import TetoMemory
+
+    memory_files = [os.path.join(tmp, f'user-{i}.json') for i in range(users)]
+    size_before, keywords_before = memory_footprint(memory_files)
+    results = []
+    start = time.perf_counter()
+    stop_at = start + args.duration
+    threads = [
+        SimulatedUser(teto, TetoMemory(memory_files[i]), conversations[i % len(conversations)],
+                      args.think_time, stop_at, results, random.Random(rng.random()))
+        for i in range(users)
+    ]
+    for i, thread in enumerate(threads):
+        thread.name = f'user-{i}'
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    size_after, keywords_after = memory_footprint(memory_files)
+
+    latencies = [r['latency_ms'] for r in results if not r['error']]
+    ttfts = [r['ttft_ms'] for r in results if r['ttft_ms'] is not None]
+    errors = sum(1 for r in results if r['error'])
+    return {
+        'users': users,
+        'requests': len(results),
+        'requests_per_s': len(results) / elapsed,
+        'tokens_per_s': sum(r['tokens'] for r in results) / elapsed,
+        'latency_p50': percentile(latencies, 50),
+        'latency_p95': percentile(latencies, 95),
+        'latency_p99': percentile(latencies, 99),
+        'ttft_p50': percentile(ttfts, 50),
+        'ttft_p95': percentile(ttfts, 95),
+        'error_rate': errors / len(results) if results else 0.0,
+        'memory_bytes': size_after,
+        'memory_growth_bytes': size_after - size_before,
+        'memory_keywords': keywords_after,
+        'memory_keywords_added': keywords_after - keywords_before,
+        'admission': teto.admission.stats(),
+    }
+
+
+def print_steps(steps, collapse_at):
+    print(f"\n{'usuarios':>8}{'req/s':>8}{'tok/s':>8}{'p50':>9}{'p95':>9}{'p99':>9}"
+          f"{'ttft p95':>10}{'errores':>9}{'memoria':>10}")
+    print('-' * 80)
+    for s in steps:
+        flag = '  ✗ colapso' if s['users'] == collapse_at else ''
+        print(f"{s['users']:>8}{s['requests_per_s']:>8.2f}{s['tokens_per_s']:>8.1f}"
+              f"{s['latency_p50']:>7.0f}ms{s['latency_p95']:>7.0f}ms{s['latency_p99']:>7.0f}ms"
+              f"{s['ttft_p95']:>8.0f}ms{s['error_rate']:>9.1%}"
+              f"{s['memory_bytes'] / 1024:>7.1f}KiB{flag}")
+
+
+def find_collapse(steps, factor, max_error_rate):
+    """Primer escalón donde el p95 se dispara (factor x el del primero) o suben los errores"""
+    if not steps:
+        return None
+    baseline = steps[0]['latency_p95'] or 1.0
+    for s in steps[1:]:
+        if s['latency_p95'] > baseline * factor or s['error_rate'] > max_error_rate:
+            return s['users']
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=4)
+    parser.add_argument('--ramp', help='escalones de usuarios, ej. 1,2,4,8,16 (reemplaza --users)')
+    parser.add_argument('--duration', type=float, default=30.0, help='segundos por escalón')
+    parser.add_argument('--think-time', type=float, default=1.0, help='media del tiempo entre mensajes (s)')
+    parser.add_argument('--conversations', help='JSONL con conversaciones grabadas')
+    parser.add_argument('--synthetic', type=int, default=20, help='conversaciones sintéticas a generar')
+    parser.add_argument('--turns', type=int, default=12, help='turnos por conversación sintética')
+    parser.add_argument('--profile', default='balanced', help='perfil de IA (ver config.AI_PROFILES)')
+    parser.add_argument('--target', choices=('fake', 'ollama'), default='fake',
+                        help='Ollama falso determinístico o el Ollama local real')
+    parser.add_argument('--token-rate', type=float, default=40.0, help='tokens/s del Ollama falso')
+    parser.add_argument('--parallel', type=int, default=1, help='slots paralelos del Ollama falso')
+    parser.add_argument('--max-concurrent', type=int, help='cupo de TetoAI (por defecto config.AI_MAX_CONCURRENT)')
+    parser.add_argument('--collapse-factor', type=float, default=3.0,
+                        help='p95 que cuenta como colapso, en múltiplos del primer escalón')
+    parser.add_argument('--max-error-rate', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repo', default=os.path.dirname(BENCH_DIR), help='árbol a medir')
+    parser.add_argument('--json', help='guardar los resultados en este archivo')
+    args = parser.parse_args(argv)
+
+    args.repo = os.path.abspath(args.repo)
+    sys.path.insert(0, args.repo)
+    os.chdir(args.repo)
+
+    # Perfil fijo: "auto" calibraría contra el Ollama falso
+    os.environ.setdefault('TETO_AI_PROFILE', args.profile)
+    levels = [int(n) for n in args.ramp.split(',')] if args.ramp else [args.users]
+    if args.conversations:
+        conversations = load_conversations(args.conversations)
+    else:
+        conversations = synthetic_conversations(args.synthetic, args.turns, args.seed)
+    rng = random.Random(args.seed)
+
+    server = None
+    if args.target == 'fake':
+        server = FakeOllamaServer(token_rate=args.token_rate, parallel=args.parallel).start()
+        # ollama lee OLLAMA_HOST al importarse
+        os.environ['OLLAMA_HOST'] = server.url
+
+    try:
+        from ai_service import TetoAI
+        steps = []
+        with tempfile.TemporaryDirectory() as tmp:
+            teto = TetoAI(use_gemini=False, memory_file=os.path.join(tmp, 'memory.json'))
+            if args.max_concurrent:
+                teto.admission.max_concurrent = args.max_concurrent
+            for users in levels:
+                print(f"⏳ {users} usuarios durante {args.duration:.0f}s...")
+                steps.append(run_step(teto, users, args, conversations, tmp, rng))
+    finally:
+        if server is not None:
+            server.stop()
+
+    collapse_at = find_collapse(steps, args.collapse_factor, args.max_error_rate)
+    print_steps(steps, collapse_at)
+    if len(steps) > 1:
+        if collapse_at:
+            print(f"\n✗ La latencia colapsa a partir de {collapse_at} usuarios")
+        else:
+            print(f"\n✓ Sin colapso hasta {levels[-1]} usuarios")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'steps': steps, 'collapse_at': collapse_at}, f, indent=2)
+    return steps
+
+
+if __name__ == "__main__":
+    main()
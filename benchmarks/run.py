@@ -0,0 +1,485 @@
+"""Suite de benchmarks de latencia, offline.
+
+Mide el pipeline que percibe el usuario (soltar PTT -> STT -> TetoAI.chat ->
+globito -> arranque de la voz) contra reemplazos locales de Ollama, edge-tts y
+el reconocedor, más microbenchmarks de las partes calientes.
+
+Uso:
+    python benchmarks/run.py [--iterations 20] [--token-rate 40] [--json salida.json]
+                             [--repo RUTA] [--only pipeline|micro|backends|client|tts|stt|ptt]
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import sys
+import tempfile
+import time
+import types
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from fakes import (FakeOllamaServer, FakeGeminiServer, FakeEdgeTTSServer, FakeCommunicate, FakePygame,
+                   FakePyAudio, FakeRecognizer, FakeSpeechServer, canned_audio_frames)
+
+
+def percentile(values, p):
+    """Percentil con interpolación lineal (p entre 0 y 100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100.0
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+def summarize(samples):
+    """{nombre: [ms]} -> {nombre: {p50, p95, p99, mean, n}}"""
+    summary = {}
+    for name, values in samples.items():
+        if not values:
+            continue
+        summary[name] = {
+            'p50': percentile(values, 50),
+            'p95': percentile(values, 95),
+            'p99': percentile(values, 99),
+            'mean': sum(values) / len(values),
+            'n': len(values),
+        }
+    return summary
+
+
+def print_table(summary, skipped=()):
+    print(f"\n{'etapa':<32}{'p50':>10}{'p95':>10}{'p99':>10}{'n':>6}")
+    print('-' * 68)
+    for name, s in summary.items():
+        print(f"{name:<32}{s['p50']:>9.2f}ms{s['p95']:>8.2f}ms{s['p99']:>8.2f}ms{s['n']:>6}")
+    for name, reason in skipped:
+        print(f"{name:<32}  (omitido: {reason})")
+
+
+def install_fakes(edge_url=None):
+    """Reemplaza edge_tts, pygame y pyaudio por las versiones locales antes de importar TetoTTS
+
+    Con edge_url (un FakeEdgeTTSServer) se usa el edge_tts real apuntado a ese
+    servidor; sin él, o sin edge_tts instalado, un Communicate de mentira.
+    """
+    fake_pygame = FakePygame()
+    sys.modules['pygame'] = fake_pygame
+    sys.modules['pyaudio'] = FakePyAudio()
+
+    if edge_url:
+        try:
+            import edge_tts.communicate
+        except ImportError:
+            pass
+        else:
+            edge_tts.communicate.WSS_URL = edge_url
+            os.environ['EDGE_TTS_WSS_URL'] = edge_url
+            return fake_pygame
+
+    fake_edge = types.ModuleType('edge_tts')
+    fake_edge.Communicate = FakeCommunicate
+
+    async def list_voices():
+        return []
+    fake_edge.list_voices = list_voices
+    sys.modules['edge_tts'] = fake_edge
+    return fake_pygame
+
+
+_qt_app = None
+
+
+def get_qt_app():
+    """QApplication offscreen (o None si no hay PyQt5)"""
+    global _qt_app
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        from PyQt5.QtWidgets import QApplication
+    except ImportError:
+        return None
+    # Se guarda la referencia: si el QApplication se libera, Qt aborta en el próximo QPixmap
+    _qt_app = QApplication.instance() or QApplication([])
+    return _qt_app
+
+
+def timed(samples, name, fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    samples.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+    return result
+
+
+def bench_pipeline(args, samples, skipped, teto, tts, fake_pygame):
+    """PTT soltado -> reconocimiento -> IA -> globito -> arranque de la voz"""
+    try:
+        import speech_recognition as sr
+    except ImportError:
+        sr = None
+        skipped.append(('stt', 'speech_recognition no instalado'))
+
+    bubble = None
+    if get_qt_app() is not None:
+        try:
+            from main import SpeechBubble
+            bubble = SpeechBubble()
+        except Exception as e:
+            skipped.append(('ui.bubble', f'main.py no importable ({e.__class__.__name__})'))
+    else:
+        skipped.append(('ui.bubble', 'PyQt5 no instalado'))
+
+    recognizer = FakeRecognizer(base_latency=args.stt_latency)
+    frames = canned_audio_frames(seconds=args.audio_seconds)
+    history = []
+
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+
+        if sr is not None:
+            raw = timed(samples, 'capture.join', b''.join, frames)
+            audio = sr.AudioData(raw, 44100, 2)
+            text = timed(samples, 'stt', recognizer.recognize_google, audio, language='es-AR')
+        else:
+            text = recognizer.text
+
+        reply = timed(samples, 'ai.chat', teto.chat, text, conversation_history=list(history))
+        history += [{'role': 'user', 'content': text}, {'role': 'assistant', 'content': reply}]
+
+        if bubble is not None:
+            timed(samples, 'ui.bubble', bubble.show_message, reply)
+
+        music = fake_pygame.mixer.music
+        music.play_started.clear()
+        tts_start = time.perf_counter()
+        tts.speak(reply, blocking=False)
+        music.play_started.wait(30)
+        samples.setdefault('tts.playback_start', []).append((music.play_time - tts_start) * 1000)
+
+        samples.setdefault('end_to_end', []).append((music.play_time - start) * 1000)
+
+
+def bench_backends(args, samples, skipped, teto, tmp):
+    """Tiempo al primer token y respuesta completa, Ollama contra Gemini (streaming)"""
+    if 'on_token' not in inspect.signature(teto.chat).parameters:
+        skipped.append(('ttft', 'TetoAI.chat sin streaming (on_token)'))
+        return
+
+    def measure(backend, ai):
+        history = []
+        for i in range(args.iterations):
+            message = f"contame algo ({i})"
+            first = []
+            start = time.perf_counter()
+            reply = ai.chat(message, conversation_history=list(history),
+                            on_token=lambda piece: first or first.append(time.perf_counter()))
+            end = time.perf_counter()
+            if first:
+                samples.setdefault(f'ttft ({backend})', []).append((first[0] - start) * 1000)
+            samples.setdefault(f'chat ({backend})', []).append((end - start) * 1000)
+            history += [{'role': 'user', 'content': message}, {'role': 'assistant', 'content': reply}]
+
+    measure('ollama', teto)
+
+    try:
+        from gemini_backend import GENAI_AVAILABLE
+    except ImportError:
+        skipped.append(('ttft (gemini)', 'gemini_backend no existe'))
+        return
+    if not GENAI_AVAILABLE:
+        skipped.append(('ttft (gemini)', 'google-genai no instalado'))
+        return
+    from ai_service import TetoAI
+    with FakeGeminiServer(token_rate=args.token_rate) as server:
+        os.environ['GOOGLE_GEMINI_BASE_URL'] = server.url
+        gemini = TetoAI(use_gemini=True, gemini_key='fake', memory_file=os.path.join(tmp, 'memory-gemini.json'))
+        measure('gemini', gemini)
+
+
+def bench_client(args, samples, skipped):
+    """Cliente de Ollama: conexión nueva por pedido contra el pool keep-alive (sync y async)
+
+    El Ollama falso tarda --handshake-latency en atender cada conexión nueva,
+    como un Ollama remoto o detrás de un proxy.
+    """
+    try:
+        import ollama_client
+    except ImportError:
+        skipped.append(('ollama client', 'ollama_client no existe'))
+        return
+    import ollama
+
+    messages = [{'role': 'user', 'content': 'hola'}]
+    options = {'num_predict': 8}
+    with FakeOllamaServer(token_rate=2000, prompt_rate=100000, reply="Hola, ¿qué hacés?",
+                          handshake_latency=args.handshake_latency) as server:
+        for i in range(args.iterations):
+            start = time.perf_counter()
+            client = ollama.Client(host=server.url)
+            client.chat(model='llama3.1:8b', messages=messages, options=options)
+            client._client.close()
+            samples.setdefault('ollama chat (conexión nueva)', []).append((time.perf_counter() - start) * 1000)
+        fresh_connections = len(server.connections)
+
+        server.connections.clear()
+        client = ollama_client.get_client(server.url)
+        for i in range(args.iterations):
+            timed(samples, 'ollama chat (pool)', client.chat, model='llama3.1:8b', messages=messages,
+                  options=options)
+        pooled_connections = len(server.connections)
+
+        async def run_async():
+            client = ollama_client.get_async_client(server.url)
+            for i in range(args.iterations):
+                start = time.perf_counter()
+                await client.chat(model='llama3.1:8b', messages=messages, options=options)
+                samples.setdefault('ollama chat (pool async)', []).append((time.perf_counter() - start) * 1000)
+
+            # Cancelar antes del primer byte: el pedido se corta en el acto
+            server.prompt_rate = 20
+            for i in range(min(args.iterations, 5)):
+                task = asyncio.ensure_future(client.chat(model='llama3.1:8b', messages=messages, options=options))
+                await asyncio.sleep(0.05)
+                start = time.perf_counter()
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                samples.setdefault('ollama cancel (async)', []).append((time.perf_counter() - start) * 1000)
+
+        asyncio.run(run_async())
+    print(f"🔌 Conexiones TCP en {args.iterations} pedidos: {fresh_connections} sin pool, "
+          f"{pooled_connections} con pool")
+
+
+def bench_tts(args, samples, skipped, tts):
+    """Síntesis frase por frase: conexión nueva por frase contra la sesión persistente"""
+    if getattr(tts, 'session', None) is None:
+        skipped.append(('tts.sentence', 'sin sesión persistente (edge_tts real no disponible)'))
+        return
+    from tts_service import TetoTTS
+
+    sentences = ["¡Hola!", "¿Cómo estás hoy?", "Yo re bien, comiendo pan francés.",
+                 "Contame qué estás haciendo."]
+    plain = TetoTTS(playback=False, persistent=False)
+    for i in range(args.iterations):
+        text = sentences[i % len(sentences)]
+        timed(samples, 'tts.sentence (conexión nueva)', asyncio.run, plain.synthesize(text))
+        timed(samples, 'tts.sentence (sesión)', asyncio.run, tts.synthesize(text))
+
+    # Primera frase de una respuesta sin conexión abierta: en frío y con prewarm
+    for i in range(min(args.iterations, 5)):
+        tts.session.close_idle()
+        timed(samples, 'tts.first_sentence (en frío)', asyncio.run, tts.synthesize(sentences[0]))
+        tts.session.close_idle()
+        tts.prewarm()
+        time.sleep(args.tts_handshake + 0.05)   # mientras la IA piensa
+        timed(samples, 'tts.first_sentence (prewarm)', asyncio.run, tts.synthesize(sentences[0]))
+    print(f"🔌 Sesión de TTS: {tts.session.stats()}")
+
+
+def bench_stt(args, samples, skipped):
+    """Grabación larga: un solo recognize_google contra TetoSTT (por pausas, en paralelo, conexión reusada)"""
+    try:
+        import speech_recognition as sr
+        from stt_service import TetoSTT
+    except ImportError as e:
+        skipped.append(('stt.long', f'{e.name} no instalado'))
+        return
+
+    audio = sr.AudioData(b''.join(canned_audio_frames(seconds=args.long_audio_seconds, pause_every=2.5)), 44100, 2)
+    with FakeSpeechServer(base_latency=args.stt_latency, handshake_latency=args.handshake_latency) as server:
+        recognizer = sr.Recognizer()
+        stt = TetoSTT(endpoint=server.endpoint)
+        segments = len(stt.split(audio))
+        for i in range(max(1, args.iterations // 4)):
+            timed(samples, 'stt.long (un pedido)', recognizer.recognize_google, audio, language='es-AR',
+                  endpoint=server.endpoint)
+            timed(samples, 'stt.long (segmentos)', stt.recognize, audio)
+        stt.close()
+    print(f"🎤 {args.long_audio_seconds:.0f} s de audio en {segments} segmentos")
+
+
+def bench_ptt(args, samples, skipped):
+    """Atajo global: tecla apretada -> grabando, abriendo el stream al apretar o con el stream abierto
+
+    Las teclas se inyectan en HotkeyService (el listener de pynput necesita
+    un servidor gráfico); la latencia es la que mide el propio servicio.
+    """
+    try:
+        from audio_capture import AudioCapture
+        from hotkey_service import HotkeyService
+    except ImportError as e:
+        skipped.append(('ptt.start', f'{e.name} no instalado'))
+        return
+
+    for label, keep_open in (('abre stream', False), ('stream abierto', True)):
+        capture = AudioCapture(keep_open=keep_open, preroll_ms=200)
+        hotkeys = HotkeyService(debounce_ms=40, target_ms=float('inf'))
+        hotkeys.bind('<ctrl>+<alt>+o', capture.start, capture.stop)
+        time.sleep(0.1)
+        for i in range(args.iterations):
+            hotkeys.press('ctrl')
+            hotkeys.press('alt')
+            hotkeys.press('o')
+            time.sleep(0.05)
+            # Rebote: soltar/apretar dentro del antirrebote no corta la grabación
+            hotkeys.release('o')
+            hotkeys.press('o')
+            time.sleep(0.02)
+            for key in ('o', 'alt', 'ctrl'):
+                hotkeys.release(key)
+            time.sleep(0.06)
+        samples[f'ptt.start ({label})'] = list(hotkeys.latencies)
+        print(f"⌨ {label}: {hotkeys.format_stats()}")
+        capture.close()
+
+
+def bench_micro(args, samples, skipped, teto):
+    """Microbenchmarks de las partes calientes"""
+    n = args.micro_iterations
+    messages = [
+        "me llamo Juan y soy programador",
+        "vivo en córdoba, argentina",
+        "me gusta el pan francés",
+        "hoy llueve bastante",
+    ]
+    history = [{'role': 'user' if i % 2 == 0 else 'assistant', 'content': f'mensaje {i} ' * 8}
+               for i in range(30)]
+
+    for i in range(n):
+        timed(samples, 'extract_keywords', teto.extract_keywords, messages[i % len(messages)])
+
+    if hasattr(teto, 'build_messages'):
+        def assemble():
+            prompt = teto.system_prompt + teto.get_memory_context()
+            return teto.build_messages(prompt, "¿qué hacés?", history)
+        for _ in range(n):
+            timed(samples, 'prompt_assembly', assemble)
+    else:
+        skipped.append(('prompt_assembly', 'TetoAI.build_messages no existe'))
+
+    bench_apply_scale(args, samples, skipped)
+
+    try:
+        from process_watcher import ProcessScanner
+        scanner = ProcessScanner()
+        scanner.poll()
+        for _ in range(n):
+            timed(samples, 'check_processes', scanner.poll)
+    except ImportError:
+        skipped.append(('check_processes', 'process_watcher no existe'))
+
+
+def bench_apply_scale(args, samples, skipped):
+    """Costo del re-escalado del sprite durante un agitado (1x -> 3x -> 1x)"""
+    if get_qt_app() is None:
+        skipped.append(('apply_scale', 'PyQt5 no instalado'))
+        return
+    from PyQt5.QtCore import Qt
+    from PyQt5.QtGui import QPixmap
+
+    pixmap = QPixmap(os.path.join(args.repo, 'sprites', 'idle', 'Sprite-0001.png'))
+    if pixmap.isNull():
+        skipped.append(('apply_scale', 'sprite no encontrado'))
+        return
+
+    # Curva de escalas como la de update_physics (ease hacia 3x y de vuelta)
+    scales, scale = [], 1.0
+    for target in (3.0, 1.0):
+        while abs(target - scale) > 0.005:
+            scale += (target - scale) * 0.1
+            scales.append(scale)
+
+    for s in scales:
+        timed(samples, 'apply_scale (sin cache)', pixmap.scaled,
+              int(pixmap.width() * s), int(pixmap.height() * s),
+              Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+    try:
+        from sprite_cache import ScaledPixmapCache
+    except ImportError:
+        skipped.append(('apply_scale (cache)', 'sprite_cache no existe'))
+        return
+    cache = ScaledPixmapCache()
+    for _ in range(3):
+        for s in scales:
+            timed(samples, 'apply_scale (cache)', cache.get, pixmap, s, 'idle')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--micro-iterations', type=int, default=500)
+    parser.add_argument('--token-rate', type=float, default=40.0, help='tokens/s del Ollama falso')
+    parser.add_argument('--prompt-rate', type=float, default=500.0, help='tokens/s de prompt eval')
+    parser.add_argument('--stt-latency', type=float, default=0.25, help='latencia base del STT falso (s)')
+    parser.add_argument('--audio-seconds', type=float, default=3.0)
+    parser.add_argument('--long-audio-seconds', type=float, default=12.0, help='grabación larga para --only stt')
+    parser.add_argument('--repo', default=os.path.dirname(BENCH_DIR), help='árbol a medir')
+    parser.add_argument('--profile', default='balanced', help='perfil de IA (ver config.AI_PROFILES)')
+    parser.add_argument('--handshake-latency', type=float, default=0.02,
+                        help='costo de abrir una conexión con el Ollama falso (s)')
+    parser.add_argument('--tts-handshake', type=float, default=0.08,
+                        help='costo de abrir una conexión con el servicio de voz falso (s)')
+    parser.add_argument('--only', choices=('pipeline', 'micro', 'backends', 'client', 'tts', 'stt', 'ptt'))
+    parser.add_argument('--json', help='guardar el resumen en este archivo')
+    args = parser.parse_args(argv)
+
+    args.repo = os.path.abspath(args.repo)
+    sys.path.insert(0, args.repo)
+    os.chdir(args.repo)
+
+    # Perfil fijo: "auto" calibraría contra el Ollama falso
+    os.environ.setdefault('TETO_AI_PROFILE', args.profile)
+    try:
+        edge_server = FakeEdgeTTSServer(handshake_latency=args.tts_handshake).start()
+    except ImportError:
+        edge_server = None   # sin aiohttp: Communicate de mentira
+    fake_pygame = install_fakes(edge_server.url if edge_server else None)
+    samples, skipped = {}, []
+
+    with FakeOllamaServer(token_rate=args.token_rate, prompt_rate=args.prompt_rate) as server:
+        # ollama lee OLLAMA_HOST al importarse
+        os.environ['OLLAMA_HOST'] = server.url
+        from ai_service import TetoAI
+        from tts_service import TetoTTS
+
+        with tempfile.TemporaryDirectory() as tmp:
+            teto = TetoAI(use_gemini=False, memory_file=os.path.join(tmp, 'memory.json'))
+            tts = TetoTTS()
+
+            if args.only in (None, 'pipeline'):
+                bench_pipeline(args, samples, skipped, teto, tts, fake_pygame)
+            if args.only in (None, 'micro'):
+                bench_micro(args, samples, skipped, teto)
+            if args.only in (None, 'backends'):
+                bench_backends(args, samples, skipped, teto, tmp)
+            if args.only in (None, 'client'):
+                bench_client(args, samples, skipped)
+            if args.only in (None, 'tts'):
+                bench_tts(args, samples, skipped, tts)
+            if args.only in (None, 'stt'):
+                bench_stt(args, samples, skipped)
+            if args.only in (None, 'ptt'):
+                bench_ptt(args, samples, skipped)
+            if hasattr(tts, 'close'):
+                tts.close()
+    if edge_server:
+        edge_server.stop()
+
+    summary = summarize(samples)
+    print_table(summary, skipped)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'summary': summary, 'skipped': skipped}, f, indent=2)
+    return summary
+
+
+if __name__ == "__main__":
+    main()
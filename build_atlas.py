@@ -0,0 +1,165 @@
+"""Empaqueta los frames de cada estado de sprites/ en un atlas.
+
+Uso:
+    python build_atlas.py [carpeta_sprites] [--force]
+
+Por cada sprites/<estado>/ genera atlas.png + atlas.json. Si el CLI de Aseprite
+está instalado, exporta los frames (y sus duraciones) directamente de los .ase;
+si no, usa los Sprite-NNNN.png exportados y lee las duraciones del .ase.
+"""
+import json
+import math
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+from PyQt5.QtCore import QRect
+from PyQt5.QtGui import QImage, QPainter
+
+from animation import ATLAS_IMAGE, ATLAS_META, DEFAULT_FRAME_MS
+
+PADDING = 1
+ASE_MAGIC = 0xA5E0
+ASE_FRAME_MAGIC = 0xF1FA
+
+
+def read_ase_durations(path):
+    """Lee la duración (ms) de cada frame desde el header de un .ase"""
+    durations = []
+    with open(path, 'rb') as f:
+        header = f.read(128)
+        if len(header) < 128:
+            return durations
+        _, magic, frame_count = struct.unpack('<IHH', header[:8])
+        if magic != ASE_MAGIC:
+            return durations
+        for _ in range(frame_count):
+            frame_header = f.read(16)
+            if len(frame_header) < 16:
+                break
+            frame_bytes, frame_magic, _, duration = struct.unpack('<IHHH', frame_header[:10])
+            if frame_magic != ASE_FRAME_MAGIC:
+                break
+            durations.append(duration or DEFAULT_FRAME_MS)
+            f.seek(frame_bytes - 16, os.SEEK_CUR)
+    return durations
+
+
+def find_aseprite():
+    """Ruta al CLI de Aseprite (o None)"""
+    return os.environ.get('ASEPRITE') or shutil.which('aseprite')
+
+
+def export_ase(aseprite, ase_path):
+    """Exporta los frames de un .ase con Aseprite; devuelve [(QImage, duración)]"""
+    with tempfile.TemporaryDirectory() as tmp:
+        sheet = os.path.join(tmp, 'sheet.png')
+        data = os.path.join(tmp, 'sheet.json')
+        subprocess.run([aseprite, '-b', ase_path, '--sheet', sheet, '--data', data,
+                        '--format', 'json-array', '--sheet-type', 'rows'],
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with open(data, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        image = QImage(sheet)
+        frames = []
+        for fr in meta['frames']:
+            r = fr['frame']
+            frames.append((image.copy(QRect(r['x'], r['y'], r['w'], r['h'])),
+                           fr.get('duration', DEFAULT_FRAME_MS)))
+        return frames
+
+
+def collect_frames(state_dir, aseprite):
+    """Frames del estado en orden, como [(QImage, duración)]"""
+    stems = sorted({os.path.splitext(name)[0] for name in os.listdir(state_dir)
+                    if name.lower().startswith('sprite-') and name.lower().endswith(('.png', '.ase'))})
+    frames = []
+    for stem in stems:
+        ase_path = os.path.join(state_dir, stem + '.ase')
+        png_path = os.path.join(state_dir, stem + '.png')
+
+        if aseprite and os.path.exists(ase_path):
+            try:
+                frames.extend(export_ase(aseprite, ase_path))
+                continue
+            except (subprocess.CalledProcessError, OSError, KeyError, ValueError) as e:
+                print(f"⚠ Falló la exportación de {ase_path}: {e}")
+
+        if os.path.exists(png_path):
+            durations = read_ase_durations(ase_path) if os.path.exists(ase_path) else []
+            frames.append((QImage(png_path), durations[0] if durations else DEFAULT_FRAME_MS))
+    return frames
+
+
+def needs_rebuild(state_dir):
+    """True si algún fuente es más nuevo que el atlas"""
+    atlas_path = os.path.join(state_dir, ATLAS_IMAGE)
+    meta_path = os.path.join(state_dir, ATLAS_META)
+    if not (os.path.exists(atlas_path) and os.path.exists(meta_path)):
+        return True
+    built = min(os.path.getmtime(atlas_path), os.path.getmtime(meta_path))
+    return any(os.path.getmtime(os.path.join(state_dir, name)) > built
+               for name in os.listdir(state_dir)
+               if name.lower().startswith('sprite-'))
+
+
+def pack(frames):
+    """Acomoda los frames en una grilla; devuelve (QImage, [QRect])"""
+    cell_w = max(img.width() for img, _ in frames) + PADDING
+    cell_h = max(img.height() for img, _ in frames) + PADDING
+    columns = math.ceil(math.sqrt(len(frames)))
+    rows = math.ceil(len(frames) / columns)
+
+    atlas = QImage(columns * cell_w, rows * cell_h, QImage.Format_ARGB32_Premultiplied)
+    atlas.fill(0)
+    rects = []
+    painter = QPainter(atlas)
+    for i, (img, _) in enumerate(frames):
+        x = (i % columns) * cell_w
+        y = (i // columns) * cell_h
+        painter.drawImage(x, y, img)
+        rects.append(QRect(x, y, img.width(), img.height()))
+    painter.end()
+    return atlas, rects
+
+
+def build_state(state_dir, aseprite, force=False):
+    if not force and not needs_rebuild(state_dir):
+        print(f"  = {state_dir} (al día)")
+        return
+    frames = collect_frames(state_dir, aseprite)
+    if not frames:
+        print(f"  - {state_dir} sin frames")
+        return
+
+    atlas, rects = pack(frames)
+    atlas.save(os.path.join(state_dir, ATLAS_IMAGE))
+    meta = {
+        'state': os.path.basename(state_dir),
+        'loop': True,
+        'frames': [{'x': r.x(), 'y': r.y(), 'w': r.width(), 'h': r.height(), 'duration': duration}
+                   for r, (_, duration) in zip(rects, frames)],
+    }
+    with open(os.path.join(state_dir, ATLAS_META), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+    print(f"  ✓ {state_dir}: {len(frames)} frames -> {atlas.width()}x{atlas.height()}")
+
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    force = '--force' in sys.argv
+    root = args[0] if args else 'sprites'
+
+    aseprite = find_aseprite()
+    print(f"Aseprite: {aseprite or 'no encontrado (uso los PNG exportados)'}")
+
+    for state in sorted(os.listdir(root)):
+        state_dir = os.path.join(root, state)
+        if os.path.isdir(state_dir):
+            build_state(state_dir, aseprite, force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+# Configuración de Teto Companion
+import os
+
+# Modo de render del sprite:
+#   "canvas" - ventana transparente de tamaño fijo (el máximo de escala) y el
+#              sprite se dibuja con QPainter; agitar no redimensiona ventanas
+#   "resize" - la ventana se redimensiona junto con el sprite (modo original)
+RENDER_MODE = "canvas"
+
+# Escala máxima que alcanza Teto al agitarla
+MAX_SPRITE_SCALE = 3.0
+
+# En modo canvas, el globito solo se reacomoda si se desplazó al menos esto (px)
+BUBBLE_SNAP_PX = 8
+
+# Monitoreo de procesos: cada cuántos segundos se revisa (en un hilo aparte)
+PROCESS_POLL_INTERVAL = 5.0
+
+# Reacciones a procesos. 'process' se compara sin ".exe" y en minúsculas, así
+# que "code" vale tanto para code.exe (Windows) como para code (Linux).
+#   on:       "start" (primera instancia) o "exit" (se cerró la última)
+#   message:  texto del globito (None = solo loguear)
+#   duration: ms que queda visible el globito
+#   cooldown: segundos mínimos entre dos disparos de la misma regla
+PROCESS_RULES = [
+    {'process': 'code', 'on': 'start', 'message': "¡Oh! ¿Vas a programar?\n¡Espero que no rompas nada!",
+     'duration': 5000, 'cooldown': 300},
+    {'process': 'chimera', 'on': 'start', 'message': None, 'cooldown': 0},
+    {'process': 'steam', 'on': 'start', 'message': None, 'cooldown': 0},
+    {'process': 'discord', 'on': 'start', 'message': None, 'cooldown': 0},
+]
+
+# Carpeta donde se guardan las trazas de latencia al cerrar (JSONL + Chrome trace)
+TRACE_DIR = "traces"
+
+# Watchdog del UI: detecta bloqueos del event loop de Qt y guarda el stack.
+# Es para diagnóstico: su latido despierta al hilo de Qt cada WATCHDOG_HEARTBEAT_MS
+# aunque Teto esté quieta.
+WATCHDOG_ENABLED = False
+WATCHDOG_THRESHOLD_MS = 50   # Bloqueos a partir de esta duración se registran
+WATCHDOG_HEARTBEAT_MS = 100  # Cada cuánto late el event loop (más bajo = detecta bloqueos más cortos)
+WATCHDOG_LOG = "logs/ui_stalls.log"
+
+# Correr TetoAI + TetoTTS en un proceso aparte (el UI no comparte el GIL con la IA).
+# Si el proceso muere se relanza solo, hasta ENGINE_MAX_RESTARTS veces.
+ENGINE_OUT_OF_PROCESS = False
+ENGINE_MAX_RESTARTS = 5
+
+# Servidor headless (server.py): chat, memoria y TTS por HTTP/WebSocket local
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SERVER_SESSIONS_DIR = "sessions"      # Una memoria JSON por sesión
+SERVER_WORKERS = 4                    # Hilos para las llamadas bloqueantes a la IA
+SERVER_MAX_PENDING_PER_SESSION = 2    # Pedidos en curso por sesión antes de responder 429
+SERVER_SESSION_TTL = 1800             # Segundos sin uso antes de sacar la sesión de RAM
+SERVER_HISTORY_LIMIT = 50             # Mensajes de historial que se guardan por sesión
+
+# Admisión de pedidos a la IA (TetoAI): cuántos chats van al backend a la vez
+# (igualarlo a OLLAMA_NUM_PARALLEL), cuántos pueden esperar y el plazo de cada uno.
+# Los que esperan se atienden por turnos entre callers (usuario, eventos, sesiones).
+AI_MAX_CONCURRENT = 1
+AI_MAX_QUEUE = 32
+AI_REQUEST_TIMEOUT = 60.0   # Segundos (espera + generación); None = sin plazo
+AI_EVENT_TIMEOUT = 20.0     # Plazo de los comentarios por eventos (saludo, procesos); si vence, el texto fijo
+
+# Cliente de Ollama (ollama_client.py): uno por host, compartido, con conexiones keep-alive.
+OLLAMA_HOST = None                # None = variable de entorno OLLAMA_HOST o http://127.0.0.1:11434
+OLLAMA_CONNECT_TIMEOUT = 2.0      # Segundos para conectar (Ollama caído falla enseguida)
+OLLAMA_FIRST_BYTE_TIMEOUT = 60.0  # Hasta el primer fragmento (incluye cargar el modelo) y máximo silencio entre fragmentos
+OLLAMA_TOTAL_TIMEOUT = 120.0      # Tope de un pedido entero (además del plazo de admisión); None = sin tope
+OLLAMA_POOL_SIZE = 4              # Conexiones que quedan abiertas para reusar
+OLLAMA_KEEPALIVE_EXPIRY = 60.0    # Segundos que una conexión ociosa queda abierta
+
+# Perfil de rendimiento de la IA:
+#   "low-latency" / "balanced" / "quality" - perfiles fijos de abajo
+#   "auto" - la primera vez mide los modelos instalados (ai_profiles.py) y elige
+#            el mejor que llegue a AI_TARGET_FIRST_SENTENCE_MS; el resultado queda
+#            en AI_CALIBRATION_FILE (borrarlo o `python ai_profiles.py` para recalibrar).
+#            Mientras calibra (en segundo plano) se usa "balanced".
+# La variable de entorno TETO_AI_PROFILE tiene prioridad.
+AI_PROFILE = os.environ.get("TETO_AI_PROFILE", "auto")
+
+# Cada perfil:
+#   model:          modelo de Ollama (la cuantización es parte del tag, ej. ":8b-instruct-q4_K_M")
+#   history_window: mensajes de historial que se mandan
+#   num_ctx:        ventana de contexto de Ollama (tokens)
+#   num_predict:    tope de tokens de la respuesta
+#   keep_alive:     cuánto queda el modelo cargado después de un pedido
+#   style:          instrucción de largo/tono que se agrega al prompt
+AI_PROFILES = {
+    "low-latency": {
+        "model": "llama3.2:3b",
+        "history_window": 6,
+        "num_ctx": 2048,
+        "num_predict": 80,
+        "keep_alive": "60m",
+        "style": "Respondé en una o dos oraciones, cortito y al grano.",
+    },
+    "balanced": {
+        "model": "llama3.1:8b",
+        "history_window": 15,
+        "num_ctx": 4096,
+        "num_predict": 160,
+        "keep_alive": "30m",
+        "style": "Respuestas cortas y naturales, no seas muy formal.",
+    },
+    "quality": {
+        "model": "llama3.1:8b",
+        "history_window": 30,
+        "num_ctx": 8192,
+        "num_predict": 320,
+        "keep_alive": "30m",
+        "style": "Respuestas naturales, no seas muy formal; podés extenderte un poco si hace falta.",
+    },
+}
+
+# Hilos de CPU para Ollama (None = que decida Ollama)
+AI_NUM_THREAD = None
+
+# Calibración ("auto"): candidatos de más rápido a mejor; solo se prueban los instalados
+AI_CALIBRATION_CANDIDATES = ["llama3.2:1b", "llama3.2:3b", "llama3.1:8b-instruct-q4_K_M", "llama3.1:8b"]
+AI_TARGET_FIRST_SENTENCE_MS = 1500   # Tiempo objetivo hasta la primera oración
+AI_TARGET_REPLY_SECONDS = 6.0        # num_predict se ajusta para que la respuesta entera dure esto
+AI_CALIBRATION_FILE = "ai_calibration.json"
+AI_CALIBRATION_IDLE_SECONDS = 60.0  # La primera calibración espera a que la IA esté este tiempo sin pedidos
+
+# Frases proactivas precalculadas (proactive.py): mientras no estás chateando,
+# Teto genera con la IA (y sintetiza) frases personalizadas para cada disparador,
+# así salen y suenan al instante. Con el motor fuera de proceso no se usan.
+PROACTIVE_ENABLED = True
+PROACTIVE_POOL_SIZE = 2          # Frases listas por disparador y momento del día
+PROACTIVE_MAX_PER_HOUR = 24      # Presupuesto de generaciones por hora
+PROACTIVE_IDLE_SECONDS = 60      # Sin interacción durante esto = rato libre
+PROACTIVE_CHECK_INTERVAL = 30    # Cada cuánto se revisa si hay que generar (s)
+PROACTIVE_CACHE_DIR = "proactive_cache"
+PROACTIVE_TRIGGERS = {
+    'greeting': "Acabo de prender la compu. Saludame.",
+    'chat_open': "Abrí el chat para hablarte. Saludame y preguntame qué quiero.",
+    'shake': "Te estoy sacudiendo la ventana con el mouse re fuerte. Quejate.",
+}
+# Disparadores "app:<process>" para las reglas de PROCESS_RULES que tienen mensaje
+PROACTIVE_APP_PROMPT = "Acabo de abrir {process}. Hacé un comentario corto sobre eso."
+
+# Gemini (TetoAI con use_gemini=True y una API key). La persona se cachea en el
+# servidor durante GEMINI_CACHE_TTL segundos y cada pedido solo la referencia.
+# GOOGLE_GEMINI_BASE_URL (variable de entorno) apunta a otro servidor, ej. para pruebas.
+GEMINI_MODEL = "gemini-2.5-flash"
+GEMINI_CACHE_TTL = 3600
+GEMINI_TIMEOUT = 30.0         # Segundos que el cliente HTTP espera a Gemini (conectar, primer fragmento y entre fragmentos)
+GEMINI_TOTAL_TIMEOUT = 120.0  # Tope de un pedido entero (además del plazo de admisión); None = sin tope
+# Key para Gemini cuando no se pasa una explícita (así Gemini puede ser el respaldo de Ollama)
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
+
+# Ruteo entre backends (backend_router.py). El backend principal es Ollama, o
+# Gemini con use_gemini=True; con AI_FALLBACK el otro queda de respaldo si hay
+# cómo usarlo (key de Gemini / Ollama instalado).
+# Después de AI_BREAKER_FAILURES fallas seguidas un backend se saltea durante
+# AI_BREAKER_RESET segundos (sin esperar a que vuelva a fallar) y después se prueba
+# con un pedido. Con AI_HEDGE_AFTER_MS, si el principal no mandó ningún fragmento
+# en ese tiempo, el pedido va también al respaldo y gana el que hable primero
+# (gasta el doble en los pedidos lentos: None = apagado).
+AI_FALLBACK = True
+AI_BREAKER_FAILURES = 3
+AI_BREAKER_RESET = 30.0
+AI_HEDGE_AFTER_MS = None
+
+# Síntesis de voz (tts_service.py / tts_session.py): conexiones con el servicio
+# de Edge que quedan abiertas entre frases en vez de un handshake por frase.
+TTS_PERSISTENT_SESSION = True
+TTS_POOL_SIZE = 2          # Frases que se pueden sintetizar a la vez
+TTS_IDLE_TIMEOUT = 30.0    # Segundos sin uso antes de descartar una conexión
+
+# Reconocimiento de voz (stt_service.py): las grabaciones largas se cortan en las
+# pausas y los segmentos se reconocen en paralelo por una conexión reusada.
+STT_ENDPOINT = os.environ.get("TETO_STT_ENDPOINT")   # None = el de Google de speech_recognition
+STT_WORKERS = 4            # Segmentos que se reconocen a la vez
+STT_MIN_PAUSE = 0.35       # Segundos de silencio que cuentan como pausa
+STT_MIN_SEGMENT = 2.5      # Segundos mínimos por segmento (más cortas van enteras)
+STT_MIN_ENERGY = 300       # Energía mínima que cuenta como voz (como energy_threshold de speech_recognition)
+STT_TIMEOUT = 10.0         # Segundos por pedido
+
+# Push-to-talk global (hotkey_service.py): graba aunque la ventana de Teto no
+# tenga el foco. La tecla O con la ventana enfocada sigue andando.
+PTT_GLOBAL_HOTKEY = "<ctrl>+<alt>+o"   # Formato de pynput; varias separadas por coma. None = desactivado
+PTT_DEBOUNCE_MS = 40       # Soltar y volver a apretar dentro de este tiempo no corta la grabación
+PTT_TARGET_MS = 10         # Avisa si de la tecla a grabando se tarda más que esto
+# Micrófono abierto desde el arranque: grabar no espera a PyAudio (abrir el stream
+# cuesta decenas de ms en Windows y lo dicho mientras tanto se pierde) y hay pre-roll.
+# A cambio el micrófono queda en uso toda la sesión (el indicador del sistema
+# prendido) y el callback de PortAudio se despierta ~43 veces por segundo aunque
+# no se grabe. Apagado, el stream se abre al apretar y se cierra al soltar.
+PTT_KEEP_STREAM_OPEN = False
+PTT_PREROLL_MS = 200       # Audio de antes de apretar que se suma a la grabación (solo con PTT_KEEP_STREAM_OPEN)
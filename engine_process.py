@@ -0,0 +1,305 @@
+"""Motor de IA + TTS en un proceso aparte.
+
+El UI (PyQt, física, animaciones) queda solo en su proceso y no compite por el
+GIL con Ollama/edge-tts/pygame. La comunicación es por dos colas de
+multiprocessing con mensajes chicos (tipo, id, payload); las respuestas del
+chat llegan como fragmentos a medida que se generan.
+
+EngineClient imita la interfaz de TetoAI y TetoTTS, así el resto del código
+no necesita saber si el motor corre en este proceso o en otro.
+"""
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from tracing import tracer
+
+# Cada cuánto se mira el evento de cancelación mientras se espera al motor
+CANCEL_POLL = 0.05
+
+
+class EngineDied(Exception):
+    """El proceso del motor murió con pedidos pendientes"""
+
+
+class EngineFailed(Exception):
+    """El motor no pudo iniciar (ej. sin dispositivo de audio): reiniciarlo daría el mismo error"""
+
+
+def _engine_main(requests, events, options):
+    """Loop del proceso del motor"""
+    from ai_service import TetoAI
+    from tts_service import TetoTTS
+    import ollama_client
+
+    try:
+        teto_ai = TetoAI(use_gemini=options['use_gemini'], gemini_key=options['gemini_key'],
+                         memory_file=options['memory_file'])
+        tts = TetoTTS(voice=options['voice'])
+    except Exception as e:
+        events.put(('fatal', None, str(e)))
+        return
+
+    events.put(('ready', None, {'origin': tracer.origin, 'use_gemini': teto_ai.use_gemini}))
+    # El chat va en su propio hilo para que speak/stop no esperen a la IA
+    chat_executor = ThreadPoolExecutor(max_workers=1)
+    chat_cancels = {}   # id -> threading.Event (se marca con un mensaje 'cancel')
+
+    def run_chat(req_id, payload):
+        trace_id = payload.get('trace_id')
+        try:
+            with tracer.activate(trace_id):
+                reply = teto_ai.chat(payload['message'], context=payload.get('context', ''),
+                                     conversation_history=payload.get('history'),
+                                     caller=payload.get('caller', 'default'),
+                                     timeout=payload.get('timeout'),
+                                     remember=payload.get('remember', True),
+                                     cancel=chat_cancels[req_id],
+                                     on_token=lambda piece: events.put(('token', req_id, piece)))
+            events.put(('done', req_id, reply))
+        except Exception as e:
+            events.put(('error', req_id, str(e)))
+        finally:
+            chat_cancels.pop(req_id, None)
+        if trace_id:
+            events.put(('spans', req_id, tracer.spans(trace_id)))
+
+    calls = {
+        'help': teto_ai.get_help,
+        'memory_summary': teto_ai.get_memory_summary,
+        'clear_memory': teto_ai.clear_all_memory,
+        'is_speaking': tts.is_speaking,
+        'stop_speaking': tts.stop,
+    }
+
+    while True:
+        kind, req_id, payload = requests.get()
+        if kind == 'shutdown':
+            break
+        if kind == 'chat':
+            chat_cancels[req_id] = threading.Event()
+            chat_executor.submit(run_chat, req_id, payload)
+        elif kind == 'cancel':
+            if req_id in chat_cancels:
+                chat_cancels[req_id].set()
+        elif kind == 'speak':
+            tts.speak(payload['text'], blocking=False, request_id=payload.get('trace_id'))
+        elif kind == 'prewarm':
+            tts.prewarm()
+        elif kind in calls:
+            try:
+                events.put(('done', req_id, calls[kind]()))
+            except Exception as e:
+                events.put(('error', req_id, str(e)))
+        elif kind == 'ping':
+            events.put(('done', req_id, 'pong'))
+
+    chat_executor.shutdown(wait=False)
+    tts.stop()
+    tts.close()
+    ollama_client.close()
+
+
+class EngineClient:
+    """Cliente del motor fuera de proceso, con reinicio automático si muere"""
+    def __init__(self, use_gemini=False, gemini_key=None, memory_file="teto_memory.json",
+                 voice="es-AR-ElenaNeural", call_timeout=120.0, max_restarts=5):
+        self.use_gemini = use_gemini
+        self.options = {'use_gemini': use_gemini, 'gemini_key': gemini_key,
+                        'memory_file': memory_file, 'voice': voice}
+        self.call_timeout = call_timeout
+        self.max_restarts = max_restarts
+        self.restarts = 0
+
+        self._ctx = multiprocessing.get_context('spawn')
+        self._ids = itertools.count(1)
+        self._pending = {}   # id -> (Future, on_token)
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._closing = False
+        self._process = None
+        self._requests = None
+        self._events = None
+        self._reader = None
+        self._origin = None
+        self._fatal = None   # error de arranque del motor (no se relanza)
+
+    # --- Ciclo de vida ---
+
+    def start(self, wait=True, timeout=60.0):
+        """Lanza el proceso del motor (y el hilo lector de eventos)"""
+        self._spawn()
+        self._reader = threading.Thread(target=self._read_events, name='EngineReader', daemon=True)
+        self._reader.start()
+        if wait and not self._ready.wait(timeout):
+            print("⚠ El motor no respondió a tiempo; sigue arrancando en segundo plano")
+        if self._fatal is not None:
+            raise EngineFailed(f"El motor no pudo iniciar: {self._fatal}")
+        return self
+
+    def _spawn(self):
+        self._ready.clear()
+        self._requests = self._ctx.Queue()
+        self._events = self._ctx.Queue()
+        self._process = self._ctx.Process(target=_engine_main, name='TetoEngine',
+                                          args=(self._requests, self._events, self.options),
+                                          daemon=True)
+        self._process.start()
+        print(f"✓ Motor de IA/TTS en proceso aparte (pid {self._process.pid})")
+
+    def shutdown(self, timeout=3.0):
+        """Cierra el motor ordenadamente (o lo mata si no responde)"""
+        self._closing = True
+        if self._process and self._process.is_alive():
+            self._requests.put(('shutdown', None, None))
+            self._process.join(timeout)
+            if self._process.is_alive():
+                self._process.terminate()
+        self._fail_pending(EngineDied("Motor cerrado"))
+
+    def is_alive(self):
+        return self._process is not None and self._process.is_alive()
+
+    def _read_events(self):
+        while not self._closing:
+            try:
+                kind, req_id, payload = self._events.get(timeout=0.5)
+            except queue.Empty:
+                if not self._closing and not self.is_alive():
+                    self._handle_death()
+                continue
+            except (EOFError, OSError):
+                if not self._closing:
+                    self._handle_death()
+                continue
+            self._dispatch(kind, req_id, payload)
+
+    def _dispatch(self, kind, req_id, payload):
+        if kind == 'ready':
+            self._origin = payload['origin']
+            self._ready.set()
+            return
+        if kind == 'fatal':
+            # Error determinista: no es un crash, no se relanza
+            print(f"✗ El motor no pudo iniciar: {payload}")
+            self._fatal = payload
+            self._closing = True
+            self._fail_pending(EngineFailed(f"El motor no pudo iniciar: {payload}"))
+            self._ready.set()   # start() deja de esperar
+            return
+        if kind == 'spans':
+            if self._origin is not None:
+                tracer.merge(payload, self._origin)
+            return
+
+        with self._lock:
+            entry = self._pending.get(req_id)
+            if entry and kind in ('done', 'error'):
+                del self._pending[req_id]
+        if entry is None:
+            return
+        future, on_token = entry
+        if kind == 'token':
+            if on_token:
+                on_token(payload)
+        elif kind == 'done':
+            future.set_result(payload)
+        elif kind == 'error':
+            future.set_exception(RuntimeError(payload))
+
+    def _handle_death(self):
+        """El motor murió: fallar lo pendiente y relanzarlo"""
+        code = self._process.exitcode if self._process else None
+        print(f"✗ El motor murió (código {code})")
+        self._fail_pending(EngineDied(f"El motor murió (código {code})"))
+        if self.restarts >= self.max_restarts:
+            print("✗ Demasiados reinicios del motor; no se relanza")
+            self._closing = True
+            return
+        self.restarts += 1
+        time.sleep(min(2 ** self.restarts * 0.25, 5.0))
+        self._spawn()
+
+    def _fail_pending(self, error):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for future, _ in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    # --- RPC ---
+
+    def _call(self, kind, payload=None, on_token=None, timeout=None, cancel=None):
+        """Manda un pedido y espera la respuesta; con cancel devuelve None al cancelarse"""
+        if self._fatal is not None:
+            raise EngineFailed(f"El motor no pudo iniciar: {self._fatal}")
+        if self._closing:
+            raise EngineDied("Motor cerrado")
+        req_id = next(self._ids)
+        future = Future()
+        with self._lock:
+            self._pending[req_id] = (future, on_token)
+        self._requests.put((kind, req_id, payload))
+        try:
+            if cancel is None:
+                return future.result(timeout or self.call_timeout)
+            deadline = time.monotonic() + (timeout or self.call_timeout)
+            while True:
+                try:
+                    return future.result(max(0.0, min(CANCEL_POLL, deadline - time.monotonic())))
+                except FutureTimeout:
+                    if cancel.is_set():
+                        # El motor corta la generación en el próximo fragmento
+                        self._requests.put(('cancel', req_id, None))
+                        return None
+                    if time.monotonic() >= deadline:
+                        raise
+        finally:
+            with self._lock:
+                self._pending.pop(req_id, None)
+
+    # --- Interfaz tipo TetoAI ---
+
+    def chat(self, user_message, context="", conversation_history=None, on_token=None, caller="default",
+             timeout=None, remember=True, cancel=None):
+        payload = {
+            'message': user_message,
+            'context': context,
+            'history': list(conversation_history or []),
+            'caller': caller,
+            'timeout': timeout,
+            'remember': remember,
+            'trace_id': tracer.current_request(),
+        }
+        # Como TetoAI: un pedido cancelado devuelve ""
+        reply = self._call('chat', payload, on_token=on_token, timeout=timeout, cancel=cancel)
+        return "" if reply is None else reply
+
+    def get_help(self):
+        return self._call('help', timeout=5.0)
+
+    def get_memory_summary(self):
+        return self._call('memory_summary', timeout=5.0)
+
+    def clear_all_memory(self):
+        return self._call('clear_memory', timeout=5.0)
+
+    # --- Interfaz tipo TetoTTS ---
+
+    def speak(self, text, blocking=False, request_id=None):
+        self._requests.put(('speak', None, {'text': text, 'trace_id': request_id or tracer.current_request()}))
+
+    def prewarm(self):
+        self._requests.put(('prewarm', None, None))
+
+    def stop(self):
+        self._requests.put(('stop_speaking', None, None))
+
+    def is_speaking(self):
+        try:
+            return self._call('is_speaking', timeout=1.0)
+        except Exception:
+            return False
@@ -0,0 +1,73 @@
+import time
+from PyQt5.QtCore import QObject, QTimer, Qt
+
+
+class FrameScheduler(QObject):
+    """Scheduler de frames que duerme cuando no hay nada animando.
+
+    Cada callback recibe el delta en ms desde el frame anterior y devuelve True
+    si necesita otro frame. Si ningún callback lo pide (y nadie llamó a
+    request_frame), el timer se detiene hasta la próxima llamada.
+    """
+    def __init__(self, interval_ms=16, parent=None):
+        super().__init__(parent)
+        self.interval_ms = interval_ms
+        self._callbacks = []
+        self._pending = False
+        self._last_tick = None
+        self.wakeups = 0
+        self._stats_start = time.perf_counter()
+
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.timeout.connect(self._tick)
+
+        # Despertador para frames diferidos (animaciones lentas no necesitan 60 FPS)
+        self._wake_timer = QTimer(self)
+        self._wake_timer.setSingleShot(True)
+        self._wake_timer.setTimerType(Qt.PreciseTimer)
+        self._wake_timer.timeout.connect(self.request_frame)
+
+    def add_callback(self, callback):
+        self._callbacks.append(callback)
+
+    def request_frame(self):
+        """Pide un frame (despierta el scheduler si estaba dormido)"""
+        self._pending = True
+        if not self._timer.isActive():
+            self._last_tick = time.perf_counter()
+            self._timer.start(self.interval_ms)
+
+    def request_frame_in(self, delay_ms):
+        """Pide un frame dentro de delay_ms (sin mantener el timer de frames corriendo)"""
+        delay_ms = max(0, int(delay_ms))
+        if self._wake_timer.isActive() and self._wake_timer.remainingTime() <= delay_ms:
+            return
+        self._wake_timer.start(delay_ms)
+
+    def is_active(self):
+        return self._timer.isActive()
+
+    def wakeups_per_second(self):
+        """Promedio de frames ejecutados por segundo desde el último reset"""
+        elapsed = time.perf_counter() - self._stats_start
+        return self.wakeups / elapsed if elapsed > 0 else 0.0
+
+    def reset_stats(self):
+        self.wakeups = 0
+        self._stats_start = time.perf_counter()
+
+    def _tick(self):
+        now = time.perf_counter()
+        dt_ms = (now - self._last_tick) * 1000 if self._last_tick else self.interval_ms
+        self._last_tick = now
+        self._pending = False
+        self.wakeups += 1
+
+        keep_running = False
+        for callback in self._callbacks:
+            if callback(dt_ms):
+                keep_running = True
+
+        if not keep_running and not self._pending:
+            self._timer.stop()
@@ -0,0 +1,163 @@
+"""Backend de Gemini con google.genai.
+
+- Chat multi-turno nativo: el historial va como turnos user/model, no como
+  un texto "Usuario: ... Teto: ..." armado a mano.
+- Streaming: los fragmentos llegan a medida que se generan (y se mide el
+  tiempo al primer token, igual que con Ollama).
+- El prompt de la persona, que no cambia entre turnos, se sube una vez como
+  contenido cacheado en el servidor (cachedContents) y cada pedido solo lo
+  referencia. Lo que sí cambia (memoria, contexto) viaja con el mensaje.
+  Si la API no acepta el cache porque el prompt es más chico que el mínimo
+  cacheable del modelo se manda como system_instruction de siempre; si el
+  error es pasajero (429, 5xx) se manda así durante CACHE_RETRY_AFTER
+  segundos y después se vuelve a intentar.
+- Plazos: el cliente HTTP tiene timeout (sin él, un stream colgado retiene el
+  turno de admisión para siempre) y el stream se corta al pasar el plazo del
+  pedido o total_timeout, devolviendo lo generado hasta ahí (como con Ollama).
+
+Para probar sin red, GOOGLE_GEMINI_BASE_URL apunta el cliente a otro servidor
+(ver FakeGeminiServer en benchmarks/fakes.py).
+"""
+import hashlib
+import threading
+import time
+
+try:
+    from google import genai
+    from google.genai import errors as genai_errors
+    from google.genai import types
+    GENAI_AVAILABLE = True
+except ImportError:
+    GENAI_AVAILABLE = False
+
+from tracing import tracer
+
+CACHE_RETRY_AFTER = 60.0   # Segundos sin cache después de un error pasajero al crearlo
+
+
+class GeminiBackend:
+    def __init__(self, api_key, model, cache_ttl=3600, timeout=None, total_timeout=None):
+        http_options = types.HttpOptions(timeout=round(timeout * 1000)) if timeout else None
+        self.client = genai.Client(api_key=api_key, http_options=http_options)
+        self.model = model
+        self.cache_ttl = cache_ttl
+        self.total_timeout = total_timeout
+        self._lock = threading.Lock()
+        self._cache_key = None       # hash de la persona cacheada
+        self._cache_name = None
+        self._cache_expires = 0.0
+        self._cache_unsupported = False
+        self._cache_retry_at = 0.0
+
+    def _persona_cache(self, persona):
+        """Nombre del contenido cacheado con la persona (lo crea o renueva si hace falta)"""
+        if self._cache_unsupported or time.time() < self._cache_retry_at:
+            return None
+        key = hashlib.sha1(f"{self.model}\n{persona}".encode('utf-8')).hexdigest()
+        with self._lock:
+            # Margen de un minuto para no usar un cache que vence en pleno pedido
+            if self._cache_key == key and time.time() < self._cache_expires - 60:
+                return self._cache_name
+            try:
+                with tracer.span('gemini.cache_create', chars=len(persona)):
+                    cache = self.client.caches.create(
+                        model=self.model,
+                        config=types.CreateCachedContentConfig(
+                            display_name=f"teto-persona-{key[:8]}",
+                            system_instruction=persona,
+                            ttl=f"{self.cache_ttl}s",
+                        ),
+                    )
+            except genai_errors.APIError as e:
+                if e.code == 400 and 'too small' in str(e.message or '').lower():
+                    print("⚠ La persona es más chica que el mínimo cacheable de Gemini; se manda en cada pedido")
+                    self._cache_unsupported = True
+                else:
+                    print(f"⚠ No pude cachear la persona en Gemini ({e.code}); reintento en {CACHE_RETRY_AFTER:.0f}s")
+                    self._cache_retry_at = time.time() + CACHE_RETRY_AFTER
+                return None
+            self._cache_key = key
+            self._cache_name = cache.name
+            self._cache_expires = time.time() + self.cache_ttl
+            return cache.name
+
+    def _forget_cache(self):
+        with self._lock:
+            self._cache_key = self._cache_name = None
+
+    def chat(self, persona, context, user_message, conversation_history=None, on_token=None,
+             max_tokens=None, deadline=None):
+        """Manda un turno y devuelve la respuesta completa (on_token recibe cada fragmento)
+
+        deadline: plazo absoluto (time.perf_counter); al pasarlo se corta el stream
+        """
+        if self.total_timeout:
+            total = time.perf_counter() + self.total_timeout
+            deadline = total if deadline is None else min(deadline, total)
+        history = [
+            types.Content(role='user' if msg['role'] == 'user' else 'model',
+                          parts=[types.Part(text=msg['content'])])
+            for msg in conversation_history or []
+        ]
+        cache_name = self._persona_cache(persona)
+        streamed = []
+
+        def forward(piece):
+            streamed.append(piece)
+            if on_token:
+                on_token(piece)
+
+        try:
+            return self._send(persona, context, user_message, history, forward, max_tokens, cache_name,
+                              deadline)
+        except genai_errors.ClientError as e:
+            # El cache pudo vencer o borrarse del lado del servidor: reintentar una vez sin él,
+            # salvo que ya hayan salido fragmentos (se repetirían en el cliente)
+            if cache_name is None or e.code not in (403, 404) or streamed:
+                raise
+            self._forget_cache()
+            return self._send(persona, context, user_message, history, forward, max_tokens,
+                              self._persona_cache(persona), deadline)
+
+    def _send(self, persona, context, user_message, history, on_token, max_tokens, cache_name, deadline=None):
+        config = types.GenerateContentConfig(
+            max_output_tokens=max_tokens,
+            # Sin "pensar": la respuesta es corta y lo que importa es el primer token
+            thinking_config=types.ThinkingConfig(thinking_budget=0),
+        )
+        message = [user_message]
+        if cache_name:
+            config.cached_content = cache_name
+            if context.strip():
+                message.insert(0, context.strip())
+        else:
+            config.system_instruction = persona + context
+
+        session = self.client.chats.create(model=self.model, config=config, history=history)
+        start = time.perf_counter()
+        parts = []
+        usage = None
+        stream = session.send_message_stream(message)
+        try:
+            for chunk in stream:
+                piece = chunk.text
+                if piece:
+                    if not parts:
+                        tracer.record('gemini.first_token', start, time.perf_counter())
+                    parts.append(piece)
+                    if on_token:
+                        on_token(piece)
+                usage = chunk.usage_metadata or usage
+                if deadline is not None and time.perf_counter() > deadline:
+                    print("⚠ Respuesta cortada por tiempo")
+                    break
+        finally:
+            # Cerrar el generador cierra la respuesta HTTP
+            stream.close()
+
+        tracer.record('gemini.request', start, time.perf_counter(),
+                      cached=bool(cache_name),
+                      prompt_tokens=(usage.prompt_token_count or 0) if usage else 0,
+                      cached_tokens=(usage.cached_content_token_count or 0) if usage else 0,
+                      eval_tokens=(usage.candidates_token_count or 0) if usage else 0)
+        return ''.join(parts)
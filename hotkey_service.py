@@ -0,0 +1,210 @@
+"""Atajos de teclado globales (pynput), en su propio hilo.
+
+keyPressEvent de Qt solo ve las teclas cuando la ventana de Teto tiene el
+foco. El Listener de pynput las ve siempre, tenga el foco la ventana que sea:
+
+- Combinaciones en el formato de pynput ("<ctrl>+<alt>+o", "<f9>"); se
+  dispara cuando están todas apretadas y se suelta al soltar cualquiera.
+- Antirrebote: un soltar seguido de un apretar dentro de debounce_ms no
+  cuenta (rebote de la tecla o autorepetición de X11, que manda
+  soltar/apretar). Apretar se atiende en el acto; soltar espera debounce_ms.
+- Los callbacks corren en el hilo del listener: tienen que ser cortos (ej.
+  marcar el inicio de la grabación) y pasar el resto a Qt con una señal.
+- Latencia: desde que llega la tecla hasta que volvió on_press (span
+  'ptt.start' en tracer, y stats() / format_stats()).
+"""
+import threading
+import time
+from collections import deque
+
+try:
+    from pynput import keyboard
+    HOTKEY_AVAILABLE = True
+except ImportError:
+    # Sin pynput, o sin servidor gráfico en Linux
+    HOTKEY_AVAILABLE = False
+
+from tracing import tracer
+
+
+def parse_chord(chord):
+    """"<ctrl>+<alt>+o" -> frozenset({'ctrl', 'alt', 'o'})"""
+    keys = set()
+    for part in chord.lower().split('+'):
+        part = part.strip()
+        if not part:
+            raise ValueError(f"Combinación inválida: {chord!r}")
+        keys.add(_canonical_name(part.strip('<>')) if part.startswith('<') else part)
+    return frozenset(keys)
+
+
+def _canonical_name(name):
+    # Izquierda y derecha valen lo mismo: ctrl_l / ctrl_r -> ctrl
+    for suffix in ('_l', '_r'):
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def key_name(key):
+    """Nombre de una tecla de pynput, comparable con parse_chord"""
+    name = getattr(key, 'name', None)
+    if name:
+        return _canonical_name(name)
+    char = getattr(key, 'char', None)
+    if char and char.isprintable():
+        return char.lower()
+    # Con ctrl apretado Windows manda caracteres de control: se usa el código virtual
+    vk = getattr(key, 'vk', None)
+    if vk is not None:
+        if 48 <= vk <= 57 or 65 <= vk <= 90:
+            return chr(vk).lower()
+        return f'<{vk}>'
+    return None
+
+
+class _Binding:
+    def __init__(self, chord, on_press, on_release):
+        self.chord = chord
+        self.keys = parse_chord(chord)
+        self.on_press = on_press
+        self.on_release = on_release
+        self.active = False
+        self.release_timer = None   # soltar pendiente (antirrebote)
+
+
+class HotkeyService:
+    def __init__(self, debounce_ms=40, target_ms=10):
+        self.debounce = debounce_ms / 1000
+        self.target_ms = target_ms
+        self.bindings = []
+        self.latencies = deque(maxlen=200)   # ms desde la tecla hasta que volvió on_press
+        self.bounces = 0
+        self._pressed = set()
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def bind(self, chord, on_press, on_release=None):
+        """Registra una combinación (o varias, separadas por coma)"""
+        for part in chord.split(','):
+            self.bindings.append(_Binding(part.strip(), on_press, on_release))
+        return self
+
+    def start(self):
+        if not HOTKEY_AVAILABLE:
+            print("⚠ pynput no disponible: sin atajos globales")
+            return False
+        self._listener = keyboard.Listener(on_press=self._on_press, on_release=self._on_release)
+        self._listener.daemon = True
+        self._listener.start()
+        print(f"✓ Atajos globales: {', '.join(b.chord for b in self.bindings)}")
+        return True
+
+    def stop(self):
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
+        with self._lock:
+            for binding in self.bindings:
+                if binding.release_timer:
+                    binding.release_timer.cancel()
+
+    # --- Eventos (hilo del listener) ---
+
+    def _on_press(self, key):
+        received = time.perf_counter()
+        name = key_name(self._listener.canonical(key) if self._listener else key)
+        if name:
+            self.press(name, received)
+
+    def _on_release(self, key):
+        name = key_name(self._listener.canonical(key) if self._listener else key)
+        if name:
+            self.release(name)
+
+    def press(self, name, received=None):
+        """Tecla apretada (received: cuándo llegó el evento, time.perf_counter)"""
+        received = received or time.perf_counter()
+        fire = []
+        with self._lock:
+            self._pressed.add(name)
+            for binding in self.bindings:
+                if name not in binding.keys or not binding.keys <= self._pressed:
+                    continue
+                if binding.active:
+                    if binding.release_timer:
+                        # Volvió a apretar antes del antirrebote: sigue activa
+                        binding.release_timer.cancel()
+                        binding.release_timer = None
+                        self.bounces += 1
+                    continue   # autorepetición
+                binding.active = True
+                fire.append(binding)
+
+        for binding in fire:
+            binding.on_press()
+            done = time.perf_counter()
+            ms = (done - received) * 1000
+            self.latencies.append(ms)
+            tracer.record('ptt.start', received, done, chord=binding.chord)
+            if ms > self.target_ms:
+                print(f"⚠ Atajo {binding.chord}: {ms:.1f} ms hasta grabar (objetivo {self.target_ms} ms)")
+
+    def release(self, name):
+        fire = []
+        with self._lock:
+            self._pressed.discard(name)
+            for binding in self.bindings:
+                if not binding.active or name not in binding.keys or binding.release_timer:
+                    continue
+                if self.debounce:
+                    binding.release_timer = threading.Timer(self.debounce, self._confirm_release, (binding,))
+                    binding.release_timer.daemon = True
+                    binding.release_timer.start()
+                else:
+                    binding.active = False
+                    fire.append(binding)
+        for binding in fire:
+            if binding.on_release:
+                binding.on_release()
+
+    def _confirm_release(self, binding):
+        with self._lock:
+            if binding.release_timer is None:
+                return   # se canceló: era un rebote
+            binding.release_timer = None
+            # Si la combinación se volvió a completar, no se soltó de verdad
+            if binding.keys <= self._pressed:
+                return
+            binding.active = False
+        if binding.on_release:
+            binding.on_release()
+
+    def stats(self):
+        ordered = sorted(self.latencies)
+        if not ordered:
+            return {'n': 0, 'bounces': self.bounces}
+        return {'n': len(ordered), 'p50_ms': ordered[len(ordered) // 2],
+                'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                'max_ms': ordered[-1], 'bounces': self.bounces}
+
+    def format_stats(self):
+        s = self.stats()
+        if not s['n']:
+            return "Atajo global: sin usar"
+        return (f"Atajo global: tecla -> grabando p50 {s['p50_ms']:.2f} ms, p95 {s['p95_ms']:.2f} ms, "
+                f"máx {s['max_ms']:.2f} ms ({s['n']} veces, {s['bounces']} rebotes)")
+
+
+if __name__ == "__main__":
+    # Prueba rápida: mantener apretado F9 (o ctrl+alt+o) en cualquier ventana
+    hotkeys = HotkeyService()
+    hotkeys.bind("<f9>, <ctrl>+<alt>+o", lambda: print("▶ apretado"), lambda: print("■ soltado"))
+    if hotkeys.start():
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        hotkeys.stop()
+        print(hotkeys.format_stats())
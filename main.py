@@ -3,15 +3,28 @@ import os
 import subprocess
 import speech_recognition as sr
 import threading
-import pyaudio
-from pynput import keyboard
+import time
+from collections import deque
 from datetime import datetime
 from PyQt5.QtWidgets import (QApplication, QWidget, QLabel, QTextEdit, 
                              QPushButton, QVBoxLayout, QHBoxLayout, QLineEdit)
-from PyQt5.QtCore import Qt, QPoint, QTimer, QThread, pyqtSignal
-from PyQt5.QtGui import QPixmap, QFont
+from PyQt5.QtCore import Qt, QPoint, QRect, QTimer, QThread, pyqtSignal
+from PyQt5.QtGui import QFont, QPainter, QRegion
+import config
+import ollama_client
 from ai_service import TetoAI
 from tts_service import TetoTTS
+from stt_service import TetoSTT
+from audio_capture import AudioCapture
+from hotkey_service import HotkeyService
+from sprite_cache import ScaledPixmapCache
+from frame_scheduler import FrameScheduler
+from animation import AnimationLibrary, AnimationEngine, Animation
+from process_watcher import ProcessScanner, ProcessRules
+from tracing import tracer
+from stall_watchdog import StallWatchdog
+from engine_process import EngineClient
+from proactive import ProactiveLines
 
 class SubtitleOverlay(QWidget):
     """Subtítulos flotantes para mostrar lo que escucha"""
@@ -63,37 +76,159 @@ class SubtitleOverlay(QWidget):
     def clear(self):
         self.hide()
 
+# Prioridades de la cola de IA (menor = más urgente)
+PRIORITY_USER = 0
+PRIORITY_EVENT = 1
+
+
+class AIRequest:
+    """Pedido encolado para el worker de IA"""
+    def __init__(self, request_id, message, history, priority, context=""):
+        self.request_id = request_id  # También es el id de la traza
+        self.submitted_at = time.perf_counter()
+        self.message = message
+        # Snapshot inmutable: el UI sigue modificando su propia lista
+        self.history = tuple(dict(msg) for msg in (history or ()))
+        self.priority = priority
+        self.context = context
+        # Se pasa a chat(cancel=...): cancelar corta la generación, no solo descarta la respuesta
+        self.cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+
 class AIWorker(QThread):
+    """Worker persistente de IA con cola de prioridad.
 
-    finished = pyqtSignal(str)
-    error = pyqtSignal(str)
+    - Los mensajes del usuario que llegan seguidos se juntan en un solo pedido.
+    - Un mensaje nuevo del usuario cancela el pedido en vuelo: la generación se
+      corta y, si la respuesta ya salió, se descarta (ver is_cancelled).
+    - Los comentarios por eventos (procesos, saludos) van con menor prioridad,
+      sin recordar datos y con AI_EVENT_TIMEOUT.
+    """
+
+    finished = pyqtSignal(str, str, int)  # request_id, respuesta, prioridad
+    error = pyqtSignal(str, str)
     
-    def __init__(self, teto_ai, message, history):
+    def __init__(self, teto_ai):
         super().__init__()
         self.teto_ai = teto_ai
-        self.message = message
-        self.history = history
+        self._cond = threading.Condition()
+        self._queue = []
+        self._current = None
+        self._running = True
+        self._cancelled_ids = deque(maxlen=64)
+
+    def submit(self, message, history, priority=PRIORITY_USER, context="", request_id=None):
+        """Encola un pedido y devuelve su id (el de la traza, si se pasa uno)"""
+        with self._cond:
+            if priority == PRIORITY_USER:
+                # Coalescing: si hay un pedido de usuario esperando, se le suma el mensaje
+                for req in self._queue:
+                    if req.priority == PRIORITY_USER and not req.cancelled:
+                        req.message += "\n" + message
+                        return req.request_id
+                # El pedido en vuelo quedó viejo (o es un comentario que haría esperar al usuario)
+                if self._current:
+                    self._cancel(self._current)
+            
+            req = AIRequest(request_id or tracer.new_request(), message, history, priority, context)
+            self._queue.append(req)
+            self._cond.notify()
+            return req.request_id
+
+    def cancel(self, request_id):
+        """Cancela un pedido (encolado o en vuelo)"""
+        with self._cond:
+            for req in self._queue:
+                if req.request_id == request_id:
+                    self._cancel(req)
+            if self._current and self._current.request_id == request_id:
+                self._cancel(self._current)
+
+    def cancel_events(self):
+        """Descarta los comentarios por eventos pendientes"""
+        with self._cond:
+            for req in self._queue:
+                if req.priority != PRIORITY_USER:
+                    self._cancel(req)
+
+    def is_cancelled(self, request_id):
+        """¿Se canceló? (la respuesta pudo emitirse justo antes de cancelar)"""
+        with self._cond:
+            return request_id in self._cancelled_ids
+
+    def _cancel(self, req):
+        req.cancel()
+        self._cancelled_ids.append(req.request_id)
+
+    def is_busy(self):
+        with self._cond:
+            return self._current is not None or any(not r.cancelled for r in self._queue)
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self.wait(2000)
+
+    def _take_next(self):
+        with self._cond:
+            while self._running:
+                self._queue = [r for r in self._queue if not r.cancelled]
+                if self._queue:
+                    # Prioridad primero, después orden de llegada
+                    req = min(self._queue, key=lambda r: (r.priority, r.submitted_at))
+                    self._queue.remove(req)
+                    self._current = req
+                    return req
+                self._cond.wait()
+            return None
         
     def run(self):
-        try:
-            response = self.teto_ai.chat(self.message, conversation_history=self.history)
-            self.finished.emit(response)
-        except Exception as e:
-            self.error.emit(str(e))
+        while True:
+            req = self._take_next()
+            if req is None:
+                return
+            tracer.record('ai.queue_wait', req.submitted_at, time.perf_counter(), req.request_id)
+            try:
+                is_user = req.priority == PRIORITY_USER
+                with tracer.activate(req.request_id):
+                    response = self.teto_ai.chat(req.message, context=req.context,
+                                                 conversation_history=list(req.history),
+                                                 caller='user' if is_user else 'events',
+                                                 timeout=None if is_user else config.AI_EVENT_TIMEOUT,
+                                                 remember=is_user, cancel=req.cancel_event)
+                if not req.cancelled:
+                    self.finished.emit(req.request_id, response, req.priority)
+            except Exception as e:
+                if not req.cancelled:
+                    self.error.emit(req.request_id, str(e))
+            finally:
+                with self._cond:
+                    self._current = None
+
 
 class VoiceWorker(QThread):
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
     
-    def __init__(self, audio_data):
+    def __init__(self, stt, audio_data, request_id=None):
         super().__init__()
+        self.stt = stt
         self.audio_data = audio_data
+        self.request_id = request_id
     
     def run(self):
-        r = sr.Recognizer()
         try:
-            # Usar el audio raw capturado
-            text = r.recognize_google(self.audio_data, language="es-AR")
+            # Usar el audio raw capturado (las grabaciones largas se reconocen por partes)
+            with tracer.span('voice.recognize', self.request_id):
+                text = self.stt.recognize(self.audio_data, self.request_id)
             print(f"🎤 Reconocido: {text}")
             self.finished.emit(text)
         except sr.UnknownValueError:
@@ -102,6 +237,30 @@ class VoiceWorker(QThread):
             self.error.emit(f"Error voz: {e}")
 
 
+class ProcessWatchWorker(QThread):
+    """Monitorea procesos en segundo plano y emite eventos de inicio/cierre"""
+    process_event = pyqtSignal(str, str, int)  # evento ('start'/'exit'), nombre, pid
+    
+    def __init__(self, interval=5.0):
+        super().__init__()
+        self.interval = interval
+        self.scanner = ProcessScanner()
+        self._stop_event = threading.Event()
+    
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                for event, name, pid in self.scanner.poll():
+                    self.process_event.emit(event, name, pid)
+            except Exception as e:
+                print(f"Error monitoreando procesos: {e}")
+            self._stop_event.wait(self.interval)
+    
+    def stop(self):
+        self._stop_event.set()
+        self.wait(2000)
+
+
 class SpeechBubble(QWidget):
     """Globo de diálogo que aparece arriba de Teto"""
     def __init__(self, parent=None):
@@ -268,36 +427,80 @@ class ChatPanel(QWidget):
 
 
 class TetoCompanion(QWidget):
+    # El atajo global corre en el hilo de pynput: la parte de UI llega por señal
+    ptt_started = pyqtSignal()
+    ptt_stopped = pyqtSignal()
+    
     def __init__(self):
         super().__init__()
+        # Watchdog primero: así también registra lo que bloquea el arranque
+        self.watchdog = None
+        if config.WATCHDOG_ENABLED:
+            self.watchdog = StallWatchdog(threshold_ms=config.WATCHDOG_THRESHOLD_MS,
+                                          heartbeat_ms=config.WATCHDOG_HEARTBEAT_MS,
+                                          log_path=config.WATCHDOG_LOG)
+            self.watchdog.start()
+            self.heartbeat_timer = QTimer(self)
+            self.heartbeat_timer.timeout.connect(self.watchdog.beat)
+            self.heartbeat_timer.start(config.WATCHDOG_HEARTBEAT_MS)
+        
         self.dragging = False
         self.offset = QPoint()
         self.chat_active = False
         self.conversation_history = []
         
-        self.known_processes = set()
-        # Timer para procesos
-        self.process_timer = QTimer(self)
-        self.process_timer.timeout.connect(self.check_processes)
-        self.process_timer.start(5000) # Cada 5 segundos
+        # Monitoreo de procesos (hilo aparte) + tabla de reacciones
+        self.process_rules = ProcessRules(config.PROCESS_RULES)
+        self.process_watcher = ProcessWatchWorker(interval=config.PROCESS_POLL_INTERVAL)
+        self.process_watcher.process_event.connect(self.handle_process_event)
+        self.process_watcher.start()
         
         # Variables para física de agitado
         self.original_pixmap = None
+        self.scale_cache = ScaledPixmapCache(min_scale=1.0, max_scale=config.MAX_SPRITE_SCALE, step=0.05)
+        self.render_mode = config.RENDER_MODE
+        self.current_pixmap = None
+        self.window_reconfigs = 0  # Cambios de geometría de ventanas top-level (costo de compositor)
+        self.mask_rect = None      # Máscara aplicada en modo canvas (para no repetirla)
+        self.scale_times = []  # Duración de cada apply_scale (ms)
         self.current_scale = 1.0
         self.shake_intensity = 0.0
         self.last_global_pos = None
         self.hold_timer = 0
         
-        # Timer de física (30 FPS aprox)
-        self.physics_timer = QTimer(self)
-        self.physics_timer.timeout.connect(self.update_physics)
-        self.physics_timer.start(33)
+        self.pending_move = None
+        
+        # Scheduler de frames: solo corre mientras algo se anima o se arrastra
+        self.frame_scheduler = FrameScheduler(interval_ms=16, parent=self)
+        self.frame_scheduler.add_callback(self.flush_drag)
+        self.frame_scheduler.add_callback(self.update_physics)
+        if self.watchdog:
+            self.frame_scheduler.add_callback(self.watchdog.record_frame)
         
-        # IA
-        self.teto_ai = TetoAI(use_gemini=False)
+        # Animaciones: atlas por estado (carga perezosa) y un único reloj compartido
+        self.animations = AnimationLibrary('sprites')
+        self.animation_engine = AnimationEngine(self.frame_scheduler)
+        self.sprite_key = None
+        
+        # IA (en este proceso o, si está configurado, en un proceso aparte junto con el TTS)
+        self.engine = None
+        if config.ENGINE_OUT_OF_PROCESS:
+            self.engine = EngineClient(use_gemini=False, voice="es-AR-ElenaNeural",
+                                       max_restarts=config.ENGINE_MAX_RESTARTS).start()
+            self.teto_ai = self.engine
+        else:
+            self.teto_ai = TetoAI(use_gemini=False)
+        self.event_requests = {}   # request_id -> (texto fijo si falla, duración) de comentarios por eventos
+        self.ai_worker = AIWorker(self.teto_ai)
+        self.ai_worker.finished.connect(self.handle_ai_response)
+        self.ai_worker.error.connect(self.handle_ai_error)
+        self.ai_worker.start()
         
         # TTS
-        self.tts = TetoTTS(voice="es-AR-ElenaNeural")
+        self.tts = self.engine or TetoTTS(voice="es-AR-ElenaNeural")
+        
+        # STT residente: hilos y conexión HTTP abiertos entre grabaciones
+        self.stt = TetoSTT(language="es-AR")
         
         # Globito de diálogo
         self.speech_bubble = SpeechBubble()
@@ -314,9 +517,32 @@ class TetoCompanion(QWidget):
         
         # Audio PTT
         self.is_recording = False
-        self.audio_frames = []
-        self.pyaudio_instance = pyaudio.PyAudio()
-        self.stream = None
+        self.capture = AudioCapture(rate=44100, chunk=1024, keep_open=config.PTT_KEEP_STREAM_OPEN,
+                                    preroll_ms=config.PTT_PREROLL_MS)
+        self.record_started_at = time.perf_counter()
+        self.ptt_started.connect(self.recording_started)
+        self.ptt_stopped.connect(self.stop_recording)
+        self.hotkeys = None
+        if config.PTT_GLOBAL_HOTKEY:
+            self.hotkeys = HotkeyService(debounce_ms=config.PTT_DEBOUNCE_MS, target_ms=config.PTT_TARGET_MS)
+            self.hotkeys.bind(config.PTT_GLOBAL_HOTKEY, self.start_recording, self.ptt_stopped.emit)
+            self.hotkeys.start()
+        self.pending_request_id = None
+        self.request_started = {}  # request_id -> inicio (para latencia total)
+        
+        # Frases proactivas precalculadas en los ratos libres (necesitan la IA en este proceso)
+        self.last_interaction = time.monotonic()
+        self.proactive = None
+        if config.PROACTIVE_ENABLED and self.engine is None:
+            triggers = dict(config.PROACTIVE_TRIGGERS)
+            for rule in config.PROCESS_RULES:
+                if rule.get('message'):
+                    triggers[f"app:{rule['process']}"] = config.PROACTIVE_APP_PROMPT.format(process=rule['process'])
+            self.proactive = ProactiveLines(self.teto_ai, self.tts, triggers, config.PROACTIVE_CACHE_DIR,
+                                            pool_size=config.PROACTIVE_POOL_SIZE,
+                                            max_per_hour=config.PROACTIVE_MAX_PER_HOUR,
+                                            check_interval=config.PROACTIVE_CHECK_INTERVAL,
+                                            is_idle=self.is_idle).start()
         
         self.init_ui()
 
@@ -334,55 +560,41 @@ class TetoCompanion(QWidget):
 
             
     def start_recording(self):
+        """Empieza a grabar ya (puede llamarse desde el hilo del atajo global)"""
+        if self.capture.start():
+            self.ptt_started.emit()
+
+    def recording_started(self):
         print("🎤 Iniciando grabación PTT...")
         self.is_recording = True
-        self.audio_frames = []
+        self.last_interaction = time.monotonic()
+        self.record_started_at = self.capture.started_at
         
         # Feedback visual
-        QTimer.singleShot(0, lambda: self.subtitles.set_text("🎤 Escuchando..."))
-        
-        # Abrir stream
-        try:
-            self.stream = self.pyaudio_instance.open(format=pyaudio.paInt16,
-                                                   channels=1,
-                                                   rate=44100,
-                                                   input=True,
-                                                   frames_per_buffer=1024)
-            
-            # Grabar en hilo aparte para no bloquear
-            threading.Thread(target=self.record_loop).start()
-            
-        except Exception as e:
-            print(f"Error abriendo mic: {e}")
-            self.is_recording = False
-
-    def record_loop(self):
-        while self.is_recording and self.stream:
-            try:
-                data = self.stream.read(1024)
-                self.audio_frames.append(data)
-            except:
-                break
+        self.subtitles.set_text("🎤 Escuchando...")
 
     def stop_recording(self):
+        if not self.is_recording:
+            return
         print("🎤 Deteniendo grabación...")
         self.is_recording = False
+        request_id = tracer.new_request()
+        tracer.record('voice.record', self.record_started_at, time.perf_counter(), request_id)
         
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
-            self.stream = None
-            
         # Convertir a AudioData de SpeechRecognition
-        raw_data = b''.join(self.audio_frames)
-        audio_data = sr.AudioData(raw_data, 44100, 2)
+        with tracer.span('voice.join', request_id):
+            raw_data = self.capture.stop() or b''
+            audio_data = sr.AudioData(raw_data, self.capture.rate, self.capture.sample_width)
         
-        # Procesar
+        # Procesar (y abrir la conexión de voz mientras se reconoce y piensa)
+        self.tts.prewarm()
         QTimer.singleShot(0, lambda: self.subtitles.set_text("⏳ Procesando..."))
-        self.process_voice(audio_data)
+        self.process_voice(audio_data, request_id)
 
-    def process_voice(self, audio_data):
-        self.voice_worker = VoiceWorker(audio_data)
+    def process_voice(self, audio_data, request_id=None):
+        # El texto reconocido sigue la misma traza cuando llega a send_message
+        self.pending_request_id = request_id
+        self.voice_worker = VoiceWorker(self.stt, audio_data, request_id)
         self.voice_worker.finished.connect(self.handle_voice_result)
         self.voice_worker.error.connect(self.handle_voice_error)
         self.voice_worker.start()
@@ -396,6 +608,7 @@ class TetoCompanion(QWidget):
         self.send_message()
 
     def handle_voice_error(self, error):
+        self.pending_request_id = None
         self.subtitles.set_text(f"❌ {error}")
         QTimer.singleShot(2000, self.subtitles.clear)
         
@@ -411,15 +624,29 @@ class TetoCompanion(QWidget):
         # Label para el sprite
         self.sprite_label = QLabel(self)
         
-        # Cargar el sprite
-        sprite_path = os.path.join('sprites', 'idle', 'Sprite-0001.png')
+        # Cargar el sprite (atlas del estado idle)
+        idle_atlas = self.animations.get('idle')
         
-        if os.path.exists(sprite_path):
-            self.original_pixmap = QPixmap(sprite_path)
-            self.sprite_label.setPixmap(self.original_pixmap)
-            self.setGeometry(100, 100, self.original_pixmap.width(), self.original_pixmap.height())
-            self.sprite_label.setGeometry(0, 0, self.original_pixmap.width(), self.original_pixmap.height())
-            print(f"✓ Sprite cargado")
+        if idle_atlas and idle_atlas.frame_count():
+            self.original_pixmap = idle_atlas.frame(0)
+            if self.render_mode == 'canvas':
+                # Canvas fijo del tamaño máximo; el sprite se pinta en paintEvent
+                self.sprite_label.hide()
+                self.current_pixmap = self.original_pixmap
+                w = self.original_pixmap.width()
+                h = self.original_pixmap.height()
+                canvas_w = int(w * config.MAX_SPRITE_SCALE)
+                canvas_h = int(h * config.MAX_SPRITE_SCALE)
+                # Que el sprite quede en (100, 100) como en el modo original
+                self.setGeometry(100 - (canvas_w - w) // 2, 100 - (canvas_h - h), canvas_w, canvas_h)
+                self.mask_rect = self.sprite_rect()
+                self.setMask(QRegion(self.mask_rect))
+            else:
+                self.sprite_label.setPixmap(self.original_pixmap)
+                self.setGeometry(100, 100, self.original_pixmap.width(), self.original_pixmap.height())
+                self.sprite_label.setGeometry(0, 0, self.original_pixmap.width(), self.original_pixmap.height())
+            self.set_animation_state('idle')
+            print(f"✓ Sprite cargado ({idle_atlas.frame_count()} frames, {idle_atlas.load_ms:.1f} ms)")
         else:
             print(f"✗ No se encontró el sprite")
             self.setGeometry(100, 100, 200, 200)
@@ -435,11 +662,28 @@ class TetoCompanion(QWidget):
         QTimer.singleShot(500, self.show_startup_greeting)
 
     def show_startup_greeting(self):
-        """Muestra el saludo inicial con la hora"""
+        """Saludo inicial (lo genera la IA; si falla, el saludo fijo con la hora)"""
         greeting = self.get_time_greeting()
-        self.speech_bubble.show_message(f"¡Hola! {greeting}")
+        self.event_remark('greeting', config.PROACTIVE_TRIGGERS['greeting'], f"¡Hola! {greeting}", 30000)
+
+    def event_remark(self, trigger, prompt, fallback, duration):
+        """Comentario por un evento: la frase precalculada si hay, si no se le pide a la IA
+        con prioridad de evento (si falla se muestra `fallback`)"""
+        line = self.proactive.take(trigger) if self.proactive else None
+        if line is not None:
+            self.tts.play(line.audio)
+            self.show_event_message(line.text, duration)
+            return
+        # Los cancelados no vuelven por handle_ai_response/handle_ai_error
+        for stale in [r for r in self.event_requests if self.ai_worker.is_cancelled(r)]:
+            del self.event_requests[stale]
+        request_id = self.ai_worker.submit(prompt, self.conversation_history, priority=PRIORITY_EVENT)
+        self.event_requests[request_id] = (fallback, duration)
+
+    def show_event_message(self, text, duration):
+        self.speech_bubble.show_message(text)
         self.update_bubble_position()
-        QTimer.singleShot(30000, self.speech_bubble.hide_message)
+        QTimer.singleShot(duration, self.speech_bubble.hide_message)
             
     def mouseDoubleClickEvent(self, event):
         """Doble click para abrir/cerrar chat"""
@@ -447,6 +691,7 @@ class TetoCompanion(QWidget):
             self.toggle_chat()
             
     def mousePressEvent(self, event):
+        self.last_interaction = time.monotonic()
         if event.button() == Qt.LeftButton:
             self.dragging = True
             self.offset = event.pos()
@@ -459,7 +704,8 @@ class TetoCompanion(QWidget):
     def mouseMoveEvent(self, event):
         if self.dragging:
             curr_pos = event.globalPos()
-            self.move(curr_pos - self.offset)
+            # El movimiento real se aplica una vez por frame (flush_drag)
+            self.pending_move = curr_pos - self.offset
             
             # Detectar agitado
             if self.last_global_pos:
@@ -468,21 +714,34 @@ class TetoCompanion(QWidget):
                 self.shake_intensity += dist
             
             self.last_global_pos = curr_pos
-            
-            self.update_bubble_position()
-            self.update_chat_position()
+            self.frame_scheduler.request_frame()
             
     def mouseReleaseEvent(self, event):
         if event.button() == Qt.LeftButton:
             self.dragging = False
             self.last_global_pos = None
 
-    def update_physics(self):
-        """Actualiza el tamaño basado en el agitado"""
+    def flush_drag(self, dt_ms):
+        """Aplica el último movimiento de arrastre pendiente (uno por frame)"""
+        if self.pending_move is not None:
+            self.move(self.pending_move)
+            self.pending_move = None
+            self.update_bubble_position()
+            self.update_chat_position()
+        return False
+
+    def update_physics(self, dt_ms=33):
+        """Actualiza el tamaño basado en el agitado.
+        
+        Las constantes están pensadas para ticks de 33 ms; se escalan con dt_ms
+        para que el comportamiento no dependa del framerate. Devuelve True
+        mientras haya algo animándose.
+        """
+        ticks = dt_ms / 33.0
         
         # Si estamos en espera (teto gigante)
         if self.hold_timer > 0:
-            self.hold_timer -= 33
+            self.hold_timer -= dt_ms
             # Mantener intensidad al tope para que no se achique
             self.shake_intensity = 6000
             target_scale = 3.0
@@ -492,7 +751,7 @@ class TetoCompanion(QWidget):
                 
         else:
             # Decaer intensidad (un poco más lento para que sea más fácil mantener)
-            self.shake_intensity = max(0, self.shake_intensity * 0.95 - 10)
+            self.shake_intensity = max(0, self.shake_intensity * (0.95 ** ticks) - 10 * ticks)
             
             # Calcular escala objetivo (1.0 a 3.0)
             # Ahora es más sensible para llegar a x3
@@ -503,34 +762,110 @@ class TetoCompanion(QWidget):
                 target_scale = 3.0
                 self.hold_timer = 3000 # 3 segundos de espera
                 # Feedback visual opcional
-                self.speech_bubble.show_message("¡WAAAAH! 💢")
+                self.speech_bubble.show_message(self.proactive_line('shake', "¡WAAAAH! 💢"))
                 self.update_bubble_position()
                 QTimer.singleShot(2000, self.speech_bubble.hide_message)
         
         # Suavizar transición
-        if abs(target_scale - self.current_scale) > 0.001:
-            self.current_scale += (target_scale - self.current_scale) * 0.1
+        if abs(target_scale - self.current_scale) > 0.005:
+            self.current_scale += (target_scale - self.current_scale) * (1 - 0.9 ** ticks)
+            self.apply_scale()
+        elif self.current_scale != target_scale:
+            self.current_scale = target_scale
             self.apply_scale()
+        
+        # Seguir despiertos mientras haya agitado, espera o transición
+        return self.shake_intensity > 0 or self.hold_timer > 0 or self.current_scale != target_scale
             
     def apply_scale(self):
         """Aplica la escala actual al sprite y ventana"""
         if not self.original_pixmap:
             return
-            
-        new_w = int(self.original_pixmap.width() * self.current_scale)
-        new_h = int(self.original_pixmap.height() * self.current_scale)
         
-        if new_w != self.width() or new_h != self.height():
-            scaled_pixmap = self.original_pixmap.scaled(
-                new_w, new_h, Qt.KeepAspectRatio, Qt.SmoothTransformation
-            )
+        start = time.perf_counter()
+        # Pixmap cuantizado desde el cache (no re-escala en cada tick)
+        scaled_pixmap = self.scale_cache.get(self.original_pixmap, self.current_scale, key=self.sprite_key)
+        new_w = scaled_pixmap.width()
+        new_h = scaled_pixmap.height()
+        
+        if self.render_mode == 'canvas':
+            if scaled_pixmap is not self.current_pixmap:
+                self.current_pixmap = scaled_pixmap
+                # Solo el área del sprite recibe clicks; el resto del canvas los deja pasar.
+                # Cambiar la máscara también le cambia la forma a la ventana (el compositor la
+                # rehace): solo si cambió el rectángulo, no en cada frame de la animación
+                rect = self.sprite_rect()
+                if rect != self.mask_rect:
+                    self.mask_rect = rect
+                    self.setMask(QRegion(rect))
+                    self.window_reconfigs += 1
+                self.update()
+                # El panel de chat queda fijo (el sprite crece desde abajo); el globito
+                # solo se mueve si el desplazamiento se nota
+                self.update_bubble_position(force=False)
+        elif scaled_pixmap is not self.current_pixmap:
+            self.current_pixmap = scaled_pixmap
             self.sprite_label.setPixmap(scaled_pixmap)
-            self.sprite_label.resize(new_w, new_h)
-            self.resize(new_w, new_h)
-            
-            # Actualizar posiciones de elementos adjuntos inmediatamente
-            self.update_bubble_position()
-            self.update_chat_position()
+            if new_w != self.width() or new_h != self.height():
+                self.sprite_label.resize(new_w, new_h)
+                self.resize(new_w, new_h)
+                self.window_reconfigs += 1
+                
+                # Actualizar posiciones de elementos adjuntos inmediatamente
+                self.update_bubble_position()
+                self.update_chat_position()
+        
+        self.scale_times.append((time.perf_counter() - start) * 1000)
+        if len(self.scale_times) > 1000:
+            del self.scale_times[:500]
+    
+    def set_animation_state(self, state):
+        """Cambia la animación de Teto y libera los atlas que ya no se usan"""
+        atlas = self.animations.get(state)
+        if not atlas or not atlas.frame_count():
+            print(f"⚠ No hay frames para el estado '{state}'")
+            return
+        self.animation_engine.play('teto', Animation(atlas), self.on_sprite_frame)
+        self.animations.release_inactive(self.animation_engine.active_states())
+    
+    def on_sprite_frame(self, animation):
+        """Nuevo frame de la animación de Teto"""
+        self.original_pixmap = animation.current_frame()
+        self.sprite_key = animation.cache_key()
+        self.apply_scale()
+    
+    def sprite_rect(self):
+        """Rectángulo del sprite en coordenadas de la ventana"""
+        if self.render_mode != 'canvas' or not self.current_pixmap:
+            return self.rect()
+        w = self.current_pixmap.width()
+        h = self.current_pixmap.height()
+        # Anclado abajo al centro del canvas
+        return QRect((self.width() - w) // 2, self.height() - h, w, h)
+    
+    def paintEvent(self, event):
+        """En modo canvas dibuja el sprite con QPainter"""
+        if self.render_mode != 'canvas' or not self.current_pixmap:
+            return super().paintEvent(event)
+        painter = QPainter(self)
+        painter.translate(self.sprite_rect().topLeft())
+        painter.drawPixmap(0, 0, self.current_pixmap)
+        painter.end()
+    
+    def report_frame_times(self):
+        """Imprime el tiempo de frame de apply_scale y el estado del cache"""
+        print(f"📊 Frames: {self.frame_scheduler.wakeups} "
+              f"({self.frame_scheduler.wakeups_per_second():.2f}/s promedio) | "
+              f"modo {self.render_mode}: {self.window_reconfigs} reconfiguraciones de ventanas")
+        if not self.scale_times:
+            return
+        times = sorted(self.scale_times)
+        avg = sum(times) / len(times)
+        p95 = times[int(len(times) * 0.95) - 1] if len(times) >= 20 else times[-1]
+        stats = self.scale_cache.stats()
+        print(f"📊 apply_scale: prom {avg:.2f} ms, p95 {p95:.2f} ms ({len(times)} frames) | "
+              f"cache {stats['entries']} pixmaps, {stats['bytes'] // 1024} KB, "
+              f"hit rate {stats['hit_rate']:.0%}")
     
     def toggle_chat(self):
         """Abre/cierra el chat"""
@@ -549,9 +884,24 @@ class TetoCompanion(QWidget):
             # Mensaje de bienvenida
             if not self.conversation_history:
                 greeting = self.get_time_greeting()
-                self.speech_bubble.show_message(f"{greeting} ¿Qué querés?\nEscribí /help para ver comandos")
+                text = self.proactive_line('chat_open', f"{greeting} ¿Qué querés?")
+                self.speech_bubble.show_message(f"{text}\nEscribí /help para ver comandos")
                 self.update_bubble_position()
     
+    def proactive_line(self, trigger, fallback):
+        """Frase precalculada para `trigger` (y la dice al instante), o el texto fijo si no hay"""
+        line = self.proactive.take(trigger) if self.proactive else None
+        if line is None:
+            return fallback
+        self.tts.play(line.audio)
+        return line.text
+    
+    def is_idle(self):
+        """Rato libre: sin chat, sin voz, sin pedidos y sin tocar a Teto hace un rato"""
+        return (not self.chat_active and not self.is_recording and not self.dragging
+                and not self.ai_worker.is_busy() and not self.tts.is_speaking()
+                and time.monotonic() - self.last_interaction > config.PROACTIVE_IDLE_SECONDS)
+    
     def get_time_greeting(self):
         """Devuelve un saludo basado en la hora del día"""
         hour = datetime.now().hour
@@ -563,20 +913,26 @@ class TetoCompanion(QWidget):
         else:
             return "¡Buenas noches!"
     
-    def update_bubble_position(self):
+    def update_bubble_position(self, force=True):
         """Actualiza la posición del globito (arriba de Teto)"""
         if self.speech_bubble.isVisible():
-            bubble_x = self.x() + (self.width() // 2) - (self.speech_bubble.width() // 2)
-            bubble_y = self.y() - self.speech_bubble.height() - 15
+            rect = self.sprite_rect()
+            bubble_x = self.x() + rect.center().x() - (self.speech_bubble.width() // 2)
+            bubble_y = self.y() + rect.top() - self.speech_bubble.height() - 15
+            if not force and abs(bubble_y - self.speech_bubble.y()) < config.BUBBLE_SNAP_PX \
+                    and abs(bubble_x - self.speech_bubble.x()) < config.BUBBLE_SNAP_PX:
+                return
             self.speech_bubble.move(bubble_x, bubble_y)
+            self.window_reconfigs += 1
     
     def update_chat_position(self):
         """Actualiza la posición del panel de chat (debajo de Teto)"""
         if self.chat_panel.isVisible():
-            chat_x = self.x() + (self.width() // 2) - (self.chat_panel.width() // 2)
-            chat_y = self.y() + self.height() + 10
+            rect = self.sprite_rect()
+            chat_x = self.x() + rect.center().x() - (self.chat_panel.width() // 2)
+            chat_y = self.y() + rect.bottom() + 1 + 10
             self.chat_panel.move(chat_x, chat_y)
-    
+            self.window_reconfigs += 1
     
     def send_message(self):
         """Envía mensaje a Teto (Async)"""
@@ -585,54 +941,86 @@ class TetoCompanion(QWidget):
             return
         
         self.chat_panel.input_field.clear()
+        self.last_interaction = time.monotonic()
+        request_id = self.pending_request_id or tracer.new_request()
+        self.pending_request_id = None
         
         # Comandos especiales (síncronos)
         if message.startswith('/'):
             self.handle_command(message)
             return
 
-        # Deshabilitar UI
-        self.chat_panel.send_button.setEnabled(False)
-        self.chat_panel.input_field.setEnabled(False)
-        self.chat_panel.mic_button.setEnabled(False)
-        self.chat_panel.send_button.setText("...")
+        # Se viene una respuesta hablada: abrir la conexión de voz mientras la IA piensa
+        self.tts.prewarm()
         
-        # Mostrar que está pensando
+        # Mostrar que está pensando (el input queda habilitado para seguir escribiendo)
         self.speech_bubble.show_message("🤔 Pensando...")
         self.update_bubble_position()
         
-        # Agregar mensaje al historial
+        # Snapshot del historial ANTES de este mensaje (chat() lo agrega al final)
+        history = list(self.conversation_history)
         self.conversation_history.append({"role": "user", "content": message})
         
-        # Iniciar Worker
-        self.ai_worker = AIWorker(self.teto_ai, message, self.conversation_history)
-        self.ai_worker.finished.connect(self.handle_ai_response)
-        self.ai_worker.error.connect(self.handle_ai_error)
-        self.ai_worker.start()
+        # Encolar en el worker persistente (si se juntó con otro pedido, sigue esa traza)
+        request_id = self.ai_worker.submit(message, history, priority=PRIORITY_USER, request_id=request_id)
+        self.request_started.setdefault(request_id, time.perf_counter())
 
     def handle_command(self, command):
         """Maneja comandos slash"""
-        if command == '/help':
-            text = self.teto_ai.get_help()
-        elif command == '/memoria':
-            text = self.teto_ai.get_memory_summary()
-        elif command == '/olvidar':
-            text = self.teto_ai.clear_all_memory()
-            self.conversation_history = []
+        # Con el motor fuera de proceso estos van por RPC y pueden fallar
+        # (reiniciándose, caído o sin responder a tiempo)
+        engine_calls = {
+            '/help': self.teto_ai.get_help,
+            '/memoria': self.teto_ai.get_memory_summary,
+            '/olvidar': self.teto_ai.clear_all_memory,
+        }
+        if command in engine_calls:
+            try:
+                text = engine_calls[command]()
+            except Exception as e:
+                self.handle_ai_error(None, e)
+                return
+            if command == '/olvidar':
+                self.conversation_history = []
+                self.ai_worker.cancel_events()
+        elif command == '/stats':
+            text = tracer.format_stats()
+            # Con el motor fuera de proceso la fila vive en el otro proceso
+            admission = getattr(self.teto_ai, 'admission', None)
+            if admission is not None:
+                text += "\n" + admission.format_stats()
+                text += "\n" + self.teto_ai.router.format_stats()
+            if self.proactive:
+                s = self.proactive.stats()
+                text += f"\nFrases listas: {s['ready']} (usadas {s['hits']}, faltaron {s['misses']})"
+            if self.hotkeys:
+                text += "\n" + self.hotkeys.format_stats()
         else:
             text = "Comando desconocido"
             
         self.speech_bubble.show_message(text)
         self.update_bubble_position()
 
-    def handle_ai_response(self, response):
+    def handle_ai_response(self, request_id, response, priority):
         """Maneja respuesta exitosa de la IA"""
-        # UI Release
-        self.chat_panel.send_button.setEnabled(True)
-        self.chat_panel.input_field.setEnabled(True)
-        self.chat_panel.mic_button.setEnabled(True)
-        self.chat_panel.send_button.setText("Enviar")
-        self.chat_panel.input_field.setFocus()
+        started = self.request_started.pop(request_id, None)
+        event = self.event_requests.pop(request_id, None)
+        # Emitida justo antes de que un mensaje nuevo la cancelara
+        if self.ai_worker.is_cancelled(request_id):
+            return
+        
+        if priority != PRIORITY_USER:
+            # Comentario por un evento: se dice pero no entra al historial de la charla
+            fallback, duration = event or ("", 5000)
+            text = response or fallback
+            if text:
+                self.show_event_message(text, duration)
+                if response:
+                    self.tts.speak(response, blocking=False, request_id=request_id)
+            return
+        
+        if started is not None:
+            tracer.record('ui.reply_shown', started, time.perf_counter(), request_id)
         
         # Historial
         self.conversation_history.append({"role": "assistant", "content": response})
@@ -640,15 +1028,16 @@ class TetoCompanion(QWidget):
         # Mostrar y hablar
         self.speech_bubble.show_message(response)
         self.update_bubble_position()
-        self.tts.speak(response, blocking=False)
+        self.tts.speak(response, blocking=False, request_id=request_id)
         
-    def handle_ai_error(self, error):
+    def handle_ai_error(self, request_id, error):
         """Maneja error de la IA"""
-        self.chat_panel.send_button.setEnabled(True)
-        self.chat_panel.input_field.setEnabled(True)
-        self.chat_panel.mic_button.setEnabled(True)
-        self.chat_panel.send_button.setText("Enviar")
-        
+        self.request_started.pop(request_id, None)
+        event = self.event_requests.pop(request_id, None)
+        if event is not None:
+            # Un comentario que no salió: el texto fijo, sin mostrar el error
+            self.show_event_message(*event)
+            return
         self.speech_bubble.show_message(f"Error: {error}")
         self.update_bubble_position()
 
@@ -683,6 +1072,7 @@ class TetoCompanion(QWidget):
         self.send_message()
 
     def handle_voice_error(self, error):
+        self.pending_request_id = None
         self.chat_panel.input_field.setPlaceholderText("Escribile a Teto...")
         self.chat_panel.mic_button.setEnabled(True)
         self.chat_panel.mic_button.setStyleSheet("""
@@ -701,6 +1091,27 @@ class TetoCompanion(QWidget):
         """Al cerrar la ventana principal"""
         self.speech_bubble.close()
         self.chat_panel.close()
+        if self.proactive:
+            self.proactive.stop()
+        self.ai_worker.stop()
+        if self.engine:
+            self.engine.shutdown()
+        else:
+            self.tts.close()
+            ollama_client.close()
+        self.stt.close()
+        if self.hotkeys:
+            self.hotkeys.stop()
+            print(f"⌨ {self.hotkeys.format_stats()}")
+        self.capture.close()
+        self.process_watcher.stop()
+        self.report_frame_times()
+        self.export_traces()
+        if self.watchdog:
+            self.watchdog.stop()
+            print(self.watchdog.log_summary())
+        print(f"📊 Procesos: poll promedio {self.process_watcher.scanner.average_poll_ms():.2f} ms "
+              f"({self.process_watcher.scanner.backend.name})")
         
         # Cerrar Ollama si se usó (prioritario)
         if not self.teto_ai.use_gemini:
@@ -713,41 +1124,30 @@ class TetoCompanion(QWidget):
         
         event.accept()
 
-    def check_processes(self):
-        """Revisa procesos nuevos"""
+    def export_traces(self):
+        """Guarda las trazas de la sesión (JSONL + formato Chrome)"""
+        if not tracer.spans():
+            return
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        base = os.path.join(config.TRACE_DIR, f'trace-{stamp}')
         try:
-            # Obtener lista de procesos usando tasklist
-            output = subprocess.check_output('tasklist /FO CSV /NH', shell=True).decode('utf-8', errors='ignore')
-            current_processes = set()
-            
-            for line in output.splitlines():
-                if '"' in line:
-                    # El formato es "Image Name","PID",...
-                    proc_name = line.split('","')[0].replace('"', '').lower()
-                    current_processes.add(proc_name)
-            
-            # Detectar nuevos procesos (si no es la primera vez)
-            if self.known_processes:
-                new_procs = current_processes - self.known_processes
-                
-                for proc in new_procs:
-                    if proc in ['code.exe', 'chimera.exe', 'steam.exe', 'discord.exe']:
-                         print(f"👀 Teto vió que abriste: {proc}")
-
-                if 'code.exe' in new_procs:
-                    self.speech_bubble.show_message("¡Oh! ¿Vas a programar?\n¡Espero que no rompas nada!")
-                    self.update_bubble_position()
-                    QTimer.singleShot(5000, self.speech_bubble.hide_message)
-                
-                # Ejemplo extra: navegador
-                elif 'chrome.exe' in new_procs and 'chrome.exe' not in self.known_processes:
-                    # Chrome abre muchos procesos, evitar spam
-                    pass 
-                    
-            self.known_processes = current_processes
-            
-        except Exception as e:
-            print(f"Error monitoreando procesos: {e}")
+            tracer.export_jsonl(base + '.jsonl')
+            tracer.export_chrome(base + '.json')
+            print(f"📊 Trazas guardadas en {base}.jsonl / .json")
+        except OSError as e:
+            print(f"⚠ Error guardando trazas: {e}")
+        print(tracer.format_stats())
+
+    def handle_process_event(self, event, name, pid):
+        """Reacciona a procesos que arrancan/terminan según config.PROCESS_RULES"""
+        rule = self.process_rules.match(event, name)
+        if rule is None:
+            return
+        
+        print(f"👀 Teto vió que {'abriste' if event == 'start' else 'cerraste'}: {name}")
+        if rule.get('message'):
+            self.event_remark(f"app:{rule['process']}", config.PROACTIVE_APP_PROMPT.format(process=rule['process']),
+                              rule['message'], rule.get('duration', 5000))
 
 
 if __name__ == '__main__':
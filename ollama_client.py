@@ -0,0 +1,89 @@
+"""Clientes de Ollama compartidos, con pool de conexiones y timeouts.
+
+Las funciones sueltas del módulo ollama (ollama.chat, ollama.list) usan un
+cliente armado al importar, sin timeouts y con el host fijo. Acá hay un
+cliente por host, creado una vez y compartido por TetoAI, la calibración de
+ai_profiles y el servidor:
+
+- Conexiones keep-alive: los pedidos seguidos reusan la conexión TCP en vez
+  de abrir una nueva cada vez (OLLAMA_POOL_SIZE, OLLAMA_KEEPALIVE_EXPIRY).
+- Timeouts separados: conectar (OLLAMA_CONNECT_TIMEOUT, así un Ollama caído
+  falla enseguida), primer byte (OLLAMA_FIRST_BYTE_TIMEOUT, incluye cargar el
+  modelo; también es el máximo silencio entre fragmentos) y total
+  (OLLAMA_TOTAL_TIMEOUT, ver total_deadline).
+- Variante async (httpx.AsyncClient) para código asyncio, una por event loop:
+  cancelar la tarea corta el pedido aunque todavía no haya llegado nada.
+"""
+import asyncio
+import threading
+import time
+import weakref
+
+import httpx
+import ollama
+
+import config
+
+_lock = threading.Lock()
+_clients = {}                                  # host -> ollama.Client
+_async_clients = weakref.WeakKeyDictionary()   # event loop -> {host: ollama.AsyncClient}
+
+
+def timeouts():
+    return httpx.Timeout(connect=config.OLLAMA_CONNECT_TIMEOUT,
+                         read=config.OLLAMA_FIRST_BYTE_TIMEOUT,
+                         write=config.OLLAMA_CONNECT_TIMEOUT,
+                         pool=config.OLLAMA_FIRST_BYTE_TIMEOUT)
+
+
+def limits():
+    # Sin tope de conexiones (eso lo decide la admisión de TetoAI), solo de las que quedan abiertas
+    return httpx.Limits(max_connections=None,
+                        max_keepalive_connections=config.OLLAMA_POOL_SIZE,
+                        keepalive_expiry=config.OLLAMA_KEEPALIVE_EXPIRY)
+
+
+def get_client(host=None):
+    """Cliente compartido para `host` (None = config.OLLAMA_HOST, o la variable OLLAMA_HOST)"""
+    host = host or config.OLLAMA_HOST
+    with _lock:
+        client = _clients.get(host)
+        if client is None:
+            client = _clients[host] = ollama.Client(host=host, timeout=timeouts(), limits=limits())
+        return client
+
+
+def get_async_client(host=None):
+    """Cliente async compartido para `host` dentro del event loop actual"""
+    loop = asyncio.get_running_loop()
+    host = host or config.OLLAMA_HOST
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(host)
+        if client is None:
+            client = clients[host] = ollama.AsyncClient(host=host, timeout=timeouts(), limits=limits())
+        return client
+
+
+def total_deadline(deadline=None):
+    """El plazo que venga (ej. el de admisión) o OLLAMA_TOTAL_TIMEOUT desde ahora, el que llegue antes"""
+    if not config.OLLAMA_TOTAL_TIMEOUT:
+        return deadline
+    total = time.perf_counter() + config.OLLAMA_TOTAL_TIMEOUT
+    return total if deadline is None else min(deadline, total)
+
+
+def close():
+    """Cierra las conexiones de los clientes sync (al salir)"""
+    with _lock:
+        for client in _clients.values():
+            client._client.close()
+        _clients.clear()
+
+
+async def aclose():
+    """Cierra las conexiones de los clientes async del event loop actual (al apagar el servidor)"""
+    with _lock:
+        clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client._client.aclose()
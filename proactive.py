@@ -0,0 +1,231 @@
+"""Frases proactivas precalculadas en los ratos libres.
+
+Los comentarios que Teto dice sola (saludo al arrancar, al abrir el chat, al
+abrir un programa, al agitarla) no pueden esperar a la IA: tienen que salir
+en el momento. Este módulo los genera de antemano mientras el usuario no está
+chateando, usando la memoria para personalizarlos, y sintetiza el audio.
+
+Cada disparador tiene una pila de frases por momento del día. Una frase
+guarda la huella de la memoria con la que se generó: si Teto recuerda u
+olvida algo, las frases viejas dejan de usarse y se regeneran. Las frases se
+guardan en disco (PROACTIVE_CACHE_DIR), así el saludo del próximo arranque
+ya está listo.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+
+from ai_service import BUSY_REPLY, ERROR_REPLY
+from tracing import tracer
+
+
+class Preempted(Exception):
+    """El usuario volvió a interactuar: se corta la generación en curso"""
+
+
+def day_period(hour=None):
+    hour = datetime.now().hour if hour is None else hour
+    if 6 <= hour < 12:
+        return "mañana"
+    if 12 <= hour < 20:
+        return "tarde"
+    return "noche"
+
+
+class ProactiveLine:
+    __slots__ = ('line_id', 'text', 'audio', 'memory', 'created_at')
+
+    def __init__(self, text, audio, memory, line_id=None, created_at=None):
+        self.line_id = line_id or uuid.uuid4().hex[:12]
+        self.text = text
+        self.audio = audio
+        self.memory = memory
+        self.created_at = created_at or time.time()
+
+
+class ProactiveLines:
+    """Pilas de frases por disparador, rellenadas en segundo plano con presupuesto"""
+    def __init__(self, teto_ai, tts, triggers, cache_dir, pool_size=2, max_per_hour=24,
+                 check_interval=30.0, is_idle=None):
+        self.teto_ai = teto_ai
+        self.tts = tts
+        self.triggers = dict(triggers)   # nombre -> instrucción para la IA
+        self.cache_dir = cache_dir
+        self.pool_size = pool_size
+        self.max_per_hour = max_per_hour
+        self.check_interval = check_interval
+        self.is_idle = is_idle or (lambda: True)
+
+        self._lock = threading.Lock()
+        self._pools = {}               # (disparador, momento) -> lista de ProactiveLine
+        self._generated = deque()      # horarios de generación (presupuesto por hora)
+        self._stop = threading.Event()
+        self._thread = None
+        self.hits = 0
+        self.misses = 0
+        self.load()
+
+    # --- Uso desde el UI ---
+
+    def take(self, trigger):
+        """Saca una frase lista para `trigger` (o None si no hay una vigente)"""
+        key = (trigger, day_period())
+        memory = self.teto_ai.memory.fingerprint()
+        taken = None
+        with self._lock:
+            pool = self._pools.get(key, [])
+            # Se llama desde el hilo de Qt: el disco se toca solo si la pila cambió
+            changed = bool(pool)
+            while pool:
+                line = pool.pop(0)
+                self._delete_audio(line)
+                if line.memory == memory:
+                    taken = line
+                    break
+            if taken is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            if changed:
+                self._save_index()
+        return taken
+
+    # --- Generación en segundo plano ---
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='ProactiveLines', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(2.0)
+
+    def _run(self):
+        while not self._stop.wait(self.check_interval):
+            if not self.is_idle() or not self._within_budget():
+                continue
+            trigger = self._next_trigger()
+            if trigger is None:
+                continue
+            try:
+                self._generate(trigger)
+            except Preempted:
+                pass
+            except Exception as e:
+                print(f"⚠ Error precalculando frase ({trigger}): {e}")
+
+    def _within_budget(self):
+        now = time.monotonic()
+        while self._generated and now - self._generated[0] > 3600:
+            self._generated.popleft()
+        return len(self._generated) < self.max_per_hour
+
+    def _next_trigger(self):
+        """El disparador con menos frases vigentes para este momento del día"""
+        period = day_period()
+        memory = self.teto_ai.memory.fingerprint()
+        with self._lock:
+            # Fuera lo que ya no sirve (otra memoria u otro momento del día)
+            for key, pool in list(self._pools.items()):
+                fresh = [line for line in pool if line.memory == memory and key[1] == period]
+                for line in pool:
+                    if line not in fresh:
+                        self._delete_audio(line)
+                self._pools[key] = fresh
+            counts = {trigger: len(self._pools.get((trigger, period), [])) for trigger in self.triggers}
+        trigger, count = min(counts.items(), key=lambda item: item[1], default=(None, 0))
+        return trigger if trigger is not None and count < self.pool_size else None
+
+    def _generate(self, trigger):
+        period = day_period()
+        memory = self.teto_ai.memory.fingerprint()
+        self._generated.append(time.monotonic())
+
+        def check_idle(piece):
+            if not self.is_idle():
+                raise Preempted("el usuario volvió a interactuar")
+
+        with tracer.span('proactive.generate', trigger=trigger):
+            text = self.teto_ai.chat(
+                self.triggers[trigger],
+                context=f"Es de {period}. Respondé con una sola frase corta, como si se te ocurriera "
+                        f"a vos en el momento, sin comillas.",
+                on_token=check_idle, caller='proactive', remember=False)
+        text = text.strip().strip('"')
+        if not text or text in (BUSY_REPLY, ERROR_REPLY) or not self.is_idle():
+            return
+
+        with tracer.span('proactive.synthesize', trigger=trigger):
+            audio = asyncio.run(self.tts.synthesize(text))
+
+        line = ProactiveLine(text, audio, memory)
+        with self._lock:
+            self._pools.setdefault((trigger, period), []).append(line)
+            self._write_audio(line)
+            self._save_index()
+
+    # --- Disco ---
+
+    def _audio_path(self, line):
+        return os.path.join(self.cache_dir, f'{line.line_id}.mp3')
+
+    def _write_audio(self, line):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self._audio_path(line), 'wb') as f:
+                f.write(line.audio)
+        except OSError as e:
+            print(f"⚠ No pude guardar el audio precalculado: {e}")
+
+    def _delete_audio(self, line):
+        try:
+            os.remove(self._audio_path(line))
+        except OSError:
+            pass
+
+    def _save_index(self):
+        index = [
+            {'id': line.line_id, 'trigger': trigger, 'period': period, 'text': line.text,
+             'memory': line.memory, 'created_at': line.created_at}
+            for (trigger, period), pool in self._pools.items() for line in pool
+        ]
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(os.path.join(self.cache_dir, 'index.json'), 'w', encoding='utf-8') as f:
+                json.dump(index, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            print(f"⚠ No pude guardar las frases precalculadas: {e}")
+
+    def load(self):
+        """Recupera las frases de la sesión anterior (las de otra memoria se descartan al usarlas)"""
+        try:
+            with open(os.path.join(self.cache_dir, 'index.json'), 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return
+        for entry in index:
+            if entry['trigger'] not in self.triggers:
+                continue
+            line = ProactiveLine(entry['text'], None, entry['memory'], entry['id'], entry['created_at'])
+            try:
+                with open(self._audio_path(line), 'rb') as f:
+                    line.audio = f.read()
+            except OSError:
+                continue
+            self._pools.setdefault((entry['trigger'], entry['period']), []).append(line)
+        loaded = sum(len(pool) for pool in self._pools.values())
+        if loaded:
+            print(f"✓ Frases precalculadas: {loaded}")
+
+    def stats(self):
+        with self._lock:
+            ready = sum(len(pool) for pool in self._pools.values())
+        return {'ready': ready, 'hits': self.hits, 'misses': self.misses,
+                'generated_last_hour': len(self._generated)}
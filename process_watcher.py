@@ -0,0 +1,225 @@
+import os
+import subprocess
+import sys
+import time
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+
+def normalize_name(name):
+    """Nombre comparable entre plataformas: minúsculas y sin .exe"""
+    name = name.strip().lower()
+    if name.endswith('.exe'):
+        name = name[:-4]
+    return name
+
+
+class ProcBackend:
+    """Lee /proc directamente (Linux). Solo abre /proc/<pid>/comm de PIDs nuevos o recientes."""
+    name = 'proc'
+
+    def pids(self):
+        return {int(entry.name) for entry in os.scandir('/proc') if entry.name.isdigit()}
+
+    def process_name(self, pid):
+        try:
+            with open(f'/proc/{pid}/comm', 'r', encoding='utf-8', errors='ignore') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+
+class PsutilBackend:
+    """psutil (multiplataforma)"""
+    name = 'psutil'
+
+    def pids(self):
+        return set(psutil.pids())
+
+    def process_name(self, pid):
+        try:
+            return psutil.Process(pid).name()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+
+
+class TasklistBackend:
+    """Fallback para Windows sin psutil: un tasklist por poll, sin shell"""
+    name = 'tasklist'
+
+    def __init__(self):
+        self._names = {}
+
+    def pids(self):
+        output = subprocess.run(
+            ['tasklist', '/FO', 'CSV', '/NH'],
+            capture_output=True,
+            creationflags=subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+        ).stdout.decode('utf-8', errors='ignore')
+        self._names = {}
+        for line in output.splitlines():
+            # El formato es "Image Name","PID",...
+            parts = line.split('","')
+            if len(parts) > 1:
+                try:
+                    self._names[int(parts[1].strip('"'))] = parts[0].strip('"')
+                except ValueError:
+                    pass
+        return set(self._names)
+
+    def process_name(self, pid):
+        return self._names.get(pid)
+
+
+def detect_backend():
+    """Elige el backend más barato disponible"""
+    if sys.platform.startswith('linux') and os.path.isdir('/proc'):
+        return ProcBackend()
+    if PSUTIL_AVAILABLE:
+        return PsutilBackend()
+    return TasklistBackend()
+
+
+class ProcessScanner:
+    """Detecta procesos que arrancan o terminan, comparando PIDs entre polls.
+
+    Los eventos son por nombre: 'start' cuando aparece la primera instancia de
+    un programa y 'exit' cuando termina la última (Chrome con 30 procesos
+    genera un solo evento).
+
+    Un PID leído entre fork y exec todavía tiene el nombre del padre (ej.
+    "python" o "sh"): el nombre de los PIDs nuevos se vuelve a leer en los
+    RECHECK_POLLS polls siguientes y, si cambió, cuenta como el programa nuevo.
+    """
+    RECHECK_POLLS = 2
+
+    def __init__(self, backend=None):
+        self.backend = backend or detect_backend()
+        self.known = {}   # pid -> nombre normalizado
+        self.counts = {}  # nombre -> cantidad de instancias
+        self.recent = {}  # pid -> polls que faltan para dejar de releer el nombre
+        self.primed = False
+        self.polls = 0
+        self.total_poll_ms = 0.0
+        self.last_poll_ms = 0.0
+
+    def poll(self):
+        """Devuelve una lista de eventos (evento, nombre, pid)"""
+        start = time.perf_counter()
+        current = self.backend.pids()
+        events = []
+
+        for pid in self.known.keys() - current:
+            self._remove(pid, events)
+
+        # PIDs recientes: si hicieron exec desde el poll anterior, cambian de nombre
+        for pid, left in list(self.recent.items()):
+            if left <= 1:
+                del self.recent[pid]
+            else:
+                self.recent[pid] = left - 1
+            if pid not in self.known:
+                continue
+            raw_name = self.backend.process_name(pid)
+            if raw_name and normalize_name(raw_name) != self.known[pid]:
+                self._remove(pid, events)
+                self._add(pid, normalize_name(raw_name), events)
+
+        for pid in current - self.known.keys():
+            raw_name = self.backend.process_name(pid)
+            if not raw_name:
+                continue
+            self._add(pid, normalize_name(raw_name), events)
+            if self.primed:
+                self.recent[pid] = self.RECHECK_POLLS
+
+        # El primer poll solo arma la línea base
+        if not self.primed:
+            self.primed = True
+            events = []
+
+        self.last_poll_ms = (time.perf_counter() - start) * 1000
+        self.total_poll_ms += self.last_poll_ms
+        self.polls += 1
+        return events
+
+    def _add(self, pid, name, events):
+        self.known[pid] = name
+        self.counts[name] = self.counts.get(name, 0) + 1
+        if self.counts[name] == 1:
+            events.append(('start', name, pid))
+
+    def _remove(self, pid, events):
+        name = self.known.pop(pid)
+        self.recent.pop(pid, None)
+        self.counts[name] -= 1
+        if self.counts[name] <= 0:
+            del self.counts[name]
+            events.append(('exit', name, pid))
+
+    def average_poll_ms(self):
+        return self.total_poll_ms / self.polls if self.polls else 0.0
+
+
+class ProcessRules:
+    """Tabla declarativa proceso -> reacción, con cooldown por regla"""
+    def __init__(self, rules):
+        self.rules = {}
+        for rule in rules:
+            key = (normalize_name(rule['process']), rule.get('on', 'start'))
+            self.rules[key] = rule
+        self._last_fired = {}
+
+    def match(self, event, name, now=None):
+        """Devuelve la regla a disparar (o None si no hay o está en cooldown)"""
+        rule = self.rules.get((name, event))
+        if rule is None:
+            return None
+        now = time.monotonic() if now is None else now
+        last = self._last_fired.get((name, event))
+        if last is not None and now - last < rule.get('cooldown', 0):
+            return None
+        self._last_fired[(name, event)] = now
+        return rule
+
+
+# Test rápido (Linux: lanza un proceso sintético y verifica los eventos)
+if __name__ == "__main__":
+    print("=== Test de ProcessScanner ===\n")
+
+    scanner = ProcessScanner()
+    print(f"Backend: {scanner.backend.name}")
+    scanner.poll()
+    print(f"Línea base: {len(scanner.known)} procesos ({scanner.last_poll_ms:.2f} ms)")
+
+    rules = ProcessRules([{'process': 'sleep', 'on': 'start', 'message': '¿Durmiendo?', 'cooldown': 60}])
+    proc = subprocess.Popen(['sleep', '30'])
+    # El primer poll puede agarrarlo antes del exec (todavía "python"): el siguiente lo corrige
+    events = scanner.poll()
+    time.sleep(0.05)
+    events += scanner.poll()
+    print(f"Eventos al lanzar sleep: {events}")
+    for event, name, pid in events:
+        rule = rules.match(event, name)
+        if rule:
+            print(f"  -> Regla disparada: {rule['message']}")
+    assert ('start', 'sleep', proc.pid) in events
+
+    # Un segundo 'sleep' no genera evento y la regla respeta el cooldown
+    proc2 = subprocess.Popen(['sleep', '30'])
+    assert scanner.poll() == []
+    assert rules.match('start', 'sleep') is None
+
+    proc.kill(); proc.wait()
+    proc2.kill(); proc2.wait()
+    events = scanner.poll()
+    print(f"Eventos al terminar: {events}")
+    assert any(e[0] == 'exit' and e[1] == 'sleep' for e in events)
+
+    for _ in range(20):
+        scanner.poll()
+    print(f"\n✓ Test completado (poll promedio: {scanner.average_poll_ms():.2f} ms)")
@@ -0,0 +1,384 @@
+"""Servidor headless de Teto: chat (streaming), memoria y TTS por HTTP/WebSocket.
+
+Todas las sesiones comparten un único TetoAI (un solo modelo cargado) y un
+único TetoTTS, pero cada una tiene su propio historial y su propia memoria
+(sessions/<id>.json) en vez del teto_memory.json global.
+
+Uso:
+    python server.py [--host 127.0.0.1] [--port 8765] [--gemini-key KEY]
+
+Endpoints:
+    POST   /sessions                 -> {"session_id": ...}
+    DELETE /sessions/{id}
+    POST   /sessions/{id}/chat       {"message": ...} -> NDJSON: {"token": ...} ... {"done": true, "reply": ...}
+    GET    /sessions/{id}/memory     -> {"keywords": {...}, "summary": ...}
+    DELETE /sessions/{id}/memory
+    GET    /sessions/{id}/ws         WebSocket: {"type": "chat"|"memory"|"forget"|"tts", ...}
+    POST   /tts                      {"text": ..., "voice": ...} -> audio/mpeg
+    GET    /health
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from aiohttp import web, WSMsgType
+
+import config
+import ollama_client
+from ai_service import TetoAI, TetoMemory
+from tts_service import TetoTTS
+
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+TOKEN_QUEUE_SIZE = 64
+SEND_TIMEOUT = 60.0   # Sin AI_REQUEST_TIMEOUT: lo máximo que se espera a un cliente que no lee
+
+
+class SessionBusy(Exception):
+    """La sesión ya tiene el máximo de pedidos en curso"""
+
+
+class ChatCancelled(Exception):
+    """El cliente se desconectó en medio de una respuesta"""
+
+
+class Session:
+    """Estado de una sesión: historial en RAM y memoria en su propio archivo.
+
+    Una sesión inactiva ocupa solo este objeto (sin hilos ni tareas), y la
+    memoria se carga recién cuando hace falta.
+    """
+    __slots__ = ('session_id', 'memory_file', 'history', 'pending', 'last_used', '_memory')
+
+    def __init__(self, session_id, memory_file):
+        self.session_id = session_id
+        self.memory_file = memory_file
+        self.history = []
+        self.pending = 0
+        self.last_used = time.monotonic()
+        self._memory = None
+
+    @property
+    def memory(self):
+        if self._memory is None:
+            self._memory = TetoMemory(self.memory_file)
+        return self._memory
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+
+async def read_json(request):
+    """Cuerpo JSON del pedido (un objeto); 400 si no lo es"""
+    try:
+        body = await request.json()
+    except ValueError:
+        raise web.HTTPBadRequest(text='JSON inválido')
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text='se esperaba un objeto JSON')
+    return body
+
+
+class CompanionServer:
+    def __init__(self, teto_ai, tts, sessions_dir, workers=4, max_pending=2,
+                 session_ttl=1800, history_limit=50):
+        self.teto_ai = teto_ai
+        self.tts = tts
+        self.sessions_dir = sessions_dir
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='teto-chat')
+        self.max_pending = max_pending
+        self.session_ttl = session_ttl
+        self.history_limit = history_limit
+        self.sessions = {}
+        self.issued = set()   # ids entregados por POST /sessions (siguen valiendo después de salir de RAM)
+        os.makedirs(sessions_dir, exist_ok=True)
+
+    # --- Sesiones ---
+
+    def get_session(self, session_id, create=False):
+        if not SESSION_ID_PATTERN.match(session_id):
+            raise web.HTTPBadRequest(text='session_id inválido')
+        session = self.sessions.get(session_id)
+        if session is None:
+            memory_file = os.path.join(self.sessions_dir, f'{session_id}.json')
+            # Una sesión que salió de RAM se recupera (con la memoria guardada, si tiene)
+            if not create and session_id not in self.issued and not os.path.exists(memory_file):
+                raise web.HTTPNotFound(text='sesión inexistente')
+            session = self.sessions[session_id] = Session(session_id, memory_file)
+        session.touch()
+        return session
+
+    async def evict_idle(self):
+        """Saca de RAM las sesiones sin uso (la memoria queda en disco)"""
+        while True:
+            await asyncio.sleep(60)
+            now = time.monotonic()
+            for session_id, session in list(self.sessions.items()):
+                if session.pending == 0 and now - session.last_used > self.session_ttl:
+                    del self.sessions[session_id]
+
+    # --- Chat ---
+
+    async def chat(self, session, message, send_token):
+        """Corre el chat en un hilo y va mandando los fragmentos con send_token.
+
+        La cola de fragmentos es acotada: si el cliente lee lento, el hilo de
+        generación espera (backpressure por sesión).
+        """
+        if session.pending >= self.max_pending:
+            raise SessionBusy()
+        session.pending += 1
+        # Lo más probable es que después pidan la voz de la respuesta
+        self.tts.prewarm()
+        loop = asyncio.get_running_loop()
+        tokens = asyncio.Queue(maxsize=TOKEN_QUEUE_SIZE)
+        cancelled = threading.Event()
+        # Un cliente que deja de leer no puede retener el hilo (ni el turno de admisión) más que el plazo
+        deadline = time.monotonic() + (config.AI_REQUEST_TIMEOUT or SEND_TIMEOUT)
+
+        def on_token(piece):
+            if cancelled.is_set():
+                raise ChatCancelled()
+            put = asyncio.run_coroutine_threadsafe(tokens.put(piece), loop)
+            try:
+                put.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FutureTimeout:
+                put.cancel()
+                cancelled.set()
+                raise ChatCancelled()
+
+        try:
+            history = list(session.history)
+            future = loop.run_in_executor(self.executor, functools.partial(
+                self.teto_ai.chat, message, conversation_history=history,
+                on_token=on_token, memory=session.memory, caller=session.session_id,
+                cancel=cancelled))
+            try:
+                while True:
+                    getter = asyncio.ensure_future(tokens.get())
+                    done, _ = await asyncio.wait({getter, future}, return_when=asyncio.FIRST_COMPLETED)
+                    # Pasado el plazo no se le manda nada más (lo que queda en la cola se descarta)
+                    if getter in done and not cancelled.is_set():
+                        await send_token(getter.result())
+                        continue
+                    getter.cancel()
+                    break
+                while not tokens.empty() and not cancelled.is_set():
+                    await send_token(tokens.get_nowait())
+            except BaseException:
+                # Cliente caído: cortar la generación y destrabar al hilo
+                cancelled.set()
+                while not tokens.empty():
+                    tokens.get_nowait()
+                raise
+
+            try:
+                reply = await future
+            except ChatCancelled:
+                cancelled.set()
+            if cancelled.is_set():
+                # Cortada por el plazo: lo que haya vuelto ("" o a medias) no va al historial
+                raise ConnectionResetError("el cliente dejó de leer la respuesta")
+            session.history += [{"role": "user", "content": message},
+                                {"role": "assistant", "content": reply}]
+            del session.history[:-self.history_limit]
+            return reply
+        finally:
+            session.pending -= 1
+            session.touch()
+
+    # --- HTTP ---
+
+    async def handle_create_session(self, request):
+        session_id = uuid.uuid4().hex
+        self.get_session(session_id, create=True)
+        self.issued.add(session_id)
+        return web.json_response({'session_id': session_id}, status=201)
+
+    async def handle_delete_session(self, request):
+        session = self.get_session(request.match_info['session_id'])
+        if session.pending:
+            # Un chat en curso volvería a guardar la memoria después de borrarla
+            raise web.HTTPConflict(text='la sesión tiene pedidos en curso')
+        self.sessions.pop(session.session_id, None)
+        self.issued.discard(session.session_id)
+        # Sin el archivo, get_session ya no la recupera
+        try:
+            os.remove(session.memory_file)
+        except FileNotFoundError:
+            pass
+        return web.json_response({'deleted': session.session_id})
+
+    async def handle_chat(self, request):
+        session = self.get_session(request.match_info['session_id'])
+        body = await read_json(request)
+        message = (body.get('message') or '').strip()
+        if not message:
+            raise web.HTTPBadRequest(text='falta "message"')
+
+        response = web.StreamResponse(headers={'Content-Type': 'application/x-ndjson'})
+        started = False
+
+        async def send_token(piece):
+            nonlocal started
+            if not started:
+                await response.prepare(request)
+                started = True
+            await response.write((json.dumps({'token': piece}, ensure_ascii=False) + '\n').encode('utf-8'))
+
+        try:
+            reply = await self.chat(session, message, send_token)
+        except SessionBusy:
+            raise web.HTTPTooManyRequests(text='la sesión tiene pedidos en curso')
+        except ConnectionResetError:
+            # El cliente cortó: la generación ya se canceló en chat()
+            return response
+        if not started:
+            await response.prepare(request)
+        await response.write((json.dumps({'done': True, 'reply': reply}, ensure_ascii=False) + '\n').encode('utf-8'))
+        await response.write_eof()
+        return response
+
+    async def handle_get_memory(self, request):
+        session = self.get_session(request.match_info['session_id'])
+        return web.json_response({'keywords': session.memory.keywords,
+                                  'summary': session.memory.get_summary()})
+
+    async def handle_clear_memory(self, request):
+        session = self.get_session(request.match_info['session_id'])
+        result = session.memory.clear()
+        session.history = []
+        return web.json_response({'result': result})
+
+    async def handle_tts(self, request):
+        body = await read_json(request)
+        text = (body.get('text') or '').strip()
+        if not text:
+            raise web.HTTPBadRequest(text='falta "text"')
+        audio = await self.tts.synthesize(text, body.get('voice'))
+        return web.Response(body=audio, content_type='audio/mpeg')
+
+    async def handle_health(self, request):
+        return web.json_response({
+            'sessions': len(self.sessions),
+            'busy_sessions': sum(1 for s in self.sessions.values() if s.pending),
+            'admission': self.teto_ai.admission.stats(),
+            'backends': self.teto_ai.router.stats(),
+            'ollama_models': await self.ollama_models(),
+        })
+
+    async def ollama_models(self):
+        """Modelos cargados en Ollama (None si no responde), sin bloquear el loop"""
+        if 'ollama' not in self.teto_ai.router.names:
+            return None
+        try:
+            running = await self.teto_ai.ollama_async().ps()
+        except Exception:
+            return None
+        return [m.model for m in running.models]
+
+    # --- WebSocket ---
+
+    async def handle_ws(self, request):
+        """Un mensaje a la vez por conexión: el siguiente no se lee hasta terminar el actual"""
+        # Las sesiones se crean con POST /sessions, como para el chat por HTTP
+        session = self.get_session(request.match_info['session_id'])
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            try:
+                data = json.loads(msg.data)
+            except ValueError:
+                data = None
+            if not isinstance(data, dict):
+                await ws.send_json({'type': 'error', 'error': 'JSON inválido'})
+                continue
+
+            kind = data.get('type')
+            if kind == 'chat':
+                message = (data.get('message') or '').strip()
+                if not message:
+                    await ws.send_json({'type': 'error', 'error': 'falta "message"'})
+                    continue
+
+                async def send_token(piece):
+                    await ws.send_json({'type': 'token', 'text': piece})
+                try:
+                    reply = await self.chat(session, message, send_token)
+                    await ws.send_json({'type': 'done', 'reply': reply})
+                except SessionBusy:
+                    await ws.send_json({'type': 'error', 'error': 'busy'})
+                except ConnectionResetError:
+                    break
+            elif kind == 'memory':
+                await ws.send_json({'type': 'memory', 'keywords': session.memory.keywords,
+                                    'summary': session.memory.get_summary()})
+            elif kind == 'forget':
+                result = session.memory.clear()
+                session.history = []
+                await ws.send_json({'type': 'forget', 'result': result})
+            elif kind == 'tts':
+                await ws.send_bytes(await self.tts.synthesize(data.get('text', ''), data.get('voice')))
+            else:
+                await ws.send_json({'type': 'error', 'error': f'tipo desconocido: {kind}'})
+        return ws
+
+    def make_app(self):
+        app = web.Application()
+        app.add_routes([
+            web.post('/sessions', self.handle_create_session),
+            web.delete('/sessions/{session_id}', self.handle_delete_session),
+            web.post('/sessions/{session_id}/chat', self.handle_chat),
+            web.get('/sessions/{session_id}/memory', self.handle_get_memory),
+            web.delete('/sessions/{session_id}/memory', self.handle_clear_memory),
+            web.get('/sessions/{session_id}/ws', self.handle_ws),
+            web.post('/tts', self.handle_tts),
+            web.get('/health', self.handle_health),
+        ])
+
+        async def start_background(app):
+            app['evict_task'] = asyncio.create_task(self.evict_idle())
+
+        async def stop_background(app):
+            app['evict_task'].cancel()
+            self.executor.shutdown(wait=False)
+            self.tts.close()
+            await ollama_client.aclose()
+            ollama_client.close()
+
+        app.on_startup.append(start_background)
+        app.on_cleanup.append(stop_background)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor headless de Teto")
+    parser.add_argument('--host', default=config.SERVER_HOST)
+    parser.add_argument('--port', type=int, default=config.SERVER_PORT)
+    parser.add_argument('--gemini-key', default=None)
+    args = parser.parse_args()
+
+    teto_ai = TetoAI(use_gemini=bool(args.gemini_key), gemini_key=args.gemini_key,
+                     memory_file=os.path.join(config.SERVER_SESSIONS_DIR, '_default.json'))
+    tts = TetoTTS(playback=False)
+
+    server = CompanionServer(teto_ai, tts, config.SERVER_SESSIONS_DIR,
+                             workers=config.SERVER_WORKERS,
+                             max_pending=config.SERVER_MAX_PENDING_PER_SESSION,
+                             session_ttl=config.SERVER_SESSION_TTL,
+                             history_limit=config.SERVER_HISTORY_LIMIT)
+    print(f"✓ Servidor de Teto en http://{args.host}:{args.port}")
+    web.run_app(server.make_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
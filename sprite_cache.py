@@ -0,0 +1,83 @@
+from collections import OrderedDict
+from PyQt5.QtCore import Qt
+
+
+class ScaledPixmapCache:
+    """Cache de versiones escaladas del sprite.
+
+    La escala se cuantiza en pasos fijos (escalera de escalas), así que crecer y
+    achicarse reusan los mismos pixmaps. Se expulsan los menos usados cuando se
+    pasa el presupuesto de memoria.
+    """
+    def __init__(self, min_scale=1.0, max_scale=3.0, step=0.05, budget_bytes=16 * 1024 * 1024):
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.step = step
+        self.budget_bytes = budget_bytes
+        self._cache = OrderedDict()  # (key, paso) -> QPixmap
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def quantize(self, scale):
+        """Devuelve el índice de paso más cercano a la escala pedida"""
+        scale = max(self.min_scale, min(scale, self.max_scale))
+        return int(round((scale - self.min_scale) / self.step))
+
+    def step_scale(self, step_index):
+        """Escala real correspondiente a un paso"""
+        return self.min_scale + step_index * self.step
+
+    def get(self, pixmap, scale, key=None):
+        """Devuelve el pixmap escalado (cuantizado) desde el cache"""
+        step_index = self.quantize(scale)
+        cache_key = (key if key is not None else pixmap.cacheKey(), step_index)
+
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._cache.move_to_end(cache_key)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        step_scale = self.step_scale(step_index)
+        if step_index == 0 and step_scale == 1.0:
+            scaled = pixmap
+        else:
+            scaled = pixmap.scaled(
+                int(pixmap.width() * step_scale), int(pixmap.height() * step_scale),
+                Qt.KeepAspectRatio, Qt.SmoothTransformation
+            )
+        self._store(cache_key, scaled)
+        return scaled
+
+    def prewarm(self, pixmap, key=None):
+        """Precalcula toda la escalera de escalas (si entra en el presupuesto)"""
+        steps = self.quantize(self.max_scale) + 1
+        for step_index in range(steps):
+            self.get(pixmap, self.step_scale(step_index), key)
+
+    def clear(self):
+        self._cache.clear()
+        self._bytes = 0
+
+    def stats(self):
+        """Estadísticas del cache para mostrar/loguear"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._cache),
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+    def _store(self, cache_key, pixmap):
+        size = pixmap.width() * pixmap.height() * 4  # ARGB32
+        if size > self.budget_bytes:
+            return
+        self._cache[cache_key] = pixmap
+        self._bytes += size
+        while self._bytes > self.budget_bytes and self._cache:
+            _, old = self._cache.popitem(last=False)
+            self._bytes -= old.width() * old.height() * 4
@@ -0,0 +1,195 @@
+import logging
+import math
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+# Límites superiores (ms) de los buckets del histograma
+HISTOGRAM_BUCKETS = (8, 16, 33, 50, 100, 250, 500, 1000, float('inf'))
+
+
+class Histogram:
+    """Histograma de tiempos en ms con buckets fijos"""
+    def __init__(self, buckets=HISTOGRAM_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.n = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.max = 0.0
+
+    def add(self, value_ms):
+        for i, limit in enumerate(self.buckets):
+            if value_ms <= limit:
+                self.counts[i] += 1
+                break
+        self.n += 1
+        self.total += value_ms
+        self.total_sq += value_ms * value_ms
+        self.max = max(self.max, value_ms)
+
+    def mean(self):
+        return self.total / self.n if self.n else 0.0
+
+    def stddev(self):
+        if self.n < 2:
+            return 0.0
+        mean = self.mean()
+        return math.sqrt(max(0.0, self.total_sq / self.n - mean * mean))
+
+    def format(self):
+        lines = []
+        previous = 0
+        for limit, count in zip(self.buckets, self.counts):
+            label = f"{previous}-{limit} ms" if limit != float('inf') else f">{previous} ms"
+            bar = '█' * min(40, int(40 * count / self.n)) if self.n else ''
+            lines.append(f"  {label:>12}: {count:>6} {bar}")
+            previous = limit
+        return "\n".join(lines)
+
+
+class StallWatchdog:
+    """Detecta bloqueos del event loop de Qt.
+
+    El hilo de Qt llama a beat() periódicamente (un QTimer). Un hilo aparte
+    revisa cuánto pasó desde el último latido; si supera el umbral, captura el
+    stack del hilo principal en ese momento (mientras sigue bloqueado). Cuando
+    el latido vuelve, se registra la duración total del bloqueo.
+    """
+    def __init__(self, threshold_ms=50, heartbeat_ms=100, log_path='logs/ui_stalls.log',
+                 max_bytes=1024 * 1024, backups=3):
+        self.threshold_ms = threshold_ms
+        self.heartbeat_ms = heartbeat_ms
+        self.log_path = log_path
+        self.main_thread_id = threading.main_thread().ident
+
+        self.loop_latency = Histogram()   # Retraso de cada latido respecto de lo esperado
+        self.frame_times = Histogram()    # Intervalos entre frames del FrameScheduler
+        self.stalls = 0
+        self.worst_stall_ms = 0.0
+
+        self._last_beat = time.perf_counter()
+        self._captured = None             # Stack capturado durante el bloqueo actual
+        self._lock = threading.Lock()
+        self._pending = deque()           # Bloqueos terminados, para loguear fuera del hilo de Qt
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='StallWatchdog', daemon=True)
+
+        self.logger = logging.getLogger('teto.watchdog')
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        if not self.logger.handlers:
+            os.makedirs(os.path.dirname(log_path) or '.', exist_ok=True)
+            handler = RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            self.logger.addHandler(handler)
+
+    def start(self):
+        self._last_beat = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(1.0)
+        self._flush()
+
+    def beat(self):
+        """Latido desde el hilo de Qt (barato: solo timestamps)"""
+        now = time.perf_counter()
+        with self._lock:
+            interval_ms = (now - self._last_beat) * 1000
+            self._last_beat = now
+            captured, self._captured = self._captured, None
+        late_ms = max(0.0, interval_ms - self.heartbeat_ms)
+        self.loop_latency.add(late_ms)
+        if late_ms >= self.threshold_ms:
+            self._pending.append((late_ms, captured))
+
+    def record_frame(self, dt_ms):
+        """Callback para el FrameScheduler: registra el intervalo entre frames"""
+        self.frame_times.add(dt_ms)
+        return False
+
+    def _run(self):
+        # Duerme hasta que el latido estaría atrasado el umbral (no sondea a intervalo fijo)
+        while True:
+            with self._lock:
+                wait = self._last_beat + (self.heartbeat_ms + self.threshold_ms) / 1000 - time.perf_counter()
+                if wait <= 0:
+                    if self._captured is None:
+                        self._captured = self._capture_main_stack()
+                    # Sigue bloqueado: no hay nada más que capturar hasta el próximo latido
+                    wait = self.heartbeat_ms / 1000
+            self._flush()
+            if self._stop.wait(max(0.001, wait)):
+                return
+
+    def _capture_main_stack(self):
+        frame = sys._current_frames().get(self.main_thread_id)
+        if frame is None:
+            return None
+        return ''.join(traceback.format_stack(frame))
+
+    def _flush(self):
+        while self._pending:
+            late_ms, stack = self._pending.popleft()
+            self.stalls += 1
+            self.worst_stall_ms = max(self.worst_stall_ms, late_ms)
+            message = f"Bloqueo del UI: {late_ms:.0f} ms"
+            if stack:
+                message += f"\n{stack}"
+            self.logger.info(message)
+            print(f"⚠ {message.splitlines()[0]} (stack en {self.log_path})")
+
+    def summary(self):
+        """Resumen para mostrar/loguear al salir"""
+        lines = [
+            f"Watchdog: {self.stalls} bloqueos >= {self.threshold_ms} ms "
+            f"(peor: {self.worst_stall_ms:.0f} ms)",
+            f"Retraso del event loop: prom {self.loop_latency.mean():.1f} ms, "
+            f"desvío {self.loop_latency.stddev():.1f} ms, máx {self.loop_latency.max:.0f} ms",
+            self.loop_latency.format(),
+        ]
+        if self.frame_times.n:
+            lines += [
+                f"Tiempo de frame: prom {self.frame_times.mean():.1f} ms, "
+                f"desvío {self.frame_times.stddev():.1f} ms ({self.frame_times.n} frames)",
+                self.frame_times.format(),
+            ]
+        return "\n".join(lines)
+
+    def log_summary(self):
+        summary = self.summary()
+        self.logger.info("Resumen de sesión\n" + summary)
+        return summary
+
+
+# Test rápido: simula un bloqueo del hilo principal
+if __name__ == "__main__":
+    print("=== Test de StallWatchdog ===\n")
+    import tempfile
+
+    log_path = os.path.join(tempfile.gettempdir(), 'teto_stall_watchdog_test.log')
+    dog = StallWatchdog(threshold_ms=50, heartbeat_ms=10, log_path=log_path)
+    dog.start()
+
+    def busy_work():
+        time.sleep(0.2)  # "Bloqueo" de 200 ms
+
+    for i in range(30):
+        time.sleep(0.01)
+        dog.beat()
+        if i == 15:
+            busy_work()
+
+    dog.stop()
+    print(dog.log_summary())
+    assert dog.stalls == 1
+    with open(log_path, 'r', encoding='utf-8') as f:
+        assert 'busy_work' in f.read()
+    print("\n✓ Test completado")
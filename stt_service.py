@@ -0,0 +1,158 @@
+"""Reconocimiento de voz por segmentos, en paralelo y con la conexión reusada.
+
+recognize_google manda toda la grabación en un solo pedido bloqueante (el
+servicio tarda más cuanto más largo es el audio) y abre una conexión HTTP
+nueva cada vez. Acá:
+
+- Las grabaciones largas se cortan en las pausas (tramos de silencio de al
+  menos STT_MIN_PAUSE), en segmentos parejos de STT_MIN_SEGMENT segundos o
+  más y no más de uno por hilo. Las cortas van enteras: cortarlas no ahorra nada.
+- Los segmentos se reconocen a la vez (STT_WORKERS hilos) y el texto se arma
+  en orden; los segmentos sin nada entendible se saltean.
+- Una requests.Session con keep-alive queda abierta entre frases: TetoSTT se
+  crea una vez y vive lo mismo que la app.
+
+Usa el armado del pedido y el parser de speech_recognition (recognizers.google);
+si la versión instalada no los tiene, cada segmento va por recognize_google.
+STT_ENDPOINT apunta a otro servidor, ej. FakeSpeechServer en benchmarks/fakes.py.
+"""
+import audioop
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import speech_recognition as sr
+
+try:
+    from speech_recognition.recognizers.google import ENDPOINT, OutputParser, create_request_builder
+    GOOGLE_INTERNALS_AVAILABLE = True
+except ImportError:
+    GOOGLE_INTERNALS_AVAILABLE = False
+
+from tracing import tracer
+import config
+
+FRAME_SECONDS = 0.02   # Ventana para medir la energía del audio
+
+
+class TetoSTT:
+    def __init__(self, language="es-AR", endpoint=None, workers=None, min_pause=None, min_segment=None,
+                 timeout=None):
+        self.language = language
+        self.endpoint = endpoint or config.STT_ENDPOINT or (ENDPOINT if GOOGLE_INTERNALS_AVAILABLE else None)
+        self.workers = workers or config.STT_WORKERS
+        self.min_pause = config.STT_MIN_PAUSE if min_pause is None else min_pause
+        self.min_segment = config.STT_MIN_SEGMENT if min_segment is None else min_segment
+        self.timeout = timeout or config.STT_TIMEOUT
+
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='STT')
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._local = threading.local()   # un Recognizer por hilo (modo sin internos)
+        if GOOGLE_INTERNALS_AVAILABLE:
+            self.builder = create_request_builder(endpoint=self.endpoint, language=language)
+            self.parser = OutputParser(show_all=False, with_confidence=False)
+        print(f"✓ STT listo ({language}, {self.workers} segmentos en paralelo)")
+
+    def recognize(self, audio_data, request_id=None):
+        """Texto de la grabación; sr.UnknownValueError si no se entendió nada"""
+        request_id = request_id or tracer.current_request()
+        with tracer.span('stt.split', request_id):
+            segments = self.split(audio_data)
+
+        futures = [self.executor.submit(self._recognize_segment, segment, i, request_id)
+                   for i, segment in enumerate(segments)]
+        texts = [future.result() for future in futures]
+        text = ' '.join(t for t in texts if t)
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+    def split(self, audio_data):
+        """Corta la grabación en las pausas; devuelve una lista de AudioData en orden"""
+        raw = audio_data.frame_data
+        width = audio_data.sample_width
+        rate = audio_data.sample_rate
+        seconds = len(raw) / (rate * width)
+        if seconds < self.min_segment * 2:
+            return [audio_data]
+
+        frame_bytes = int(rate * FRAME_SECONDS) * width
+        energies = [audioop.rms(raw[i:i + frame_bytes], width) for i in range(0, len(raw), frame_bytes)]
+        # Umbral: bastante arriba del ruido de fondo (los tramos más bajos de la grabación)
+        floor = sorted(energies)[len(energies) // 10]
+        threshold = max(config.STT_MIN_ENERGY, floor * 2.5)
+
+        # Pausas candidatas: el medio de cada tramo de silencio largo
+        min_pause_frames = max(1, int(self.min_pause / FRAME_SECONDS))
+        pauses = []
+        silence = 0
+        for i, energy in enumerate(energies):
+            if energy < threshold:
+                silence += 1
+                continue
+            if silence >= min_pause_frames and silence < i:
+                pauses.append(i - silence // 2)
+            silence = 0
+
+        # Segmentos parejos, no más que hilos: se corta en la pausa más cercana a cada reparto ideal
+        total = len(energies)
+        parts = min(self.workers, int(seconds / self.min_segment))
+        min_frames = int(self.min_segment / FRAME_SECONDS)
+        cuts = []
+        for k in range(1, parts):
+            if not pauses:
+                break
+            cut = min(pauses, key=lambda p: abs(p - total * k / parts))
+            if cut - (cuts[-1] if cuts else 0) >= min_frames and total - cut >= min_frames:
+                cuts.append(cut)
+
+        segments = []
+        bounds = [0] + cuts + [total]
+        for a, b in zip(bounds, bounds[1:]):
+            # Segmentos de puro silencio no se mandan
+            if max(energies[a:b], default=0) >= threshold:
+                segments.append(sr.AudioData(raw[a * frame_bytes:b * frame_bytes], rate, width))
+        return segments or [audio_data]
+
+    def _recognize_segment(self, segment, index, request_id):
+        with tracer.span('stt.segment', request_id, index=index,
+                         seconds=round(len(segment.frame_data) / (segment.sample_rate * segment.sample_width), 2)):
+            try:
+                if not GOOGLE_INTERNALS_AVAILABLE:
+                    return self._recognizer().recognize_google(segment, language=self.language)
+                response = self.session.post(self.builder.build_url(), data=self.builder.build_data(segment),
+                                             headers=self.builder.build_headers(segment), timeout=self.timeout)
+                if response.status_code != 200:
+                    raise sr.RequestError(f"recognition request failed: {response.status_code} {response.reason}")
+                return self.parser.parse(response.content.decode('utf-8'))
+            except sr.UnknownValueError:
+                return ''
+            except requests.RequestException as e:
+                raise sr.RequestError(f"recognition connection failed: {e}")
+
+    def _recognizer(self):
+        if not hasattr(self._local, 'recognizer'):
+            self._local.recognizer = sr.Recognizer()
+        return self._local.recognizer
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+
+# Test
+if __name__ == "__main__":
+    print("=== Test de STT ===\n")
+    stt = TetoSTT()
+    recognizer = sr.Recognizer()
+    with sr.Microphone() as source:
+        print("Hablá (se corta solo cuando hacés silencio)...")
+        audio = recognizer.listen(source)
+    start = time.perf_counter()
+    print(f"Reconocido: {stt.recognize(audio)} ({(time.perf_counter() - start) * 1000:.0f} ms, "
+          f"{len(stt.split(audio))} segmentos)")
+    stt.close()
@@ -0,0 +1,159 @@
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+def percentile(values, p):
+    """Percentil con interpolación lineal (p entre 0 y 100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100.0
+    low = int(k)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (k - low)
+
+
+class Tracer:
+    """Trazas livianas por pedido: voz -> IA -> TTS.
+
+    Cada interacción recibe un request_id (new_request) y cada etapa registra un
+    span con inicio y fin. El id "actual" se guarda por hilo (activate), así las
+    capas de abajo (TetoAI, TetoTTS) no necesitan recibirlo por parámetro.
+    """
+    def __init__(self, window=200, max_spans=5000):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+        self._spans = deque(maxlen=max_spans)
+        self._durations = {}  # nombre -> deque de ms (ventana móvil)
+        self.window = window
+        self._t0 = time.perf_counter()
+
+    def new_request(self):
+        """Nuevo id de pedido"""
+        return f"req-{next(self._ids):05d}"
+
+    def current_request(self):
+        return getattr(self._local, 'request_id', None)
+
+    @contextmanager
+    def activate(self, request_id):
+        """Marca request_id como el pedido actual de este hilo"""
+        previous = self.current_request()
+        self._local.request_id = request_id
+        try:
+            yield request_id
+        finally:
+            self._local.request_id = previous
+
+    @contextmanager
+    def span(self, name, request_id=None, **attrs):
+        """Mide un bloque de código como span"""
+        start = time.perf_counter()
+        try:
+            yield attrs
+        finally:
+            self.record(name, start, time.perf_counter(), request_id, **attrs)
+
+    def record(self, name, start, end, request_id=None, **attrs):
+        """Registra un span ya medido (tiempos de time.perf_counter)"""
+        span = {
+            'name': name,
+            'request_id': request_id or self.current_request(),
+            'start_ms': (start - self._t0) * 1000,
+            'duration_ms': (end - start) * 1000,
+            'thread': threading.current_thread().name,
+        }
+        if attrs:
+            span['attrs'] = attrs
+        with self._lock:
+            self._add(span)
+
+    def _add(self, span):
+        self._spans.append(span)
+        durations = self._durations.get(span['name'])
+        if durations is None:
+            durations = self._durations[span['name']] = deque(maxlen=self.window)
+        durations.append(span['duration_ms'])
+
+    @property
+    def origin(self):
+        """Referencia de tiempo (time.perf_counter) de los start_ms de este tracer"""
+        return self._t0
+
+    def merge(self, spans, origin):
+        """Incorpora spans registrados en otro proceso con su propia referencia de tiempo"""
+        offset_ms = (origin - self._t0) * 1000
+        with self._lock:
+            for span in spans:
+                span = dict(span)
+                span['start_ms'] += offset_ms
+                self._add(span)
+
+    def spans(self, request_id=None):
+        with self._lock:
+            return [s for s in self._spans if request_id is None or s['request_id'] == request_id]
+
+    def stats(self):
+        """Percentiles móviles por etapa"""
+        with self._lock:
+            snapshot = {name: list(values) for name, values in self._durations.items()}
+        return {
+            name: {
+                'p50': percentile(values, 50),
+                'p95': percentile(values, 95),
+                'p99': percentile(values, 99),
+                'n': len(values),
+            }
+            for name, values in snapshot.items() if values
+        }
+
+    def format_stats(self):
+        """Resumen en texto para /stats"""
+        stats = self.stats()
+        if not stats:
+            return "Todavía no medí nada."
+        lines = ["Latencias (p50 / p95 / p99):"]
+        for name, s in sorted(stats.items()):
+            lines.append(f"  {name}: {s['p50']:.0f} / {s['p95']:.0f} / {s['p99']:.0f} ms (n={s['n']})")
+        return "\n".join(lines)
+
+    def export_jsonl(self, path):
+        """Un span por línea"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            for span in self.spans():
+                f.write(json.dumps(span, ensure_ascii=False) + '\n')
+
+    def export_chrome(self, path):
+        """Formato Chrome trace (abrir en chrome://tracing o Perfetto)"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        threads = {}
+        events = []
+        for span in self.spans():
+            tid = threads.setdefault(span['thread'], len(threads) + 1)
+            args = dict(span.get('attrs', {}))
+            args['request_id'] = span['request_id']
+            events.append({
+                'name': span['name'],
+                'cat': span['name'].split('.')[0],
+                'ph': 'X',
+                'ts': span['start_ms'] * 1000,
+                'dur': span['duration_ms'] * 1000,
+                'pid': 1,
+                'tid': tid,
+                'args': args,
+            })
+        for name, tid in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid, 'args': {'name': name}})
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+# Tracer global compartido por todos los módulos
+tracer = Tracer()
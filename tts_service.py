@@ -1,22 +1,36 @@
 import asyncio
 import edge_tts
+import io
 import pygame
 import os
 import tempfile
+import time
 from threading import Thread
+from tracing import tracer
+from tts_session import EdgeTTSSession, EDGE_SESSION_AVAILABLE
+import config
 
 class TetoTTS:
-    def __init__(self, voice="es-AR-ElenaNeural"):
+    def __init__(self, voice="es-AR-ElenaNeural", playback=True, persistent=None):
         """
         Voces recomendadas en español:
         - es-AR-ElenaNeural (Argentina, femenina) ← RECOMENDADA para Teto
         - es-AR-TomasNeural (Argentina, masculina)
         - es-ES-ElviraNeural (España, femenina)
         - es-MX-DaliaNeural (México, femenina)
+        
+        Con playback=False no se inicializa el audio (modo servidor: solo síntesis)
+        Con persistent (por defecto config.TTS_PERSISTENT_SESSION) las conexiones con
+        el servicio quedan abiertas y se reusan entre frases (ver tts_session.py)
         """
         self.voice = voice
-        pygame.mixer.init()
+        if playback:
+            pygame.mixer.init()
         self.temp_dir = tempfile.gettempdir()
+        persistent = config.TTS_PERSISTENT_SESSION if persistent is None else persistent
+        self.session = None
+        if persistent and EDGE_SESSION_AVAILABLE:
+            self.session = EdgeTTSSession(pool_size=config.TTS_POOL_SIZE, idle_timeout=config.TTS_IDLE_TIMEOUT)
         print(f"✓ TTS configurado con voz: {voice}")
     
     async def _generate_speech_async(self, text, output_file):
@@ -24,47 +38,103 @@ class TetoTTS:
         communicate = edge_tts.Communicate(text, self.voice)
         await communicate.save(output_file)
     
+    async def synthesize(self, text, voice=None):
+        """Genera el audio en memoria (mp3) sin tocar disco ni reproducir"""
+        if self.session:
+            try:
+                return await self.session.synthesize_async(text, voice or self.voice)
+            except Exception as e:
+                print(f"⚠ Sesión de TTS falló ({e}); uso una conexión nueva")
+        communicate = edge_tts.Communicate(text, voice or self.voice)
+        audio = bytearray()
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                audio.extend(chunk["data"])
+        return bytes(audio)
+    
     def generate_speech(self, text):
         """Genera el archivo de audio de forma síncrona"""
         output_file = os.path.join(self.temp_dir, "teto_speech.mp3")
         
+        if self.session:
+            try:
+                audio = self.session.synthesize(text, self.voice)
+                with open(output_file, 'wb') as f:
+                    f.write(audio)
+                return output_file
+            except Exception as e:
+                print(f"⚠ Sesión de TTS falló ({e}); uso una conexión nueva")
+        
         # Ejecutar la función async
         asyncio.run(self._generate_speech_async(text, output_file))
         
         return output_file
     
-    def speak(self, text, blocking=False):
+    def prewarm(self):
+        """Abre la conexión con el servicio de antemano (llamar cuando se viene una respuesta)"""
+        if self.session:
+            self.session.prewarm()
+    
+    def speak(self, text, blocking=False, request_id=None):
         """
         Hace que Teto hable
         
         Args:
             text: El texto a decir
             blocking: Si True, espera a que termine de hablar
+            request_id: Pedido al que pertenece (para las trazas)
         """
+        request_id = request_id or tracer.current_request()
+        
         def _speak_thread():
             try:
                 # Generar audio
-                audio_file = self.generate_speech(text)
-                
-                # Reproducir
-                pygame.mixer.music.load(audio_file)
-                pygame.mixer.music.play()
-                
-                # Esperar a que termine
-                while pygame.mixer.music.get_busy():
-                    pygame.time.Clock().tick(10)
+                with tracer.span('tts.synthesize', request_id, chars=len(text)):
+                    audio_file = self.generate_speech(text)
                 
-                # Limpiar
-                pygame.mixer.music.unload()
+                self._play(audio_file, request_id)
                 
             except Exception as e:
                 print(f"✗ Error en TTS: {e}")
         
+        self._run(_speak_thread, blocking)
+    
+    def play(self, audio, blocking=False, request_id=None):
+        """Reproduce audio ya sintetizado (bytes mp3 de synthesize), sin esperar a edge-tts"""
+        request_id = request_id or tracer.current_request()
+        
+        def _play_thread():
+            try:
+                self._play(io.BytesIO(audio), request_id)
+            except Exception as e:
+                print(f"✗ Error en TTS: {e}")
+        
+        self._run(_play_thread, blocking)
+    
+    def _play(self, source, request_id):
+        """Reproduce un archivo (o BytesIO) y espera a que termine"""
+        with tracer.span('tts.playback_start', request_id):
+            if isinstance(source, io.BytesIO):
+                pygame.mixer.music.load(source, 'mp3')
+            else:
+                pygame.mixer.music.load(source)
+            pygame.mixer.music.play()
+        
+        # Esperar a que termine
+        play_start = time.perf_counter()
+        while pygame.mixer.music.get_busy():
+            pygame.time.Clock().tick(10)
+        tracer.record('tts.playback', play_start, time.perf_counter(), request_id)
+        
+        # Limpiar
+        pygame.mixer.music.unload()
+    
+    def _run(self, target, blocking):
         if blocking:
-            _speak_thread()
+            target()
         else:
             # Ejecutar en thread separado para no bloquear la UI
-            thread = Thread(target=_speak_thread)
+            thread = Thread(target=target)
             thread.daemon = True
             thread.start()
     
@@ -72,6 +142,12 @@ class TetoTTS:
         """Detiene la reproducción actual"""
         pygame.mixer.music.stop()
     
+    def close(self):
+        """Cierra las conexiones con el servicio de voz"""
+        if self.session:
+            self.session.close()
+            self.session = None
+    
     def is_speaking(self):
         """Retorna True si está hablando actualmente"""
         return pygame.mixer.music.get_busy()
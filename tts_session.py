@@ -0,0 +1,235 @@
+"""Conexiones persistentes con el servicio de voz de Edge (edge-tts).
+
+edge_tts.Communicate abre una conexión TLS + WebSocket nueva por cada texto:
+con frases sueltas eso es un handshake por frase. El protocolo acepta varios
+pedidos seguidos por la misma conexión (cada uno con su X-RequestId, hasta
+turn.end), así que acá las conexiones quedan abiertas y se reusan:
+
+- Un event loop propio en un hilo: las conexiones de aiohttp viven en un
+  loop, y TetoTTS se usa desde hilos (asyncio.run) y desde el loop del servidor.
+- Pool de hasta TTS_POOL_SIZE conexiones (una frase a la vez por conexión).
+- prewarm(): abre una conexión de antemano, mientras la IA todavía está
+  pensando, así la primera frase no paga el handshake.
+- Reconexión: si el servicio cerró la conexión (lo hace cuando queda ociosa)
+  se abre otra y se reintenta una vez, siempre que no haya llegado audio.
+  Las que pasaron TTS_IDLE_TIMEOUT sin uso se cierran antes de reusarlas.
+
+Usa piezas internas de edge_tts (armado del SSML, token Sec-MS-GEC): si la
+versión instalada no las tiene, EDGE_SESSION_AVAILABLE es False y TetoTTS
+sigue con Communicate.
+
+EDGE_TTS_WSS_URL (variable de entorno) apunta a otro servidor, ej. para
+pruebas (ver FakeEdgeTTSServer en benchmarks/fakes.py).
+"""
+import asyncio
+import os
+import threading
+import time
+from xml.sax.saxutils import escape
+
+try:
+    import aiohttp
+    from edge_tts.communicate import (_SSL_CTX, connect_id, date_to_string, get_headers_and_data, mkssml,
+                                      remove_incompatible_characters, split_text_by_byte_length,
+                                      ssml_headers_plus_data)
+    from edge_tts.constants import SEC_MS_GEC_VERSION, WSS_HEADERS, WSS_URL
+    from edge_tts.data_classes import TTSConfig
+    from edge_tts.drm import DRM
+    from edge_tts.exceptions import NoAudioReceived, UnexpectedResponse
+    EDGE_SESSION_AVAILABLE = True
+except ImportError:
+    EDGE_SESSION_AVAILABLE = False
+
+from tracing import tracer
+
+SPEECH_CONFIG = (
+    "Content-Type:application/json; charset=utf-8\r\n"
+    "Path:speech.config\r\n\r\n"
+    '{"context":{"synthesis":{"audio":{"metadataoptions":{'
+    '"sentenceBoundaryEnabled":"false","wordBoundaryEnabled":"false"},'
+    '"outputFormat":"audio-24khz-48kbitrate-mono-mp3"}}}}\r\n'
+)
+
+
+class ConnectionLost(ConnectionError):
+    """El servicio cerró la conexión"""
+
+
+class _Connection:
+    def __init__(self, session, ws):
+        self.session = session
+        self.ws = ws
+        self.last_used = time.monotonic()
+
+    @property
+    def closed(self):
+        return self.ws.closed
+
+    async def close(self):
+        await self.ws.close()
+        await self.session.close()
+
+
+class EdgeTTSSession:
+    def __init__(self, pool_size=2, idle_timeout=30.0, url=None, connect_timeout=10, receive_timeout=60):
+        self.url = url or os.environ.get('EDGE_TTS_WSS_URL') or WSS_URL
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self.receive_timeout = receive_timeout
+        self.connects = 0
+        self.reuses = 0
+        self.reconnects = 0
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='EdgeTTS', daemon=True)
+        self._thread.start()
+        self._slots = asyncio.Semaphore(pool_size)
+        self._idle = []          # conexiones libres (solo se tocan desde el loop)
+        self._warming = False
+
+    # --- Uso desde afuera (cualquier hilo o loop) ---
+
+    def synthesize(self, text, voice, rate="+0%", volume="+0%", pitch="+0Hz"):
+        """Audio mp3 de `text` (bloquea hasta tenerlo)"""
+        return self._submit(text, voice, rate, volume, pitch).result()
+
+    async def synthesize_async(self, text, voice, rate="+0%", volume="+0%", pitch="+0Hz"):
+        return await asyncio.wrap_future(self._submit(text, voice, rate, volume, pitch))
+
+    def prewarm(self):
+        """Abre una conexión en segundo plano si no hay ninguna libre (no bloquea)"""
+        asyncio.run_coroutine_threadsafe(self._prewarm(), self._loop)
+
+    def close_idle(self):
+        """Cierra las conexiones libres (la próxima frase vuelve a conectar)"""
+        asyncio.run_coroutine_threadsafe(self._close_idle(), self._loop).result(5)
+
+    def close(self):
+        self.close_idle()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def stats(self):
+        return {'connects': self.connects, 'reuses': self.reuses, 'reconnects': self.reconnects,
+                'idle': len(self._idle)}
+
+    def _submit(self, text, voice, rate, volume, pitch):
+        request_id = tracer.current_request()
+        return asyncio.run_coroutine_threadsafe(
+            self._synthesize(text, TTSConfig(voice, rate, volume, pitch, 'SentenceBoundary'), request_id),
+            self._loop)
+
+    # --- Dentro del loop ---
+
+    async def _synthesize(self, text, tts_config, request_id):
+        async with self._slots:
+            for attempt in range(2):
+                conn = await self._checkout(request_id)
+                audio = bytearray()
+                try:
+                    for part in split_text_by_byte_length(escape(remove_incompatible_characters(text)), 4096):
+                        await self._request(conn, tts_config, part, audio)
+                except (aiohttp.ClientError, ConnectionError, asyncio.TimeoutError):
+                    await conn.close()
+                    # Con audio a medias no se puede reintentar sin repetir lo ya dicho
+                    if audio or attempt:
+                        raise
+                    self.reconnects += 1
+                    continue
+                except BaseException:
+                    await conn.close()
+                    raise
+                conn.last_used = time.monotonic()
+                self._idle.append(conn)
+                if not audio:
+                    raise NoAudioReceived("No se recibió audio")
+                return bytes(audio)
+
+    async def _checkout(self, request_id=None):
+        """Una conexión libre y vigente, o una nueva"""
+        while self._idle:
+            conn = self._idle.pop()
+            if conn.closed or time.monotonic() - conn.last_used > self.idle_timeout:
+                await conn.close()
+                continue
+            self.reuses += 1
+            return conn
+        start = time.perf_counter()
+        conn = await self._connect()
+        tracer.record('tts.connect', start, time.perf_counter(), request_id)
+        return conn
+
+    async def _connect(self):
+        self.connects += 1
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.connect_timeout,
+                                        sock_read=self.receive_timeout)
+        for attempt in range(2):
+            session = aiohttp.ClientSession(trust_env=True, timeout=timeout)
+            try:
+                ws = await session.ws_connect(
+                    f"{self.url}&ConnectionId={connect_id()}"
+                    f"&Sec-MS-GEC={DRM.generate_sec_ms_gec()}"
+                    f"&Sec-MS-GEC-Version={SEC_MS_GEC_VERSION}",
+                    compress=15,
+                    headers=DRM.headers_with_muid(WSS_HEADERS),
+                    ssl=_SSL_CTX,
+                )
+                await ws.send_str(f"X-Timestamp:{date_to_string()}\r\n{SPEECH_CONFIG}")
+                return _Connection(session, ws)
+            except aiohttp.ClientResponseError as e:
+                await session.close()
+                # 403: reloj desfasado para el token; edge_tts corrige el desfase y se reintenta
+                if e.status != 403 or attempt:
+                    raise
+                DRM.handle_client_response_error(e)
+            except BaseException:
+                await session.close()
+                raise
+
+    async def _request(self, conn, tts_config, part, audio):
+        """Un turno: manda el SSML y junta el audio hasta turn.end"""
+        await conn.ws.send_str(ssml_headers_plus_data(connect_id(), date_to_string(), mkssml(tts_config, part)))
+        while True:
+            message = await conn.ws.receive(timeout=self.receive_timeout)
+            if message.type == aiohttp.WSMsgType.TEXT:
+                data = message.data.encode('utf-8')
+                headers, _ = get_headers_and_data(data, data.find(b"\r\n\r\n"))
+                if headers.get(b"Path") == b"turn.end":
+                    return
+            elif message.type == aiohttp.WSMsgType.BINARY:
+                if len(message.data) < 2:
+                    raise UnexpectedResponse("Mensaje binario sin largo de encabezado")
+                header_length = int.from_bytes(message.data[:2], 'big')
+                headers, data = get_headers_and_data(message.data, header_length)
+                if headers.get(b"Path") != b"audio":
+                    raise UnexpectedResponse("Mensaje binario que no es audio")
+                audio.extend(data)
+            else:
+                raise ConnectionLost(f"conexión cerrada por el servicio ({message.type.name})")
+
+    async def _prewarm(self):
+        if self._warming or any(not conn.closed for conn in self._idle):
+            return
+        self._warming = True
+        try:
+            conn = await self._connect()
+            conn.last_used = time.monotonic()
+            self._idle.append(conn)
+        except Exception as e:
+            print(f"⚠ No pude precalentar el TTS: {e}")
+        finally:
+            self._warming = False
+
+    async def _close_idle(self):
+        while self._idle:
+            await self._idle.pop().close()
+
+
+if __name__ == "__main__":
+    # Prueba rápida contra el servicio real: la segunda frase reusa la conexión
+    session = EdgeTTSSession()
+    for text in ["Hola, soy Teto.", "¿Qué hacés?", "Me gusta el pan francés."]:
+        start = time.perf_counter()
+        audio = session.synthesize(text, "es-AR-ElenaNeural")
+        print(f"{text!r}: {len(audio)} bytes en {(time.perf_counter() - start) * 1000:.0f} ms")
+    print(session.stats())
+    session.close()